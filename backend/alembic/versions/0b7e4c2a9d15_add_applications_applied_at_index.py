@@ -0,0 +1,29 @@
+"""add_applications_applied_at_index
+
+Revision ID: 0b7e4c2a9d15
+Revises: f3a9d1c6b2e7
+Create Date: 2026-10-18 20:04:37.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e4c2a9d15'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d1c6b2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # unscoped (admin) 30-day trend and recent applications: range scan on applied_at
+    with op.get_context().autocommit_block():
+        op.create_index('ix_applications_applied_at', 'applications', ['applied_at'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_applications_applied_at', table_name='applications', postgresql_concurrently=True)
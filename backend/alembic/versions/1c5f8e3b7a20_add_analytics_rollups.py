@@ -0,0 +1,74 @@
+"""add_analytics_rollups
+
+Revision ID: 1c5f8e3b7a20
+Revises: 0b7e4c2a9d15
+Create Date: 2026-10-18 21:26:48.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c5f8e3b7a20'
+down_revision: Union[str, Sequence[str], None] = '0b7e4c2a9d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COUNTERS = ("applications, pending, under_review, accepted, rejected, other_status, "
+            "score_sum, score_count, score_h0, score_h20, score_h40, score_h60, score_h80")
+
+
+def _counters():
+    return [
+        sa.Column(c, sa.Float() if c == "score_sum" else sa.Integer(), nullable=False, server_default="0")
+        for c in COUNTERS.split(", ")
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("job_id", sa.Integer(), sa.ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+        *_counters(),
+    )
+    op.create_index(op.f("ix_job_daily_stats_job_id"), "job_daily_stats", ["job_id"], unique=False)
+    op.create_table(
+        "owner_daily_stats",
+        sa.Column("owner_id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        *_counters(),
+    )
+    # initial fill; afterwards maintained incrementally (app/services/analytics_rollups.py)
+    for table, key in (("job_daily_stats (day, job_id", "a.job_id"),
+                       ("owner_daily_stats (day, owner_id", "COALESCE(j.owner_user_id, 0)")):
+        op.execute(f"""
+            INSERT INTO {table}, {COUNTERS})
+            SELECT (COALESCE(a.applied_at, now()) AT TIME ZONE 'UTC')::date, {key},
+                   count(*),
+                   count(*) FILTER (WHERE a.status = 'pending'),
+                   count(*) FILTER (WHERE a.status = 'under_review'),
+                   count(*) FILTER (WHERE a.status = 'accepted'),
+                   count(*) FILTER (WHERE a.status = 'rejected'),
+                   count(*) FILTER (WHERE a.status IS NULL
+                                    OR a.status NOT IN ('pending', 'under_review', 'accepted', 'rejected')),
+                   COALESCE(sum(a.score), 0),
+                   count(a.score),
+                   count(*) FILTER (WHERE a.score < 20),
+                   count(*) FILTER (WHERE a.score >= 20 AND a.score < 40),
+                   count(*) FILTER (WHERE a.score >= 40 AND a.score < 60),
+                   count(*) FILTER (WHERE a.score >= 60 AND a.score < 80),
+                   count(*) FILTER (WHERE a.score >= 80)
+            FROM applications a JOIN jobs j ON j.id = a.job_id
+            GROUP BY 1, 2
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("owner_daily_stats")
+    op.drop_index(op.f("ix_job_daily_stats_job_id"), table_name="job_daily_stats")
+    op.drop_table("job_daily_stats")
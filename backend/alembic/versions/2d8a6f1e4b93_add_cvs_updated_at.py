@@ -0,0 +1,28 @@
+"""add_cvs_updated_at
+
+Revision ID: 2d8a6f1e4b93
+Revises: 1c5f8e3b7a20
+Create Date: 2026-10-18 23:12:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8a6f1e4b93'
+down_revision: Union[str, Sequence[str], None] = '1c5f8e3b7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # change marker for the CV skill index: moves when a CV is relinked to another document
+    op.add_column('cvs', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                                   nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('cvs', 'updated_at')
@@ -0,0 +1,28 @@
+"""add_job_field_vectors
+
+Revision ID: a6d3e0b8f192
+Revises: f27c84a1d9e3
+Create Date: 2026-10-18 14:05:37.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e0b8f192'
+down_revision: Union[str, Sequence[str], None] = 'f27c84a1d9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("job_embeddings", sa.Column("field_vectors", sa.LargeBinary(), nullable=True))
+    op.add_column("job_embeddings", sa.Column("fields_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("job_embeddings", "fields_hash")
+    op.drop_column("job_embeddings", "field_vectors")
@@ -0,0 +1,29 @@
+"""add_cv_document_skills
+
+Revision ID: b91f4c27d6e8
+Revises: a6d3e0b8f192
+Create Date: 2026-10-18 14:52:09.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b91f4c27d6e8'
+down_revision: Union[str, Sequence[str], None] = 'a6d3e0b8f192'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("cv_documents", sa.Column("skills", postgresql.JSONB(), nullable=True))
+    op.add_column("cv_documents", sa.Column("skills_version", sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("cv_documents", "skills_version")
+    op.drop_column("cv_documents", "skills")
@@ -0,0 +1,41 @@
+"""add_job_feeds
+
+Revision ID: c2e87a5f1b39
+Revises: b91f4c27d6e8
+Create Date: 2026-10-18 15:34:48.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e87a5f1b39'
+down_revision: Union[str, Sequence[str], None] = 'b91f4c27d6e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_feeds",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("cv_id", sa.Integer(), sa.ForeignKey("cvs.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("cv_hash", sa.String(length=64), nullable=False),
+        sa.Column("model_name", sa.String(), nullable=False),
+        sa.Column("items", postgresql.JSONB(), nullable=False, server_default="[]"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.create_index(op.f("ix_job_feeds_cv_hash"), "job_feeds", ["cv_hash"], unique=False)
+    # archive / delete patches look feeds up by contained job id
+    op.create_index("ix_job_feeds_items", "job_feeds", ["items"], postgresql_using="gin",
+                    postgresql_ops={"items": "jsonb_path_ops"})
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_feeds_items", table_name="job_feeds")
+    op.drop_index(op.f("ix_job_feeds_cv_hash"), table_name="job_feeds")
+    op.drop_table("job_feeds")
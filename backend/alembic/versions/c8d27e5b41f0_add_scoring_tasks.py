@@ -0,0 +1,43 @@
+"""add_scoring_tasks
+
+Revision ID: c8d27e5b41f0
+Revises: b3c1f0a9d2e4
+Create Date: 2026-10-18 10:03:17.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d27e5b41f0'
+down_revision: Union[str, Sequence[str], None] = 'b3c1f0a9d2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scoring_tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("application_id", sa.Integer(), sa.ForeignKey("applications.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("cv_id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.create_index(op.f("ix_scoring_tasks_id"), "scoring_tasks", ["id"], unique=False)
+    # workers poll: status = 'queued' AND next_attempt_at <= now() ORDER BY id
+    op.create_index("ix_scoring_tasks_status_next", "scoring_tasks", ["status", "next_attempt_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scoring_tasks_status_next", table_name="scoring_tasks")
+    op.drop_index(op.f("ix_scoring_tasks_id"), table_name="scoring_tasks")
+    op.drop_table("scoring_tasks")
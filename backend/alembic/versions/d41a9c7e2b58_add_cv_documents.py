@@ -0,0 +1,43 @@
+"""add_cv_documents
+
+Revision ID: d41a9c7e2b58
+Revises: c8d27e5b41f0
+Create Date: 2026-10-18 10:47:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a9c7e2b58'
+down_revision: Union[str, Sequence[str], None] = 'c8d27e5b41f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cv_documents",
+        sa.Column("content_hash", sa.String(length=64), primary_key=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("normalized_text", sa.Text(), nullable=False),
+        sa.Column("page_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.add_column("cvs", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_index(op.f("ix_cvs_content_hash"), "cvs", ["content_hash"], unique=False)
+    op.create_foreign_key(
+        "fk_cvs_content_hash_cv_documents",
+        "cvs", "cv_documents",
+        ["content_hash"], ["content_hash"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_cvs_content_hash_cv_documents", "cvs", type_="foreignkey")
+    op.drop_index(op.f("ix_cvs_content_hash"), table_name="cvs")
+    op.drop_column("cvs", "content_hash")
+    op.drop_table("cv_documents")
@@ -0,0 +1,45 @@
+"""add_score_cache
+
+Revision ID: d5a3c9e17f42
+Revises: c2e87a5f1b39
+Create Date: 2026-10-18 16:52:10.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a3c9e17f42'
+down_revision: Union[str, Sequence[str], None] = 'c2e87a5f1b39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "score_cache",
+        sa.Column("cv_hash", sa.String(length=64), primary_key=True),
+        sa.Column("job_id", sa.Integer(), sa.ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("bi_model", sa.String(), primary_key=True),
+        sa.Column("cross_model", sa.String(), primary_key=True),
+        sa.Column("job_version", sa.String(length=64), nullable=False),
+        sa.Column("bi_score", sa.Float(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("stale", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    # prune after a model change only touches the stale rows
+    op.create_index("ix_score_cache_stale", "score_cache", ["bi_model", "cross_model"],
+                    postgresql_where=sa.text("stale"))
+    op.add_column("applications", sa.Column("score_model", sa.String(), nullable=True))
+    op.create_index(op.f("ix_applications_score_model"), "applications", ["score_model"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_applications_score_model"), table_name="applications")
+    op.drop_column("applications", "score_model")
+    op.drop_index("ix_score_cache_stale", table_name="score_cache")
+    op.drop_table("score_cache")
@@ -0,0 +1,28 @@
+"""add_cv_document_embeddings
+
+Revision ID: e5f09b3d7a61
+Revises: d41a9c7e2b58
+Create Date: 2026-10-18 11:35:52.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f09b3d7a61'
+down_revision: Union[str, Sequence[str], None] = 'd41a9c7e2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("cv_documents", sa.Column("embedding", sa.LargeBinary(), nullable=True))
+    op.add_column("cv_documents", sa.Column("embedding_model", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("cv_documents", "embedding_model")
+    op.drop_column("cv_documents", "embedding")
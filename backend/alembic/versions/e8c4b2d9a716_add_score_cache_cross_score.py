@@ -0,0 +1,27 @@
+"""add_score_cache_cross_score
+
+Revision ID: e8c4b2d9a716
+Revises: d5a3c9e17f42
+Create Date: 2026-10-18 18:05:37.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4b2d9a716'
+down_revision: Union[str, Sequence[str], None] = 'd5a3c9e17f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # raw cross-encoder logit; rows without it are recomputed on next use
+    op.add_column("score_cache", sa.Column("cross_score", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("score_cache", "cross_score")
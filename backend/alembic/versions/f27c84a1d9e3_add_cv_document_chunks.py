@@ -0,0 +1,31 @@
+"""add_cv_document_chunks
+
+Revision ID: f27c84a1d9e3
+Revises: e5f09b3d7a61
+Create Date: 2026-10-18 12:20:14.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f27c84a1d9e3'
+down_revision: Union[str, Sequence[str], None] = 'e5f09b3d7a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("cv_documents", sa.Column("chunk_embeddings", sa.LargeBinary(), nullable=True))
+    op.add_column("cv_documents", sa.Column("chunks", postgresql.JSONB(), nullable=True))
+    # vectors computed before chunking was introduced are recomputed on next use
+    op.execute("UPDATE cv_documents SET embedding = NULL, embedding_model = NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("cv_documents", "chunks")
+    op.drop_column("cv_documents", "chunk_embeddings")
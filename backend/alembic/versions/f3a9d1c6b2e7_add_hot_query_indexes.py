@@ -0,0 +1,50 @@
+"""add_hot_query_indexes
+
+Revision ID: f3a9d1c6b2e7
+Revises: e8c4b2d9a716
+Create Date: 2026-10-18 19:12:03.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d1c6b2e7'
+down_revision: Union[str, Sequence[str], None] = 'e8c4b2d9a716'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PUBLISHED = sa.text("status = 'published'")
+
+# (name, table, columns / expressions, extra kwargs); kept in sync with app/models.py
+INDEXES = [
+    ("ix_jobs_status_posted_at", "jobs", ["status", sa.text("posted_at DESC"), sa.text("id DESC")], {}),
+    ("ix_jobs_published_posted_at", "jobs", [sa.text("posted_at DESC"), sa.text("id DESC")],
+     {"postgresql_where": PUBLISHED}),
+    ("ix_jobs_owner_posted_at", "jobs", ["owner_user_id", sa.text("posted_at DESC")], {}),
+    ("ix_jobs_published_city", "jobs", [sa.text("lower(location_city)")], {"postgresql_where": PUBLISHED}),
+    ("ix_jobs_skills", "jobs", ["skills"],
+     {"postgresql_using": "gin", "postgresql_ops": {"skills": "jsonb_path_ops"}}),
+    ("ix_applications_job_applied_at", "applications", ["job_id", sa.text("applied_at DESC")], {}),
+    ("ix_applications_user_applied_at", "applications", ["user_id", sa.text("applied_at DESC")], {}),
+    ("ix_cvs_user_uploaded_at", "cvs", ["user_id", sa.text("uploaded_at DESC")], {}),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: no write lock on the live tables while building; needs autocommit
+    with op.get_context().autocommit_block():
+        for name, table, cols, kw in INDEXES:
+            op.create_index(name, table, cols, unique=False, postgresql_concurrently=True, **kw)
+    op.execute("ANALYZE jobs")
+    op.execute("ANALYZE applications")
+    op.execute("ANALYZE cvs")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
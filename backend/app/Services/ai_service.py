@@ -1,34 +1,60 @@
 from sentence_transformers import SentenceTransformer, CrossEncoder, util
 import numpy as np
 import os
-import hashlib
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+from app.services.job_embeddings import JOB_FIELD_WEIGHTS, encode_job_fields, job_fields
+from app.services import score_cache
+from app.utils import nlp
+from app.utils.embedding_cache import EmbeddingCache
+from app.utils.model_registry import registry
 
 _AI_MODEL_NAME = os.getenv("BI_ENCODER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 _CROSS_ENCODER_NAME = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
-_bi_encoder: SentenceTransformer | None = None
-_cross_encoder: CrossEncoder | None = None
-_embeddings_cache: Dict[str, np.ndarray] = {}
+# LRU of normalized embeddings keyed by sha256(model, text); popular job
+# texts are encoded once per process.
+_embeddings_cache = EmbeddingCache(
+    max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("EMBED_CACHE_MAX_MB", "64")) * 1024 * 1024,
+)
 
+# Same registry entries as app.utils.nlp: one copy of each model per process
 def get_bi_encoder() -> SentenceTransformer:
-    global _bi_encoder
-    if _bi_encoder is None:
-        _bi_encoder = SentenceTransformer(_AI_MODEL_NAME)
-    return _bi_encoder
+    return registry.bi_encoder(_AI_MODEL_NAME)
 
 def get_cross_encoder() -> CrossEncoder:
-    global _cross_encoder
-    if _cross_encoder is None:
-        _cross_encoder = CrossEncoder(_CROSS_ENCODER_NAME)
-    return _cross_encoder
+    return registry.cross_encoder(_CROSS_ENCODER_NAME)
+
+def cross_score(a: str, b: str) -> float:
+    """Raw cross-encoder logit for one pair; shares nlp's micro-batcher, so pairs from both paths batch together."""
+    return nlp.cross_logit(a, b)
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Normalized embeddings for `texts`, served from the LRU cache when
+    possible; misses are encoded together in one batch.
+    """
+    out: List[Optional[np.ndarray]] = [_embeddings_cache.get(_AI_MODEL_NAME, t) for t in texts]
+    missing = [i for i, v in enumerate(out) if v is None]
+    if missing:
+        # de-duplicate so the same text is not encoded twice in one batch
+        uniq = list(dict.fromkeys(texts[i] for i in missing))
+        vecs = get_bi_encoder().encode(uniq, normalize_embeddings=True, convert_to_numpy=True)
+        fresh = dict(zip(uniq, vecs))
+        for t, v in fresh.items():
+            _embeddings_cache.put(_AI_MODEL_NAME, t, v)
+        for i in missing:
+            out[i] = fresh[texts[i]]
+    return np.stack(out)
+
+def cache_stats() -> Dict[str, float]:
+    return {**_embeddings_cache.stats(), "cross_batching": nlp.cross_batch_stats()}
 
 def compute_deterministic_score(a: str, b: str) -> float:
     """
     Returns cosine similarity in [-1, 1] using public API only.
     """
-    m = get_bi_encoder()
-    ea = m.encode([a or ""], normalize_embeddings=True, convert_to_numpy=True)[0]
-    eb = m.encode([b or ""], normalize_embeddings=True, convert_to_numpy=True)[0]
+    ea, eb = embed_texts([a or "", b or ""])
     return float(util.cos_sim(ea, eb).item())
 
 def warmup():
@@ -47,33 +73,24 @@ class AIService:
         if application_data.get('cover_letter'):
             app_parts.append(f"Cover Letter: {application_data['cover_letter']}")
 
-        # Build job text
-        job_parts = []
-        if job_data.get('title'):
-            job_parts.append(f"Job Title: {job_data['title']}")
-        if job_data.get('description'):
-            job_parts.append(f"Job Description: {job_data['description']}")
-        if job_data.get('requirements'):
-            if isinstance(job_data['requirements'], list):
-                job_parts.append(f"Requirements: {' -- '.join(job_data['requirements'])}")
-            else:
-                job_parts.append(f"Requirements: {job_data['requirements']}")
-
+        # Structured job document: each field embedded separately (LRU-cached)
+        fields = job_fields(job_data)
+        present = list(dict.fromkeys(v for v in fields.values() if v))
         application_text = " ".join(app_parts)
-        job_text = " ".join(job_parts)
+        job_text = " ".join(v for v in fields.values() if v)
 
-        # Use safe deterministic scoring
-        bi_score = compute_deterministic_score(application_text, job_text)
+        vecs = embed_texts([application_text] + present)
+        field_vecs = encode_job_fields(fields, dict(zip(present, vecs[1:])), vecs.shape[1])
+        # weighted fusion of the per-field cosines, one matmul; cosine is [-1,1]
+        cos = float(nlp.fused_field_cosine(vecs[0], field_vecs, JOB_FIELD_WEIGHTS)[0, 0])
+        bi_score = float(score_cache.final_scores(cos, reranked=False))
 
         # Enhanced scoring with cross-encoder if enabled
         use_cross = os.getenv("USE_CROSS_ENCODER", "true").lower() in {"1", "true", "yes"}
         if use_cross and len(application_text.split()) > 10 and len(job_text.split()) > 10:
             try:
-                cross_encoder = get_cross_encoder()
-                raw = cross_encoder.predict([(application_text, job_text)])[0]
-                cross_score = 1 / (1 + np.exp(-raw))
-                # Blend scores: 70% cross-encoder, 30% bi-encoder
-                return float(max(0.0, min(1.0, 0.7 * cross_score + 0.3 * bi_score)))
+                raw = cross_score(application_text, job_text)
+                return float(score_cache.final_scores(cos, raw))
             except Exception:
                 pass
 
@@ -0,0 +1,277 @@
+# app/services/analytics_rollups.py
+"""
+Daily analytics rollups, so dashboards never aggregate raw applications.
+
+Two tables with the same counters, keyed by the UTC day the application was
+made: `job_daily_stats` (day, job_id) and `owner_daily_stats` (day, owner;
+0 = jobs without an owner). Counters: applications, one count per status,
+score sum / count and the five histogram buckets of the 0-100 score.
+
+They are maintained in the writer's transaction by upserting deltas
+(col = col + excluded.col), so concurrent writers never lose an update.
+The old status / score a delta is computed from is read with the
+application row locked (FOR UPDATE), so two writers cannot both move the
+same old value:
+  - create_application      -> application_created
+  - status change           -> status_changed
+  - Application.score write -> scores_changed (before the bulk update)
+  - job delete              -> job_deleted (the job rows cascade)
+
+rebuild() recomputes both tables from `applications` in one transaction; the
+reconciler runs it every ROLLUP_RECONCILE_INTERVAL_SEC to absorb any drift
+(writes outside these paths, manual SQL ...). See also rebuild_rollups.py.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+logger = logging.getLogger("smartrecruit")
+
+# 0 disables the periodic rebuild
+ROLLUP_RECONCILE_INTERVAL_SEC = float(os.getenv("ROLLUP_RECONCILE_INTERVAL_SEC", "86400"))
+
+STATUSES = ("pending", "under_review", "accepted", "rejected")
+BINS = [0, 20, 40, 60, 80, 100]
+COUNTERS = (
+    "applications", *STATUSES, "other_status",
+    "score_sum", "score_count", "score_h0", "score_h20", "score_h40", "score_h60", "score_h80",
+)
+_LOCK_KEY = 0x5E7A_0011  # pg advisory lock: one rebuild at a time across workers
+
+def _status_col(status: Optional[str]) -> str:
+    return status if status in STATUSES else "other_status"
+
+def _bucket_col(score: float) -> str:
+    """Same binning as the dashboards: [0,20) [20,40) [40,60) [60,80) [80,...)"""
+    for lo in BINS[1:-1]:
+        if score < lo:
+            return f"score_h{lo - 20}"
+    return "score_h80"
+
+def _day(applied_at: Optional[datetime]) -> date:
+    if applied_at is None:
+        return datetime.now(timezone.utc).date()
+    if applied_at.tzinfo is None:
+        applied_at = applied_at.replace(tzinfo=timezone.utc)
+    return applied_at.astimezone(timezone.utc).date()
+
+def _score_delta(delta: Dict[str, float], score: Optional[float], sign: int) -> None:
+    if score is None:
+        return
+    delta["score_sum"] += sign * float(score)
+    delta["score_count"] += sign
+    delta[_bucket_col(float(score))] += sign
+
+# ---- Incremental updates ----
+Key = Tuple[date, int, Optional[int]]  # (day, job_id, owner_user_id)
+
+def _apply(db: Session, deltas: Dict[Key, Dict[str, float]]) -> None:
+    """Upsert the deltas into both tables (no commit: part of the caller's transaction)."""
+    job_rows: Dict[Tuple[date, int], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    owner_rows: Dict[Tuple[date, int], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for (day, job_id, owner_id), delta in deltas.items():
+        for col, v in delta.items():
+            if v:
+                job_rows[(day, job_id)][col] += v
+                owner_rows[(day, owner_id or 0)][col] += v
+    for model, key_cols, rows in (
+        (models.JobDailyStats, ("day", "job_id"), job_rows),
+        (models.OwnerDailyStats, ("day", "owner_id"), owner_rows),
+    ):
+        values = [
+            {**dict(zip(key_cols, key)),
+             **{c: delta.get(c, 0) if c == "score_sum" else int(delta.get(c, 0)) for c in COUNTERS}}
+            for key, delta in rows.items() if any(delta.values())
+        ]
+        if not values:
+            continue
+        stmt = pg_insert(model.__table__).values(values)
+        table = model.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={c: table.c[c] + stmt.excluded[c] for c in COUNTERS},
+        )
+        db.execute(stmt)
+
+def application_created(db: Session, app: models.Application, job: models.Job) -> None:
+    delta = defaultdict(float, {"applications": 1, _status_col(app.status): 1})
+    _score_delta(delta, app.score, +1)
+    _apply(db, {(_day(app.applied_at), job.id, job.owner_user_id): delta})
+
+def status_changed(db: Session, app: models.Application, job: models.Job, old_status: Optional[str]) -> None:
+    """`old_status` must have been read with the row locked (SELECT ... FOR UPDATE)."""
+    if _status_col(old_status) == _status_col(app.status):
+        return
+    delta = defaultdict(float, {_status_col(old_status): -1, _status_col(app.status): 1})
+    _apply(db, {(_day(app.applied_at), job.id, job.owner_user_id): delta})
+
+def scores_changed(db: Session, new_scores: Dict[int, float]) -> None:
+    """
+    {application id: stored (0-100) score} about to be written; call before
+    the update, in the same transaction. Locks the application rows (in id
+    order, so concurrent writers do not deadlock) until it commits.
+    """
+    if not new_scores:
+        return
+    rows = (
+        db.query(models.Application.id, models.Application.job_id, models.Application.applied_at,
+                 models.Application.score, models.Job.owner_user_id)
+        .join(models.Job, models.Job.id == models.Application.job_id)
+        .filter(models.Application.id.in_(list(new_scores)))
+        .order_by(models.Application.id)
+        .with_for_update(of=models.Application)
+        .all()
+    )
+    deltas: Dict[Key, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for r in rows:
+        new = new_scores[r.id]
+        if r.score == new:
+            continue
+        delta = deltas[(_day(r.applied_at), r.job_id, r.owner_user_id)]
+        _score_delta(delta, r.score, -1)
+        _score_delta(delta, new, +1)
+    _apply(db, deltas)
+
+def job_deleted(db: Session, job: models.Job) -> None:
+    """Take the job's rows out of its owner's totals; the job rows go with the job (FK cascade)."""
+    rows = db.query(models.JobDailyStats).filter(models.JobDailyStats.job_id == job.id).all()
+    _apply(db, {
+        (r.day, job.id, job.owner_user_id): {c: -getattr(r, c) for c in COUNTERS}
+        for r in rows
+    })
+
+# ---- Reconciliation ----
+def _aggregate_sql(key: str) -> str:
+    status_cols = ",\n".join(
+        f"count(*) FILTER (WHERE a.status = '{s}')" for s in STATUSES
+    )
+    return f"""
+        SELECT (COALESCE(a.applied_at, now()) AT TIME ZONE 'UTC')::date, {key},
+               count(*),
+               {status_cols},
+               count(*) FILTER (WHERE a.status IS NULL OR a.status NOT IN ({", ".join(f"'{s}'" for s in STATUSES)})),
+               COALESCE(sum(a.score), 0),
+               count(a.score),
+               count(*) FILTER (WHERE a.score < 20),
+               count(*) FILTER (WHERE a.score >= 20 AND a.score < 40),
+               count(*) FILTER (WHERE a.score >= 40 AND a.score < 60),
+               count(*) FILTER (WHERE a.score >= 60 AND a.score < 80),
+               count(*) FILTER (WHERE a.score >= 80)
+        FROM applications a JOIN jobs j ON j.id = a.job_id
+        GROUP BY 1, 2
+    """
+
+def rebuild(db: Session, wait: bool = True) -> bool:
+    """
+    Recompute both tables from `applications` and commit. Writers block on
+    the table lock for the duration and then apply their delta on top, so
+    nothing is double counted or lost. With wait=False, returns False when
+    another rebuild holds the advisory lock.
+    """
+    lock = "pg_advisory_xact_lock" if wait else "pg_try_advisory_xact_lock"
+    if db.execute(text(f"SELECT {lock}(:k)"), {"k": _LOCK_KEY}).scalar() is False:
+        db.rollback()
+        return False
+    cols = ", ".join(COUNTERS)
+    db.execute(text("LOCK TABLE job_daily_stats, owner_daily_stats IN EXCLUSIVE MODE"))
+    db.execute(text("DELETE FROM job_daily_stats"))
+    db.execute(text("DELETE FROM owner_daily_stats"))
+    db.execute(text(f"INSERT INTO job_daily_stats (day, job_id, {cols}) " + _aggregate_sql("a.job_id")))
+    db.execute(text(
+        f"INSERT INTO owner_daily_stats (day, owner_id, {cols}) "
+        + _aggregate_sql("COALESCE(j.owner_user_id, 0)")
+    ))
+    db.commit()
+    return True
+
+class RollupReconciler:
+    """Rebuilds the rollups every ROLLUP_RECONCILE_INTERVAL_SEC; one worker at a time."""
+    def __init__(self, interval_sec: float = ROLLUP_RECONCILE_INTERVAL_SEC):
+        self.interval_sec = interval_sec
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="rollup-reconcile", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> bool:
+        db = SessionLocal()
+        try:
+            return rebuild(db, wait=False)
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            try:
+                if self.run_once():
+                    logger.info("analytics_rollups_rebuilt")
+            except Exception as e:
+                logger.warning("analytics_rollups_rebuild_failed", exc_info=e)
+
+_reconciler: RollupReconciler | None = None
+
+def start_reconciler() -> None:
+    global _reconciler
+    if _reconciler is None and ROLLUP_RECONCILE_INTERVAL_SEC > 0:
+        _reconciler = RollupReconciler()
+        _reconciler.start()
+
+def stop_reconciler() -> None:
+    global _reconciler
+    if _reconciler is not None:
+        _reconciler.stop()
+        _reconciler = None
+
+# ---- Reads ----
+def totals(db: Session, owner_id: Optional[int] = None, since: Optional[date] = None) -> Dict[str, float]:
+    """Counters summed over all days (or from `since`) for one owner, or everyone with owner_id=None."""
+    t = models.OwnerDailyStats
+    q = db.query(*[func.coalesce(func.sum(getattr(t, c)), 0) for c in COUNTERS])
+    if owner_id is not None:
+        q = q.filter(t.owner_id == owner_id)
+    if since is not None:
+        q = q.filter(t.day >= since)
+    return dict(zip(COUNTERS, q.one()))
+
+def by_status(db: Session, row: Dict[str, float], owner_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Non-zero status counts, keyed like GROUP BY status (NULL as "unknown").
+    The rollups only hold other_status for statuses outside STATUSES, so when
+    there are any, those few are counted from `applications` by raw status.
+    """
+    out = {s: int(row[s]) for s in STATUSES if row[s]}
+    if row["other_status"]:
+        a = models.Application
+        q = (
+            db.query(a.status, func.count(a.id))
+            .filter(or_(a.status.is_(None), a.status.notin_(STATUSES)))
+            .group_by(a.status)
+        )
+        if owner_id is not None:
+            q = q.join(models.Job, models.Job.id == a.job_id).filter(models.Job.owner_user_id == owner_id)
+        for status, n in q.all():
+            key = status or "unknown"
+            out[key] = out.get(key, 0) + int(n)
+    return out
+
+def histogram_counts(row: Dict[str, float]) -> List[int]:
+    return [int(row[f"score_h{b}"]) for b in BINS[:-1]]
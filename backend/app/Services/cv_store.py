@@ -0,0 +1,177 @@
+# app/services/cv_store.py
+"""
+Extracted CV text, keyed by sha256 of the uploaded bytes.
+
+Extraction runs once, at upload time, in the extraction process pool
+(app.utils.extract_pool); scoring and ranking read the stored text. Re-uploading an identical file only links the new CV row to the
+existing cv_documents row.
+"""
+from __future__ import annotations
+import hashlib
+import logging
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.utils import nlp
+from app.utils.extract_pool import Extracted, get_executor
+from app.utils.skills import get_matcher
+from app.utils.vectors import pack, unpack
+
+logger = logging.getLogger("smartrecruit")
+
+_CHUNK = 1024 * 1024
+
+def copy_and_hash(src: BinaryIO, dst: BinaryIO) -> str:
+    """Stream `src` into `dst` and return the sha256 hex digest of the bytes."""
+    h = hashlib.sha256()
+    while True:
+        buf = src.read(_CHUNK)
+        if not buf:
+            break
+        h.update(buf)
+        dst.write(buf)
+    return h.hexdigest()
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(_CHUNK), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+def _new_document(db: Session, content_hash: str, res: Extracted) -> models.CVDocument:
+    if not res.ok:
+        raise ValueError(res.error)
+    normalized = nlp._normalize(res.text)
+    matcher = get_matcher()
+    doc = models.CVDocument(
+        content_hash=content_hash,
+        text=res.text,
+        normalized_text=normalized,
+        page_count=res.page_count,
+        skills=matcher.extract(normalized),
+        skills_version=matcher.version,
+    )
+    db.add(doc)
+    db.flush()
+    return doc
+
+def ingest(db: Session, cv: models.CV, content_hash: str) -> models.CVDocument:
+    """
+    Link `cv` to its document, extracting the text (in the extraction
+    process pool) only if this content has never been seen. The caller commits.
+    """
+    doc = db.get(models.CVDocument, content_hash)
+    if doc is None:
+        res = get_executor().extract(cv.file_path)
+        try:
+            # savepoint: losing the race only undoes the document insert, not the CV row
+            with db.begin_nested():
+                doc = _new_document(db, content_hash, res)
+        except IntegrityError:
+            # a concurrent upload of the same bytes stored it first
+            doc = db.get(models.CVDocument, content_hash)
+    cv.content_hash = content_hash
+    return doc
+
+def get_documents(db: Session, cvs: Iterable[models.CV]) -> Dict[int, models.CVDocument]:
+    """
+    cv.id -> CVDocument for many CVs in one query. CVs uploaded before
+    the store existed are hashed and extracted on first use; CVs whose
+    file cannot be read are missing from the result. The caller commits.
+    """
+    cvs = list(cvs)
+    hashes = {c.content_hash for c in cvs if c.content_hash}
+    docs = {
+        d.content_hash: d
+        for d in db.query(models.CVDocument).filter(models.CVDocument.content_hash.in_(hashes)).all()
+    } if hashes else {}
+    out: Dict[int, models.CVDocument] = {}
+    legacy: Dict[str, List[models.CV]] = {}  # file path -> CVs without a stored document
+    for cv in cvs:
+        doc = docs.get(cv.content_hash) if cv.content_hash else None
+        if doc is not None:
+            out[cv.id] = doc
+        else:
+            legacy.setdefault(cv.file_path, []).append(cv)
+    if not legacy:
+        return out
+
+    to_extract: Dict[str, str] = {}  # file path -> hash
+    for path, group in legacy.items():
+        try:
+            h = file_hash(path)
+        except OSError as e:
+            # left out of the result; callers treat it as "no text"
+            logger.warning("cv_extract_failed", extra={"file_path": path}, exc_info=e)
+            continue
+        doc = docs.get(h) or db.get(models.CVDocument, h)
+        if doc is None:
+            to_extract[path] = h
+            continue
+        for cv in group:
+            cv.content_hash = h
+            out[cv.id] = doc
+    # parse all remaining files in parallel, streaming results back
+    for res in get_executor().extract_many(to_extract):
+        h = to_extract[res.path]
+        doc = docs.get(h)
+        if doc is None:
+            try:
+                # savepoint, as in ingest: scoring workers and rescore shards hit the same legacy files
+                with db.begin_nested():
+                    doc = _new_document(db, h, res)
+            except IntegrityError:
+                doc = db.get(models.CVDocument, h)
+            except Exception as e:
+                logger.warning("cv_extract_failed", extra={"file_path": res.path, "error": str(e)})
+                continue
+            if doc is None:
+                continue
+        docs[h] = doc
+        for cv in legacy[res.path]:
+            cv.content_hash = h
+            out[cv.id] = doc
+    return out
+
+def get_cv_texts(db: Session, cvs: Iterable[models.CV]) -> Dict[int, str]:
+    """cv.id -> normalized text."""
+    return {cv_id: d.normalized_text for cv_id, d in get_documents(db, cvs).items()}
+
+def get_embeddings(db: Session, docs: Iterable[models.CVDocument], batch_size: int = 64) -> Dict[str, np.ndarray]:
+    """
+    content_hash -> pooled, normalized document vector. Documents without
+    vectors for the current model are chunk-encoded together (one encode call
+    over all their chunks) and stored with their per-chunk vectors; the
+    caller commits.
+    """
+    model_name = nlp.BI_ENCODER_MODEL_NAME
+    docs = {d.content_hash: d for d in docs}
+    out = {
+        h: unpack(d.embedding)
+        for h, d in docs.items()
+        if d.embedding is not None and d.chunk_embeddings is not None and d.embedding_model == model_name
+    }
+    missing = [d for h, d in docs.items() if h not in out]
+    if missing:
+        encoded = nlp.encode_documents([d.normalized_text for d in missing], batch_size=batch_size)
+        for d, (vec, chunk_vecs, chunks) in zip(missing, encoded):
+            d.embedding = pack(vec)
+            d.embedding_model = model_name
+            d.chunk_embeddings = pack(chunk_vecs)
+            d.chunks = chunks
+            out[d.content_hash] = vec
+    return out
+
+def get_chunks(db: Session, docs: Iterable[models.CVDocument]) -> Dict[str, Tuple[np.ndarray, List[str]]]:
+    """content_hash -> ((n, d) chunk vectors, chunk texts), encoding only what is missing."""
+    docs = list(docs)
+    vecs = get_embeddings(db, docs)
+    return {
+        d.content_hash: (unpack(d.chunk_embeddings, vecs[d.content_hash].shape[0]), list(d.chunks or []))
+        for d in docs
+    }
@@ -0,0 +1,89 @@
+# app/services/explanations.py
+"""
+Why did this candidate get this score?
+
+For each application we return the CV chunks that best match each job field
+(missions, skills, profile_requirements). CV chunk vectors come from the
+cv_documents store and the job's field items from the embedding LRU, so an
+explanation costs one similarity matrix product for the whole page, not
+a model pass per row.
+"""
+from __future__ import annotations
+from typing import Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import cv_store
+from app.services.ai_service import embed_texts
+from app.services.job_embeddings import job_field_items
+from app.utils import nlp
+
+MAX_EXPLAIN_ROWS = 50
+
+def _field_vectors(items: Dict[str, List[str]], dim: int) -> Dict[str, np.ndarray]:
+    texts = [t for v in items.values() for t in v]
+    vecs = embed_texts(texts) if texts else np.zeros((0, dim), dtype=np.float32)
+    out: Dict[str, np.ndarray] = {}
+    i = 0
+    for f, v in items.items():
+        out[f] = vecs[i:i + len(v)]
+        i += len(v)
+    return out
+
+def explain_applications(
+    db: Session,
+    job: models.Job,
+    application_ids: Sequence[int],
+    top_k: int = 3,
+) -> List[Dict]:
+    """
+    [{application_id, cv_id, fields: {field: [{chunk, matched, similarity}]}}]
+    for the given applications of `job` (at most MAX_EXPLAIN_ROWS, in the
+    order requested). `similarity` is the cosine between the CV chunk and
+    the best matching field item.
+    """
+    ids = list(dict.fromkeys(application_ids))[:MAX_EXPLAIN_ROWS]
+    if not ids:
+        return []
+    apps = (
+        db.query(models.Application.id, models.Application.cv_id)
+        .filter(models.Application.job_id == job.id, models.Application.id.in_(ids))
+        .all()
+    )
+    cvs = db.query(models.CV).filter(models.CV.id.in_({a.cv_id for a in apps})).all()
+    docs = cv_store.get_documents(db, cvs)
+    chunks = cv_store.get_chunks(db, {d.content_hash: d for d in docs.values()}.values())
+    db.commit()  # persists chunk vectors computed for documents that had none
+
+    hashes = list(chunks)
+    items = job_field_items(job)
+    per_doc: Dict[str, Dict] = {}
+    if hashes:
+        dim = chunks[hashes[0]][0].shape[-1]
+        per_doc = dict(zip(hashes, nlp.explain_chunks(
+            [chunks[h][0] for h in hashes], _field_vectors(items, dim), top_k
+        )))
+
+    by_id = {a.id: a for a in apps}
+    out: List[Dict] = []
+    for app_id in ids:
+        a = by_id.get(app_id)
+        if a is None:
+            continue
+        doc = docs.get(a.cv_id)
+        hits = per_doc.get(doc.content_hash) if doc is not None else None
+        texts = chunks[doc.content_hash][1] if hits is not None else []
+        out.append({
+            "application_id": a.id,
+            "cv_id": a.cv_id,
+            "fields": {
+                f: [
+                    {"chunk": texts[c], "matched": items[f][m], "similarity": round(s, 4)}
+                    for c, m, s in (hits or {}).get(f, [])
+                ]
+                for f in nlp.EXPLAIN_FIELDS
+            },
+        })
+    return out
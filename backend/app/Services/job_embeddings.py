@@ -0,0 +1,361 @@
+# app/services/job_embeddings.py
+"""
+Persistent job-embedding store.
+
+Each job gets one row in `job_embeddings` holding its normalized bi-encoder
+vector plus the sha256 of the text it was computed from, so ranking reads a
+precomputed float32 matrix instead of re-encoding every job per call.
+Published jobs are also mirrored into an in-process vector index
+(app.utils.vector_index) that follows Job.status.
+"""
+from __future__ import annotations
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.utils import nlp
+from app.utils.vector_index import VectorIndex, make_index
+from app.utils.vectors import content_hash, pack, stack, unpack
+
+logger = logging.getLogger("smartrecruit")
+
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "flat")  # flat | ivf
+IVF_NLIST = int(os.getenv("VECTOR_INDEX_NLIST", "128"))
+IVF_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+# how long a read path may reuse the jobs-table change marker (0 = query every time)
+JOB_STAMP_TTL_SEC = float(os.getenv("JOB_STAMP_TTL_SEC", "2"))
+
+# Structured job document: each field is embedded on its own and the field
+# cosines are fused with these weights (JOB_FIELD_WEIGHTS="skills:0.4,title:0.1,...",
+# unlisted fields keep their default).
+JOB_FIELDS = ("title", "description", "missions", "skills", "profile_requirements")
+_DEFAULT_FIELD_WEIGHTS = {
+    "title": 0.15,
+    "description": 0.15,
+    "missions": 0.25,
+    "skills": 0.25,
+    "profile_requirements": 0.20,
+}
+
+def _parse_field_weights(spec: str) -> np.ndarray:
+    weights = dict(_DEFAULT_FIELD_WEIGHTS)
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition(":")
+        if name.strip() not in weights:
+            raise ValueError(f"Unknown job field in JOB_FIELD_WEIGHTS: {name.strip()}")
+        weights[name.strip()] = max(0.0, float(value))
+    return np.array([weights[f] for f in JOB_FIELDS], dtype=np.float32)
+
+JOB_FIELD_WEIGHTS = _parse_field_weights(os.getenv("JOB_FIELD_WEIGHTS", ""))
+
+# ---- Job text ----
+def job_text(job: models.Job) -> str:
+    parts = [job.title or ""]
+    if job.description:
+        parts.append(job.description)
+    if isinstance(job.missions, list) and job.missions:
+        parts.append(" ".join(str(m) for m in job.missions))
+    if job.profile_requirements:
+        parts.append(job.profile_requirements)
+    if isinstance(job.skills, list) and job.skills:
+        parts.append("Skills: " + ", ".join(str(s) for s in job.skills))
+    return nlp._normalize(" ".join(parts))
+
+def job_fields(job: models.Job | dict) -> Dict[str, str]:
+    """
+    Structured job document: field -> normalized text ("" when empty), in
+    JOB_FIELDS order. Accepts a Job row or a plain dict of the same columns.
+    """
+    get = job.get if isinstance(job, dict) else (lambda k: getattr(job, k, None))
+
+    def _list(v) -> List[str]:
+        return [str(x) for x in v if str(x).strip()] if isinstance(v, list) else []
+
+    description = " ".join(p for p in (get("offer_description"), get("description")) if p)
+    skills = _list(get("skills"))
+    return {
+        "title": nlp._normalize(get("title") or ""),
+        "description": nlp._normalize(description),
+        "missions": nlp._normalize(" ".join(_list(get("missions")))),
+        "skills": nlp._normalize("Skills: " + ", ".join(skills)) if skills else "",
+        "profile_requirements": nlp._normalize(get("profile_requirements") or ""),
+    }
+
+def encode_job_fields(fields: Dict[str, str], vecs_by_text: Dict[str, np.ndarray], dim: int) -> np.ndarray:
+    """(len(JOB_FIELDS), dim) matrix from already-encoded field texts; zero rows for empty fields."""
+    out = np.zeros((len(JOB_FIELDS), dim), dtype=np.float32)
+    for i, f in enumerate(JOB_FIELDS):
+        if fields[f]:
+            out[i] = vecs_by_text[fields[f]]
+    return out
+
+def _fields_hash(fields: Dict[str, str]) -> str:
+    return content_hash("\x1f".join(fields[f] for f in JOB_FIELDS))
+
+def job_field_items(job: models.Job) -> Dict[str, List[str]]:
+    """
+    Explanation targets per field: one item per mission / skill, and
+    profile_requirements split into sentences or lines.
+    """
+    def _items(v) -> List[str]:
+        return [nlp._normalize(str(x)) for x in v if str(x).strip()] if isinstance(v, list) else []
+
+    reqs = [r.strip(" -*") for r in re.split(r"(?<=[.;!?])\s+|\n+|\s*[•·]\s*", job.profile_requirements or "")]
+    return {
+        "missions": _items(job.missions),
+        "skills": _items(job.skills),
+        "profile_requirements": [nlp._normalize(r) for r in reqs if len(r) > 2],
+    }
+
+# ---- Write path ----
+def upsert_job_embeddings(db: Session, jobs: Sequence[models.Job]) -> int:
+    """
+    Encode (in one batch) every job whose text, structured fields or model
+    changed since its stored vectors. Returns the number of rows written.
+    """
+    if not jobs:
+        return 0
+    model_name = nlp.BI_ENCODER_MODEL_NAME
+    existing = {
+        e.job_id: e
+        for e in db.query(models.JobEmbedding)
+        .filter(models.JobEmbedding.job_id.in_([j.id for j in jobs]))
+        .all()
+    }
+    todo: List[Tuple[models.Job, str, str, Dict[str, str], str]] = []
+    for job in jobs:
+        text = job_text(job)
+        h = content_hash(text)
+        fields = job_fields(job)
+        fh = _fields_hash(fields)
+        row = existing.get(job.id)
+        if (
+            row is not None and row.model_name == model_name
+            and row.content_hash == h and row.fields_hash == fh and row.field_vectors is not None
+        ):
+            continue
+        todo.append((job, text, h, fields, fh))
+    if not todo:
+        return 0
+
+    # whole-job texts and every non-empty field text, de-duplicated, in one encode call
+    texts = list(dict.fromkeys(
+        [t for _, t, _, _, _ in todo] + [v for _, _, _, fields, _ in todo for v in fields.values() if v]
+    ))
+    encoded = nlp._get_bi_encoder().encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    by_text = dict(zip(texts, encoded))
+    dim = int(encoded.shape[1])
+    for job, text, h, fields, fh in todo:
+        vec = by_text[text]
+        row = existing.get(job.id) or models.JobEmbedding(job_id=job.id)
+        row.model_name = model_name
+        row.content_hash = h
+        row.dim = dim
+        row.vector = pack(vec)
+        row.fields_hash = fh
+        row.field_vectors = pack(encode_job_fields(fields, by_text, dim))
+        row.updated_at = func.now()
+        db.add(row)
+    db.commit()
+    invalidate_store_stamp()
+    return len(todo)
+
+def get_job_vector(db: Session, job: models.Job) -> np.ndarray:
+    """Stored vector of `job`, (re)computed first if missing or stale."""
+    upsert_job_embeddings(db, [job])
+    return unpack(db.query(models.JobEmbedding).get(job.id).vector)
+
+def get_job_field_vectors(db: Session, jobs: Sequence[models.Job]) -> np.ndarray:
+    """
+    (J, len(JOB_FIELDS), d) stored field vectors for `jobs`, in order,
+    (re)computing missing or stale ones first in one batch.
+    """
+    upsert_job_embeddings(db, jobs)
+    rows = {
+        e.job_id: e
+        for e in db.query(models.JobEmbedding)
+        .filter(models.JobEmbedding.job_id.in_([j.id for j in jobs]))
+        .all()
+    }
+    return np.stack([unpack(rows[j.id].field_vectors, rows[j.id].dim) for j in jobs])
+
+def fused_scores(cv_embs: np.ndarray, field_vectors: np.ndarray) -> np.ndarray:
+    """(N, J) weighted per-field score in [0, 1] of each CV against each job."""
+    return (nlp.fused_field_cosine(cv_embs, field_vectors, JOB_FIELD_WEIGHTS) + 1.0) / 2.0
+
+def refresh_job_embedding(job_id: int) -> None:
+    """Background task: (re)embed one job after create/update, embed any missing ones, sync the index."""
+    db = SessionLocal()
+    try:
+        job = db.query(models.Job).get(job_id)
+        if job is None:
+            remove_from_index(job_id)
+            return
+        upsert_job_embeddings(db, [job])
+        # jobs that predate the store or whose task was lost; no-op once caught up
+        backfill_missing(db)
+        row = db.query(models.JobEmbedding).get(job_id)
+        if job.status == "published" and row is not None:
+            _index_add(job_id, unpack(row.vector))
+        else:
+            remove_from_index(job_id)
+    except Exception as e:
+        logger.warning("job_embedding_failed", extra={"job_id": job_id}, exc_info=e)
+    finally:
+        db.close()
+
+def backfill_missing(db: Session, status: str = "published", batch_size: int = 256) -> int:
+    """Embed jobs of `status` that have no stored vector yet."""
+    written = 0
+    while True:
+        jobs = (
+            db.query(models.Job)
+            .outerjoin(models.JobEmbedding, models.JobEmbedding.job_id == models.Job.id)
+            .filter(models.Job.status == status, models.JobEmbedding.job_id.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not jobs:
+            return written
+        n = upsert_job_embeddings(db, jobs)
+        if n == 0:
+            return written
+        written += n
+
+# ---- Read path ----
+_stamp_lock = threading.Lock()
+_stamp: Tuple[float, Tuple] = (0.0, ())  # (monotonic expiry, stamp)
+
+def store_stamp(db: Session) -> Tuple:
+    """
+    (jobs count, max jobs.updated_at, max job_embeddings.updated_at) - change
+    marker shared by the job matrix, vector, BM25 and skill indexes. One
+    aggregate per JOB_STAMP_TTL_SEC per process; local writes invalidate it.
+    """
+    global _stamp
+    now = time.monotonic()
+    with _stamp_lock:
+        if now < _stamp[0]:
+            return _stamp[1]
+    stamp = tuple(
+        db.query(func.count(models.Job.id), func.max(models.Job.updated_at), func.max(models.JobEmbedding.updated_at))
+        .select_from(models.Job)
+        .outerjoin(models.JobEmbedding, models.JobEmbedding.job_id == models.Job.id)
+        .one()
+    )
+    with _stamp_lock:
+        _stamp = (now + JOB_STAMP_TTL_SEC, stamp)
+    return stamp
+
+def invalidate_store_stamp() -> None:
+    """After a local write to jobs / job_embeddings: the next read re-queries the marker."""
+    global _stamp
+    with _stamp_lock:
+        _stamp = (0.0, ())
+
+# Process-local copy of the matrix, reused until the table changes.
+_matrix_lock = threading.Lock()
+_matrix_cache: dict = {}
+
+def load_job_matrix(db: Session, status: str = "published") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (job_ids int64 (N,), embeddings float32 (N, d)) for jobs of
+    `status` embedded with the current bi-encoder. The result is cached per
+    process and reloaded only when the jobs or the store change.
+    """
+    model_name = nlp.BI_ENCODER_MODEL_NAME
+    stamp = store_stamp(db)
+    key = (status, model_name)
+    with _matrix_lock:
+        hit = _matrix_cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1], hit[2]
+
+    rows = (
+        db.query(models.JobEmbedding.job_id, models.JobEmbedding.dim, models.JobEmbedding.vector)
+        .join(models.Job, models.Job.id == models.JobEmbedding.job_id)
+        .filter(models.Job.status == status, models.JobEmbedding.model_name == model_name)
+        .order_by(models.JobEmbedding.job_id)
+        .all()
+    )
+    dim = rows[0].dim if rows else 0
+    ids = np.fromiter((r.job_id for r in rows), dtype=np.int64, count=len(rows))
+    mat = stack((r.vector for r in rows), dim)
+    with _matrix_lock:
+        _matrix_cache[key] = (stamp, ids, mat)
+    return ids, mat
+
+# ---- Vector index (published jobs only) ----
+_index_lock = threading.Lock()
+_index: VectorIndex | None = None
+_index_seen: Tuple = (None, None, None)  # see store_stamp
+
+def _new_index(dim: int) -> VectorIndex:
+    if VECTOR_INDEX == "ivf":
+        return make_index("ivf", dim, nlist=IVF_NLIST, nprobe=IVF_NPROBE)
+    return make_index(VECTOR_INDEX, dim)
+
+def _index_add(job_id: int, vec: np.ndarray) -> None:
+    with _index_lock:
+        if _index is not None and _index.dim == vec.shape[0]:
+            _index.add([job_id], vec[None, :])
+
+def remove_from_index(job_id: int) -> None:
+    """Drop a job from this process' index (archived, draft or deleted)."""
+    with _index_lock:
+        if _index is not None:
+            _index.remove([job_id])
+
+def _published_count(db: Session) -> int:
+    return (
+        db.query(func.count(models.JobEmbedding.job_id))
+        .join(models.Job, models.Job.id == models.JobEmbedding.job_id)
+        .filter(models.Job.status == "published", models.JobEmbedding.model_name == nlp.BI_ENCODER_MODEL_NAME)
+        .scalar()
+        or 0
+    )
+
+def get_job_index(db: Session) -> VectorIndex:
+    """
+    Returns the process' index of published job vectors. Changes made by other
+    workers are pulled incrementally (rows touched since the last sync); a
+    count mismatch afterwards (deleted jobs) triggers a full rebuild.
+    """
+    global _index, _index_seen
+    seen = store_stamp(db)
+    with _index_lock:
+        if _index is not None and seen == _index_seen:
+            return _index
+        if _index is not None and _index_seen[1] is not None:
+            _, job_since, emb_since = _index_seen
+            emb_since = emb_since or job_since
+            changed = (
+                db.query(models.Job.id, models.Job.status, models.JobEmbedding.model_name, models.JobEmbedding.vector)
+                .outerjoin(models.JobEmbedding, models.JobEmbedding.job_id == models.Job.id)
+                .filter((models.Job.updated_at > job_since) | (models.JobEmbedding.updated_at > emb_since))
+                .all()
+            )
+            for r in changed:
+                if r.status == "published" and r.vector is not None and r.model_name == nlp.BI_ENCODER_MODEL_NAME:
+                    _index.add([r.id], unpack(r.vector)[None, :])
+                else:
+                    _index.remove([r.id])
+            if len(_index) == _published_count(db):
+                _index_seen = seen
+                return _index
+
+        ids, mat = load_job_matrix(db)
+        index = _new_index(mat.shape[1] if mat.size else 384)
+        if len(ids):
+            index.add(ids, mat)
+        _index, _index_seen = index, seen
+        return _index
@@ -0,0 +1,146 @@
+# app/services/job_search.py
+"""
+Hybrid job search: BM25 over title / description / skills, fused with the
+dense job-vector index through reciprocal rank fusion.
+
+The BM25 index holds published jobs only. The jobs router updates it on
+create / patch / delete; changes made through other workers are picked up
+by comparing per-job updated_at values on the next query that sees the jobs
+table change.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services.ai_service import embed_texts
+from app.services import skill_index
+from app.services.job_embeddings import get_job_index, invalidate_store_stamp, load_job_matrix, store_stamp
+from app.utils import nlp
+from app.utils.bm25 import BM25Index, reciprocal_rank_fusion
+from app.utils.skills import get_matcher
+
+logger = logging.getLogger("smartrecruit")
+
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "100"))  # per retriever, before fusion
+SEARCH_RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+
+def search_text(job: models.Job) -> str:
+    """What BM25 sees: the title twice (cheap field boost), descriptions and skills."""
+    skills = " ".join(str(s) for s in job.skills) if isinstance(job.skills, list) else ""
+    return " ".join(p for p in (
+        job.title, job.title, job.offer_description, job.description, skills,
+    ) if p)
+
+# ---- Lexical index ----
+_lock = threading.Lock()
+_bm25 = BM25Index()
+_versions: Dict[int, object] = {}  # job id -> updated_at it was indexed at
+_seen: Tuple = (None, None)
+
+# more changed jobs than this share of the index: build a new one and swap it in
+_REBUILD_FRACTION = 0.1
+
+def index_job(job: models.Job) -> None:
+    """Router hook after create / patch: (re)index or drop one job."""
+    with _lock:
+        if job.status == "published":
+            _bm25.add(job.id, search_text(job))
+            _versions[job.id] = job.updated_at
+        else:
+            _bm25.remove(job.id)
+            _versions.pop(job.id, None)
+    invalidate_store_stamp()
+
+def remove_job(job_id: int) -> None:
+    with _lock:
+        _bm25.remove(job_id)
+        _versions.pop(job_id, None)
+    invalidate_store_stamp()
+
+def _texts(db: Session, ids: List[int]) -> List[Tuple[int, str]]:
+    out: List[Tuple[int, str]] = []
+    for start in range(0, len(ids), 1000):
+        for job in db.query(models.Job).filter(models.Job.id.in_(ids[start:start + 1000])).all():
+            out.append((job.id, search_text(job)))
+    return out
+
+def get_bm25_index(db: Session) -> BM25Index:
+    """
+    The process' BM25 index, synced with the jobs table. Rows are loaded
+    outside _lock; a cold start or a large change builds a new index outside
+    it too and swaps it in, small deltas are applied in place.
+    """
+    global _bm25, _versions, _seen
+    stamp = store_stamp(db)[:2]
+    with _lock:
+        if stamp == _seen:
+            return _bm25
+        known = dict(_versions)
+    rows = db.query(models.Job.id, models.Job.updated_at).filter(models.Job.status == "published").all()
+    current = {r.id: r.updated_at for r in rows}
+    removed = [j for j in known if j not in current]
+    changed = [j for j, ts in current.items() if known.get(j) != ts]
+
+    if not known or len(changed) + len(removed) > _REBUILD_FRACTION * len(known):
+        fresh = BM25Index()
+        for job_id, text in _texts(db, list(current)):
+            fresh.add(job_id, text)
+        with _lock:
+            _bm25, _versions, _seen = fresh, current, stamp
+            return _bm25
+
+    texts = _texts(db, changed)
+    with _lock:
+        for job_id in removed:
+            _bm25.remove(job_id)
+            _versions.pop(job_id, None)
+        for job_id, text in texts:
+            _bm25.add(job_id, text)
+            _versions[job_id] = current[job_id]
+        _seen = stamp
+        return _bm25
+
+def warm_index() -> None:
+    """Startup: build the lexical index off the request path."""
+    db = SessionLocal()
+    try:
+        get_bm25_index(db)
+    except Exception as e:
+        logger.warning("job_search_index_failed", exc_info=e)
+    finally:
+        db.close()
+
+# ---- Hybrid query ----
+def _dense_ids(db: Session, q: str) -> np.ndarray:
+    """
+    Dense candidates: an exact scan over the jobs sharing a skill with the
+    query when the skill prefilter applies, the job-vector index otherwise.
+    """
+    vec = embed_texts([q])[0]
+    ids, mat = load_job_matrix(db)
+    rows = skill_index.job_rows(db, get_matcher().extract(q), ids, SEARCH_CANDIDATES)
+    if rows is not None:
+        cos = mat[rows] @ np.asarray(vec, dtype=mat.dtype)
+        return ids[rows][nlp.top_k_indices(cos, SEARCH_CANDIDATES)]
+    index = get_job_index(db)
+    return index.search(vec, SEARCH_CANDIDATES)[0] if len(index) else np.empty(0, dtype=np.int64)
+
+def search_jobs(db: Session, q: str, limit: int = 20) -> List[Tuple[int, float]]:
+    """[(job_id, fused score)] best first. Falls back to one retriever if the other fails."""
+    rankings: List[np.ndarray] = []
+    lex_ids, _ = get_bm25_index(db).search(q, SEARCH_CANDIDATES)
+    rankings.append(lex_ids)
+    try:
+        dense_ids = _dense_ids(db, q)
+        if len(dense_ids):
+            rankings.append(dense_ids)
+    except Exception as e:
+        logger.warning("job_search_dense_failed", exc_info=e)
+    return reciprocal_rank_fusion(rankings, k=SEARCH_RRF_K)[:limit]
@@ -0,0 +1,114 @@
+# app/services/ranking.py
+"""
+Job-side ranking: score every applicant of a job in one vectorized pass.
+
+All applicant CV vectors are stacked into one matrix and scored against the
+job's per-field vectors with a single matrix product; only the best `rerank_top`
+are sent to the cross-encoder (in large batches), minus pairs whose score is
+already in the score cache. On large pools that slice is taken among the
+applicants whose CV shares a skill with the job (skill_index). Scores are persisted to Application.score in bulk.
+"""
+from __future__ import annotations
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import analytics_rollups, cv_store, score_cache, skill_index
+from app.services.job_embeddings import fused_scores, get_job_field_vectors, job_text
+from app.services.scoring_pipeline import to_stored_score
+from app.utils import nlp
+
+def _rerank_pool(db: Session, job: models.Job, apps, need: int) -> np.ndarray:
+    """Rows eligible for the cross-encoder: skill matches on large pools, everyone otherwise."""
+    everyone = np.arange(len(apps))
+    if not skill_index.SKILL_PREFILTER or len(apps) < skill_index.SKILL_PREFILTER_MIN_POOL:
+        return everyone
+    cands = skill_index.candidate_cv_ids(db, job)
+    rows = np.flatnonzero(np.isin(np.fromiter((a.cv_id for a in apps), dtype=np.int64), cands))
+    return rows if len(rows) >= need else everyone
+
+def rank_applicants(
+    db: Session,
+    job: models.Job,
+    rerank_top: int = 100,
+    cross_batch_size: int = 64,
+) -> List[Dict]:
+    """
+    Returns applications of `job` best-first as dicts
+    {application_id, cv_id, score, bi_score, reranked}; score is on the
+    stored 0-100 scale. Applicants outside the rerank slice keep their
+    bi-encoder score and are listed after the reranked ones.
+    """
+    apps = (
+        db.query(models.Application.id, models.Application.cv_id)
+        .filter(models.Application.job_id == job.id)
+        .order_by(models.Application.id)
+        .all()
+    )
+    if not apps:
+        return []
+    cvs = db.query(models.CV).filter(models.CV.id.in_({a.cv_id for a in apps})).all()
+    docs = cv_store.get_documents(db, cvs)
+    apps = [a for a in apps if a.cv_id in docs]
+    if not apps:
+        return []
+    vecs = cv_store.get_embeddings(db, docs.values())
+
+    # (N, d) applicant matrix, one row per application
+    mat = np.stack([vecs[docs[a.cv_id].content_hash] for a in apps]).astype(np.float32)
+    # per-field fused bi-encoder score: (N, d) x (d, F) in one product
+    bi = fused_scores(mat, get_job_field_vectors(db, [job]))[:, 0].astype(np.float64)
+    logits = np.full(len(apps), np.nan)
+
+    hashes = [docs[a.cv_id].content_hash for a in apps]
+    version = score_cache.job_version(job)
+    if nlp.USE_CROSS_ENCODER:
+        # cross-encoder logits already in the cache, for any applicant
+        cached = score_cache.lookup(db, [(h, job.id, version) for h in set(hashes)])
+        for i, h in enumerate(hashes):
+            if (h, job.id) in cached:
+                logits[i] = cached[(h, job.id)][1]
+
+    pool = _rerank_pool(db, job, apps, rerank_top)
+    top = pool[nlp.top_k_indices(bi[pool], rerank_top)]
+    top = top[np.isnan(logits[top])]
+    if nlp.USE_CROSS_ENCODER and len(top):
+        jt = job_text(job)
+        try:
+            logits[top] = nlp._get_cross_encoder().predict(
+                [(docs[apps[i].cv_id].normalized_text, jt) for i in top],
+                batch_size=cross_batch_size,
+            )
+        except Exception:
+            top = top[:0]
+
+    reranked = ~np.isnan(logits)
+    # same calibration as scoring_pipeline, so cached and fresh scores agree
+    bi_only = score_cache.final_scores(bi, None, reranked=False)
+    final = bi_only.copy()
+    if reranked.any():
+        final[reranked] = score_cache.final_scores(bi[reranked], logits[reranked])
+    score_cache.store(db, [(hashes[i], job.id, version, bi[i], logits[i], final[i]) for i in top])
+
+    # reranked slice first, each group by score desc
+    order = np.lexsort((-final, ~reranked))
+    model_ids = {True: score_cache.score_model_id(True), False: score_cache.score_model_id(False)}
+    analytics_rollups.scores_changed(db, {apps[i].id: to_stored_score(final[i]) for i in order})
+    db.bulk_update_mappings(
+        models.Application,
+        [{"id": apps[i].id, "score": to_stored_score(final[i]), "score_model": model_ids[bool(reranked[i])]}
+         for i in order],
+    )
+    db.commit()
+    return [
+        {
+            "application_id": apps[i].id,
+            "cv_id": apps[i].cv_id,
+            "score": to_stored_score(final[i]),
+            "bi_score": to_stored_score(bi_only[i]),
+            "reranked": bool(reranked[i]),
+        }
+        for i in order
+    ]
@@ -0,0 +1,232 @@
+# app/services/recommendations.py
+"""
+"Jobs for my current CV" feeds.
+
+Each candidate's feed (job_feeds) is computed when they upload a CV: one
+matrix-vector product of their stored CV vector against all published job
+vectors (on large catalogs, those sharing a skill with the CV), top
+RECOMMEND_FEED_SIZE kept. A published or edited job is then
+scored only against the stored CV vectors of existing feeds and merged in.
+An archived or deleted job is removed from the feeds that hold it. Reads
+just return the stored list.
+
+Versioning: a feed records the CV (id + content hash) and the scorer id
+(score_cache.bi_model_id) it was built with, and each item carries the job's
+updated_at. A newer CV or scorer means a rebuild. A changed job means that
+item is rescored on read.
+"""
+from __future__ import annotations
+import logging
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services import cv_store, score_cache, skill_index
+from app.services.job_embeddings import get_job_vector, load_job_matrix
+from app.utils import nlp
+from app.utils.vectors import stack, unpack
+
+logger = logging.getLogger("smartrecruit")
+
+RECOMMEND_FEED_SIZE = int(os.getenv("RECOMMEND_FEED_SIZE", "50"))  # jobs kept per candidate feed
+_PATCH_CHUNK = 1000
+
+def _version(ts) -> Optional[str]:
+    return ts.isoformat() if ts is not None else None
+
+def current_cv(db: Session, user_id: int) -> Optional[models.CV]:
+    """Latest upload, same rule as GET /cvs/current."""
+    return (
+        db.query(models.CV)
+        .filter(models.CV.user_id == user_id)
+        .order_by(models.CV.uploaded_at.desc())
+        .first()
+    )
+
+def _merge(items: List[Dict], job_id: int, score: float, version: Optional[str]) -> List[Dict]:
+    """Insert / replace one job in a best-first feed and trim it."""
+    out = [i for i in items if i["job_id"] != job_id]
+    if len(out) < RECOMMEND_FEED_SIZE or score > out[-1]["score"]:
+        out.append({"job_id": job_id, "score": round(float(score), 6), "v": version})
+        out.sort(key=lambda i: i["score"], reverse=True)
+        out = out[:RECOMMEND_FEED_SIZE]
+    return out
+
+# ---- Build (CV upload) ----
+def build_feed(db: Session, user_id: int) -> Optional[models.JobFeed]:
+    """(Re)score the user's current CV against every published job and store the top."""
+    cv = current_cv(db, user_id)
+    feed = db.get(models.JobFeed, user_id, with_for_update=True)
+    doc = cv_store.get_documents(db, [cv]).get(cv.id) if cv is not None else None
+    if doc is None:
+        if feed is not None:
+            db.delete(feed)
+            db.commit()
+        return None
+    cv_vec = cv_store.get_embeddings(db, [doc])[doc.content_hash]
+
+    ids, mat = load_job_matrix(db)
+    # large catalogs: only the jobs sharing a skill with the CV
+    rows = skill_index.job_rows(
+        db, skill_index.document_skills([doc])[doc.content_hash], ids, RECOMMEND_FEED_SIZE
+    )
+    if rows is not None:
+        ids, mat = ids[rows], mat[rows]
+    items: List[Dict] = []
+    if len(ids):
+        scores = nlp.bi_scores(cv_vec, mat)
+        top = nlp.top_k_indices(scores, RECOMMEND_FEED_SIZE)
+        versions = dict(
+            db.query(models.Job.id, models.Job.updated_at).filter(models.Job.id.in_(ids[top].tolist())).all()
+        )
+        items = [
+            {"job_id": int(ids[i]), "score": round(float(scores[i]), 6), "v": _version(versions.get(int(ids[i])))}
+            for i in top
+        ]
+    if feed is None:
+        feed = models.JobFeed(user_id=user_id)
+        db.add(feed)
+    feed.cv_id = cv.id
+    feed.cv_hash = doc.content_hash
+    feed.model_name = score_cache.bi_model_id()
+    feed.items = items
+    feed.updated_at = func.now()
+    db.commit()
+    return feed
+
+def rebuild_feed(user_id: int) -> None:
+    """Background task after a CV upload."""
+    db = SessionLocal()
+    try:
+        build_feed(db, user_id)
+    except Exception as e:
+        logger.warning("job_feed_build_failed", extra={"user_id": user_id}, exc_info=e)
+    finally:
+        db.close()
+
+# ---- Patch (job publish / edit / archive / delete) ----
+def _drop_job(db: Session, job_id: int) -> int:
+    feeds = (
+        db.query(models.JobFeed)
+        .filter(models.JobFeed.items.contains([{"job_id": job_id}]))
+        .order_by(models.JobFeed.user_id)
+        .with_for_update()
+        .all()
+    )
+    for f in feeds:
+        f.items = [i for i in f.items if i["job_id"] != job_id]
+    db.commit()
+    return len(feeds)
+
+def _score_into_feeds(db: Session, job: models.Job) -> int:
+    """
+    Score one job against every stored feed CV vector (chunked matvecs) and
+    merge it in. Each chunk's feeds are locked until its commit.
+    """
+    job_vec = get_job_vector(db, job)
+    version = _version(job.updated_at)
+    q = (
+        db.query(models.JobFeed.user_id, models.JobFeed.items, models.CVDocument.embedding)
+        .join(models.CVDocument, models.CVDocument.content_hash == models.JobFeed.cv_hash)
+        .filter(
+            models.JobFeed.model_name == score_cache.bi_model_id(),
+            models.CVDocument.embedding_model == nlp.BI_ENCODER_MODEL_NAME,
+            models.CVDocument.embedding.isnot(None),
+        )
+        .order_by(models.JobFeed.user_id)
+        .with_for_update(of=models.JobFeed)
+    )
+    touched = 0
+    last = None
+    while True:
+        page = q.filter(models.JobFeed.user_id > last) if last is not None else q
+        rows = page.limit(_PATCH_CHUNK).all()
+        if not rows:
+            break
+        last = rows[-1].user_id
+        scores = nlp.bi_scores(job_vec, stack((r.embedding for r in rows), job_vec.shape[0]))
+        updates = []
+        for r, s in zip(rows, scores):
+            merged = _merge(r.items, job.id, float(s), version)
+            if merged != r.items:
+                updates.append({"user_id": r.user_id, "items": merged})
+        if updates:
+            db.bulk_update_mappings(models.JobFeed, updates)
+            touched += len(updates)
+        db.commit()
+    return touched
+
+def apply_job_change(job_id: int) -> None:
+    """
+    Background task after job create / patch / delete. Runs after
+    refresh_job_embedding so the stored job vector is current.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(models.Job).get(job_id)
+        if job is None or job.status != "published":
+            _drop_job(db, job_id)
+        else:
+            _score_into_feeds(db, job)
+    except Exception as e:
+        logger.warning("job_feed_patch_failed", extra={"job_id": job_id}, exc_info=e)
+    finally:
+        db.close()
+
+# ---- Read ----
+def get_recommended(db: Session, user_id: int, limit: int = 20) -> List[models.Job]:
+    """Published jobs from the user's feed, best first. Rebuilds only when the feed is missing or outdated."""
+    cv = current_cv(db, user_id)
+    if cv is None:
+        return []
+    # locked like the patch tasks, so a repair below cannot overwrite their merge
+    feed = db.get(models.JobFeed, user_id, with_for_update=True)
+    if feed is None or feed.cv_id != cv.id or feed.model_name != score_cache.bi_model_id():
+        feed = build_feed(db, user_id)
+        if feed is None:
+            return []
+
+    items = list(feed.items)
+    jobs = {
+        j.id: j
+        for j in db.query(models.Job).filter(
+            models.Job.id.in_([i["job_id"] for i in items]), models.Job.status == "published"
+        ).all()
+    }
+    valid = [i for i in items if i["job_id"] in jobs]
+    stale = [i for i in valid if i.get("v") != _version(jobs[i["job_id"]].updated_at)]
+    if stale:
+        # edited since scored and its patch has not landed yet: rescore just those
+        doc = db.get(models.CVDocument, feed.cv_hash)
+        rows = {
+            e.job_id: e
+            for e in db.query(models.JobEmbedding)
+            .filter(models.JobEmbedding.job_id.in_([i["job_id"] for i in stale]))
+            .all()
+        }
+        if doc is not None and doc.embedding is not None:
+            cv_vec = unpack(doc.embedding)
+            for i in stale:
+                e = rows.get(i["job_id"])
+                if e is not None and e.model_name == nlp.BI_ENCODER_MODEL_NAME:
+                    valid = _merge(valid, i["job_id"], float(nlp.bi_scores(cv_vec, unpack(e.vector, e.dim))[0]),
+                                   _version(jobs[i["job_id"]].updated_at))
+    if len(valid) != len(items) or stale:
+        feed.items = valid
+        db.commit()
+
+    if len(valid) < limit:
+        if len(load_job_matrix(db)[0]) > len(valid):
+            # archives drained the feed below what the page shows
+            feed = build_feed(db, user_id)
+            valid = list(feed.items) if feed is not None else []
+            jobs.update({
+                j.id: j for j in db.query(models.Job).filter(
+                    models.Job.id.in_([i["job_id"] for i in valid if i["job_id"] not in jobs])
+                ).all()
+            })
+    return [jobs[i["job_id"]] for i in valid[:limit] if i["job_id"] in jobs]
@@ -0,0 +1,141 @@
+# app/services/score_cache.py
+"""
+Versioned (cv, job) score cache.
+
+A score is reused while the same CV bytes (cv_documents.content_hash) meet
+the same job content (job_version) under the same scorer (bi_model /
+cross_model ids below). The ids include everything that changes the number:
+model name, inference backend / quantization and the job field weights.
+Rows keep the raw model outputs, and the final score is derived from them
+through the scorer's calibration (app.utils.calibration) on every read, so a
+new calibration needs no inference.
+
+After a scorer change the rows of other scorers are flagged stale and the
+applications they scored are re-queued by the throttled backfill in
+app.services.scoring_pipeline; stale rows are pruned once it has caught up.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.job_embeddings import JOB_FIELD_WEIGHTS, _fields_hash, job_fields, job_text
+from app.utils import calibration, inference_backend, nlp
+from app.utils.vectors import content_hash
+
+NO_CROSS = "-"
+
+def bi_model_id() -> str:
+    weights = content_hash(",".join(f"{w:.4f}" for w in JOB_FIELD_WEIGHTS))[:8]
+    return f"{nlp.BI_ENCODER_MODEL_NAME}@{inference_backend.backend_tag(nlp.BI_ENCODER_MODEL_NAME)}/w{weights}"
+
+def cross_model_id() -> str:
+    if not nlp.USE_CROSS_ENCODER:
+        return NO_CROSS
+    return f"{nlp.CROSS_ENCODER_MODEL_NAME}@{inference_backend.backend_tag(nlp.CROSS_ENCODER_MODEL_NAME)}"
+
+def scorer_id(reranked: bool = True) -> str:
+    """Models behind a score; bi-only scores (ranking tail, cross-encoder off) use reranked=False."""
+    return f"{bi_model_id()}+{cross_model_id() if reranked else NO_CROSS}"
+
+def get_calibration(reranked: bool = True) -> calibration.Calibration | None:
+    return calibration.get(scorer_id(reranked))
+
+def score_model_id(reranked: bool = True) -> str:
+    """Value of Application.score_model: scorer id plus the calibration version in use."""
+    cal = get_calibration(reranked)
+    return scorer_id(reranked) + (f"~{cal.version}" if cal is not None else "")
+
+def final_scores(cos, cross_logit=None, reranked: bool = True) -> np.ndarray:
+    """Raw outputs -> stored [0,1] score through the scorer's calibration (one np.interp)."""
+    return calibration.blend(cos, cross_logit, get_calibration(reranked))
+
+def job_version(job: models.Job) -> str:
+    """Hash of what the scorers read from a job; status-only edits keep it."""
+    return content_hash(job_text(job) + "\x1e" + _fields_hash(job_fields(job)))
+
+# ---- Read / write ----
+def lookup(
+    db: Session, keys: Iterable[Tuple[str, int, str]],
+) -> Dict[Tuple[str, int], Tuple[float, Optional[float]]]:
+    """{(cv_hash, job_id): (cosine, cross logit)} for the (cv_hash, job_id, job_version) keys that hit."""
+    keys = list(keys)
+    if not keys:
+        return {}
+    wanted = {(h, j): v for h, j, v in keys}
+    rows = (
+        db.query(models.ScoreCache.cv_hash, models.ScoreCache.job_id,
+                 models.ScoreCache.job_version, models.ScoreCache.bi_score, models.ScoreCache.cross_score)
+        .filter(
+            models.ScoreCache.cv_hash.in_({h for h, _ in wanted}),
+            models.ScoreCache.job_id.in_({j for _, j in wanted}),
+            models.ScoreCache.bi_model == bi_model_id(),
+            models.ScoreCache.cross_model == cross_model_id(),
+            models.ScoreCache.stale.is_(False),
+        )
+        .all()
+    )
+    need_cross = cross_model_id() != NO_CROSS
+    return {
+        (r.cv_hash, r.job_id): (r.bi_score, r.cross_score)
+        for r in rows
+        if wanted.get((r.cv_hash, r.job_id)) == r.job_version and (r.cross_score is not None or not need_cross)
+    }
+
+def store(db: Session, entries: Iterable[Tuple[str, int, str, float, Optional[float], float]]) -> int:
+    """
+    Upsert (cv_hash, job_id, job_version, cosine, cross logit, score) for
+    the current scorer; committed by the caller. A newer job_version
+    replaces the row.
+    """
+    bi_model, cross_model = bi_model_id(), cross_model_id()
+    rows: Dict[Tuple[str, int], Dict] = {}
+    for h, j, v, bi, cross, s in entries:
+        rows[(h, j)] = {
+            "cv_hash": h, "job_id": j, "bi_model": bi_model, "cross_model": cross_model,
+            "job_version": v, "bi_score": float(bi), "cross_score": None if cross is None else float(cross),
+            "score": float(s), "stale": False,
+        }
+    if not rows:
+        return 0
+    stmt = insert(models.ScoreCache).values(list(rows.values()))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["cv_hash", "job_id", "bi_model", "cross_model"],
+        set_={
+            "job_version": stmt.excluded.job_version,
+            "bi_score": stmt.excluded.bi_score,
+            "cross_score": stmt.excluded.cross_score,
+            "score": stmt.excluded.score,
+            "stale": False,
+            "updated_at": func.now(),
+        },
+    ))
+    return len(rows)
+
+# ---- Scorer changes ----
+def mark_stale(db: Session) -> int:
+    """Flag rows written by another scorer; rows of the current one are untouched."""
+    n = (
+        db.query(models.ScoreCache)
+        .filter(
+            models.ScoreCache.stale.is_(False),
+            or_(models.ScoreCache.bi_model != bi_model_id(), models.ScoreCache.cross_model != cross_model_id()),
+        )
+        .update({"stale": True}, synchronize_session=False)
+    )
+    db.commit()
+    return n
+
+def prune_stale(db: Session, limit: int = 5000) -> int:
+    """Delete up to `limit` stale rows (call repeatedly; keeps each transaction short)."""
+    pk = (models.ScoreCache.cv_hash, models.ScoreCache.job_id,
+          models.ScoreCache.bi_model, models.ScoreCache.cross_model)
+    keys = [tuple(k) for k in db.query(*pk).filter(models.ScoreCache.stale.is_(True)).limit(limit).all()]
+    if keys:
+        db.query(models.ScoreCache).filter(tuple_(*pk).in_(keys)).delete(synchronize_session=False)
+        db.commit()
+    return len(keys)
@@ -0,0 +1,343 @@
+# app/services/scoring_pipeline.py
+"""
+Background scoring of applications.
+
+create_application only inserts a `scoring_tasks` row (same transaction as
+the application, so nothing is lost on restart). A small pool of worker
+threads claims tasks in batches, reads the stored CV text, embeds the CVs
+that have no stored vector in one batch, cross-scores every (cv, job) pair
+in one predict and writes Application.score in bulk. Pairs already in the
+score cache skip inference. Failures are retried with exponential backoff.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import exists, func, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services import analytics_rollups, cv_store, score_cache
+from app.services.job_embeddings import fused_scores, get_job_field_vectors, job_text
+from app.utils import nlp
+
+logger = logging.getLogger("smartrecruit")
+
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "1"))
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", "16"))
+SCORING_POLL_SEC = float(os.getenv("SCORING_POLL_SEC", "2"))
+SCORING_MAX_ATTEMPTS = int(os.getenv("SCORING_MAX_ATTEMPTS", "5"))
+SCORING_BACKOFF_SEC = float(os.getenv("SCORING_BACKOFF_SEC", "10"))
+# a task left "running" longer than this (worker crashed) is requeued
+SCORING_LEASE_SEC = int(os.getenv("SCORING_LEASE_SEC", "600"))
+# re-queue applications scored by a previous model (see app.services.score_cache)
+SCORE_BACKFILL = os.getenv("SCORE_BACKFILL", "true").lower() in {"1", "true", "yes"}
+SCORE_BACKFILL_BATCH = int(os.getenv("SCORE_BACKFILL_BATCH", "32"))
+SCORE_BACKFILL_INTERVAL_SEC = float(os.getenv("SCORE_BACKFILL_INTERVAL_SEC", "30"))
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def to_stored_score(score: float) -> float:
+    """Model scores are [0,1]; Application.score is stored on the 0-100 scale the dashboards bin on."""
+    return round(float(score) * 100.0, 2)
+
+# ---- Producer ----
+def enqueue_scoring(db: Session, application: models.Application) -> models.ScoringTask:
+    """Add a task for `application`; committed by the caller with the application."""
+    task = models.ScoringTask(
+        application_id=application.id,
+        cv_id=application.cv_id,
+        job_id=application.job_id,
+        status="queued",
+        attempts=0,
+        next_attempt_at=_now(),
+    )
+    db.add(task)
+    return task
+
+# ---- Consumer ----
+def requeue_stale(db: Session) -> int:
+    cutoff = _now() - timedelta(seconds=SCORING_LEASE_SEC)
+    n = (
+        db.query(models.ScoringTask)
+        .filter(models.ScoringTask.status == "running", models.ScoringTask.locked_at < cutoff)
+        .update({"status": "queued", "locked_at": None}, synchronize_session=False)
+    )
+    db.commit()
+    return n
+
+def claim_batch(db: Session, limit: int) -> List[models.ScoringTask]:
+    """
+    Atomically move up to `limit` due tasks to "running". FOR UPDATE SKIP
+    LOCKED lets several workers (threads or processes) poll the same table.
+    """
+    tasks = (
+        db.query(models.ScoringTask)
+        .filter(models.ScoringTask.status == "queued", models.ScoringTask.next_attempt_at <= _now())
+        .order_by(models.ScoringTask.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    now = _now()
+    for t in tasks:
+        t.status = "running"
+        t.locked_at = now
+    db.commit()
+    return tasks
+
+def _fail(task: models.ScoringTask, err: Exception) -> None:
+    task.attempts = (task.attempts or 0) + 1
+    task.last_error = f"{type(err).__name__}: {err}"[:2000]
+    task.locked_at = None
+    if task.attempts >= SCORING_MAX_ATTEMPTS:
+        task.status = "failed"
+    else:
+        task.status = "queued"
+        task.next_attempt_at = _now() + timedelta(seconds=SCORING_BACKOFF_SEC * (2 ** (task.attempts - 1)))
+
+def application_features(
+    db: Session, rows: Sequence[Tuple[int, int, int]], use_cache: bool = True,
+) -> Tuple[Dict[int, Tuple[float, Optional[float]]], Dict[int, Exception]]:
+    """
+    Raw model outputs for (application_id, cv_id, job_id) rows:
+    ({id: (fused cosine, cross logit or None)}, {id: error} for rows whose
+    CV or job is gone or unreadable). Cached pairs skip inference and fresh
+    ones are written to the cache; the caller commits.
+    """
+    rows = list(rows)
+    errors: Dict[int, Exception] = {}
+    if not rows:
+        return {}, errors
+    cvs = {c.id: c for c in db.query(models.CV).filter(models.CV.id.in_({r[1] for r in rows})).all()}
+    jobs = {j.id: j for j in db.query(models.Job).filter(models.Job.id.in_({r[2] for r in rows})).all()}
+    docs = cv_store.get_documents(db, cvs.values())
+
+    ready: List[Tuple[int, int, int]] = []
+    for app_id, cv_id, job_id in rows:
+        if cv_id not in cvs or job_id not in jobs:
+            errors[app_id] = LookupError("cv or job no longer exists")
+        elif cv_id not in docs:
+            errors[app_id] = ValueError("cv text could not be extracted")
+        else:
+            ready.append((app_id, cv_id, job_id))
+    if not ready:
+        return {}, errors
+
+    cv_hash = {a: docs[c].content_hash for a, c, _ in ready}
+    versions = {j: score_cache.job_version(jobs[j]) for j in {j for _, _, j in ready}}
+    # same CV bytes x same job content x same scorer: reuse, no inference
+    cached = score_cache.lookup(db, [(cv_hash[a], j, versions[j]) for a, _, j in ready]) if use_cache else {}
+    out = {a: cached[(cv_hash[a], j)] for a, _, j in ready if (cv_hash[a], j) in cached}
+    todo = [r for r in ready if r[0] not in out]
+    if todo:
+        cv_vecs = cv_store.get_embeddings(db, {docs[c].content_hash: docs[c] for _, c, _ in todo}.values())
+        # per-field fused prior: all CVs x all distinct jobs in one product, then pick the pairs
+        job_ids = list(dict.fromkeys(j for _, _, j in todo))
+        col = {jid: i for i, jid in enumerate(job_ids)}
+        fused = fused_scores(
+            np.stack([cv_vecs[cv_hash[a]] for a, _, _ in todo]),
+            get_job_field_vectors(db, [jobs[jid] for jid in job_ids]),
+        )
+        cos, logits = nlp.pair_features(
+            [docs[c].normalized_text for _, c, _ in todo],
+            [job_text(jobs[j]) for _, _, j in todo],
+            prior=fused[np.arange(len(todo)), [col[j] for _, _, j in todo]],
+            strict=True,
+        )
+        logits = logits if logits is not None else [None] * len(todo)
+        final = score_cache.final_scores(cos, None if logits[0] is None else np.asarray(logits))
+        score_cache.store(db, [
+            (cv_hash[a], j, versions[j], c, x, f) for (a, _, j), c, x, f in zip(todo, cos, logits, final)
+        ])
+        out.update({a: (float(c), None if x is None else float(x)) for (a, _, _), c, x in zip(todo, cos, logits)})
+    return out, errors
+
+def score_applications(
+    db: Session, rows: Sequence[Tuple[int, int, int]], use_cache: bool = True,
+) -> Tuple[Dict[int, float], Dict[int, Exception]]:
+    """({application id: calibrated score in [0,1]}, {id: error}); see application_features."""
+    feats, errors = application_features(db, rows, use_cache=use_cache)
+    if not feats:
+        return {}, errors
+    ids = list(feats)
+    cos = np.array([feats[a][0] for a in ids], dtype=np.float64)
+    logits = [feats[a][1] for a in ids]  # all None or none None: one scorer per call
+    final = score_cache.final_scores(cos, None if logits[0] is None else np.array(logits, dtype=np.float64))
+    return dict(zip(ids, final.tolist())), errors
+
+def process_batch(db: Session, tasks: List[models.ScoringTask]) -> int:
+    """Score a claimed batch; returns the number of applications scored."""
+    if not tasks:
+        return 0
+    try:
+        scores, errors = score_applications(db, [(t.application_id, t.cv_id, t.job_id) for t in tasks])
+    except Exception as e:
+        db.rollback()
+        logger.warning("scoring_batch_failed", extra={"size": len(tasks)}, exc_info=e)
+        for t in tasks:
+            _fail(t, e)
+        db.commit()
+        return 0
+
+    model_id = score_cache.score_model_id()
+    stored = {a: to_stored_score(s) for a, s in scores.items()}
+    analytics_rollups.scores_changed(db, stored)
+    db.bulk_update_mappings(
+        models.Application,
+        [{"id": a, "score": s, "score_model": model_id} for a, s in stored.items()],
+    )
+    for t in tasks:
+        if t.application_id in scores:
+            t.status = "done"
+            t.locked_at = None
+            t.last_error = None
+        else:
+            _fail(t, errors.get(t.application_id) or LookupError("application not scored"))
+    db.commit()
+    return len(scores)
+
+# ---- Backfill after a scorer change ----
+def _outdated_applications(db: Session):
+    """Scored applications whose score_model is not the current scorer and that have no open task."""
+    current = (score_cache.score_model_id(True), score_cache.score_model_id(False))
+    open_task = exists().where(
+        models.ScoringTask.application_id == models.Application.id,
+        models.ScoringTask.status.in_(("queued", "running")),
+    )
+    return (
+        db.query(models.Application.id, models.Application.cv_id, models.Application.job_id)
+        .filter(
+            models.Application.score.isnot(None),
+            or_(models.Application.score_model.is_(None), models.Application.score_model.notin_(current)),
+            ~open_task,
+        )
+    )
+
+def enqueue_backfill(db: Session, limit: int) -> int:
+    """Queue up to `limit` outdated applications, oldest first; never more than the queue can absorb."""
+    queued = db.query(func.count(models.ScoringTask.id)).filter(models.ScoringTask.status == "queued").scalar() or 0
+    room = limit - queued
+    if room <= 0:
+        return 0
+    rows = _outdated_applications(db).order_by(models.Application.id).limit(room).all()
+    for r in rows:
+        enqueue_scoring(db, r)
+    db.commit()
+    return len(rows)
+
+class ScoreBackfill:
+    """
+    Re-queues applications scored by another model, SCORE_BACKFILL_BATCH at
+    a time every SCORE_BACKFILL_INTERVAL_SEC and only while the queue is
+    nearly empty, so live applications are never stuck behind it.
+    """
+    def __init__(self, batch: int = SCORE_BACKFILL_BATCH, interval_sec: float = SCORE_BACKFILL_INTERVAL_SEC):
+        self.batch = batch
+        self.interval_sec = interval_sec
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="score-backfill", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            n = enqueue_backfill(db, self.batch)
+            if n == 0 and not _outdated_applications(db).first():
+                score_cache.prune_stale(db)
+            return n
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        db = SessionLocal()
+        try:
+            n = score_cache.mark_stale(db)
+            if n:
+                logger.info("score_cache_marked_stale", extra={"rows": n})
+        except Exception as e:
+            logger.warning("score_cache_mark_stale_failed", exc_info=e)
+        finally:
+            db.close()
+        while not self._stop.wait(self.interval_sec):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning("score_backfill_error", exc_info=e)
+
+# ---- Worker pool ----
+class ScoringWorkerPool:
+    def __init__(self, workers: int = SCORING_WORKERS, batch_size: int = SCORING_BATCH_SIZE,
+                 poll_sec: float = SCORING_POLL_SEC):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_sec = poll_sec
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            th = threading.Thread(target=self._run, name=f"scoring-{i}-{uuid.uuid4().hex[:6]}", daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for th in self._threads:
+            th.join(timeout)
+        self._threads = []
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            requeue_stale(db)
+            return process_batch(db, claim_batch(db, self.batch_size))
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                n = self.run_once()
+            except Exception as e:
+                logger.warning("scoring_worker_error", exc_info=e)
+                n = 0
+            if n == 0:
+                self._stop.wait(self.poll_sec)
+
+_pool: ScoringWorkerPool | None = None
+_backfill: ScoreBackfill | None = None
+
+def start_workers() -> None:
+    global _pool, _backfill
+    if _pool is None and SCORING_WORKERS > 0:
+        _pool = ScoringWorkerPool()
+        _pool.start()
+        if SCORE_BACKFILL:
+            _backfill = ScoreBackfill()
+            _backfill.start()
+
+def stop_workers() -> None:
+    global _pool, _backfill
+    if _backfill is not None:
+        _backfill.stop()
+        _backfill = None
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
@@ -0,0 +1,145 @@
+# app/services/skill_index.py
+"""
+Skill postings for published jobs and for CVs.
+
+Jobs are indexed on their declared `skills` (normalized) plus the skills
+the matcher finds in their text fields; CVs on the skills found in their
+stored document text (kept on cv_documents, extracted once per vocabulary
+version). Both indexes live in process and follow the database through
+cheap change markers, so every worker converges without extra messaging.
+
+Retrieval intersects postings to cut tens of thousands of candidates down
+to the few hundred that share skills with the query, before any vector math.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.job_embeddings import job_fields, store_stamp
+from app.utils.skills import SkillIndex, get_matcher
+
+logger = logging.getLogger("smartrecruit")
+
+SKILL_PREFILTER = os.getenv("SKILL_PREFILTER", "true").lower() in {"1", "true", "yes"}
+SKILL_PREFILTER_MIN_MATCH = int(os.getenv("SKILL_PREFILTER_MIN_MATCH", "1"))
+# below this many candidates, scoring all of them is cheaper than filtering
+SKILL_PREFILTER_MIN_POOL = int(os.getenv("SKILL_PREFILTER_MIN_POOL", "2000"))
+
+_TEXT_FIELDS = ("title", "description", "missions", "profile_requirements")
+
+# ---- Extraction ----
+def job_skills(job: models.Job) -> List[str]:
+    m = get_matcher()
+    declared = {m.normalize(s) for s in job.skills if str(s).strip()} if isinstance(job.skills, list) else set()
+    fields = job_fields(job)
+    found = m.extract(" ".join(fields[f] for f in _TEXT_FIELDS if fields[f]))
+    return sorted(declared.union(found))
+
+def document_skills(docs: Iterable[models.CVDocument]) -> Dict[str, List[str]]:
+    """
+    content_hash -> canonical skills. Documents extracted with another
+    vocabulary version are re-extracted together; the caller commits.
+    """
+    m = get_matcher()
+    docs = list(docs)
+    stale = [d for d in docs if d.skills is None or d.skills_version != m.version]
+    for d, found in zip(stale, m.extract_many(d.normalized_text for d in stale)):
+        d.skills = found
+        d.skills_version = m.version
+    return {d.content_hash: list(d.skills or []) for d in docs}
+
+# ---- Job postings ----
+_job_lock = threading.Lock()
+_job_index = SkillIndex()
+_job_versions: Dict[int, object] = {}  # job id -> updated_at it was indexed at
+_job_seen: Tuple = (None, None)
+
+def get_job_skill_index(db: Session) -> SkillIndex:
+    """Published jobs by skill; only jobs whose updated_at moved are re-extracted."""
+    global _job_seen
+    stamp = store_stamp(db)[:2]
+    with _job_lock:
+        if stamp == _job_seen:
+            return _job_index
+        rows = db.query(models.Job.id, models.Job.updated_at).filter(models.Job.status == "published").all()
+        current = {r.id: r.updated_at for r in rows}
+        for job_id in [j for j in _job_versions if j not in current]:
+            _job_index.remove(job_id)
+            del _job_versions[job_id]
+        changed = [j for j, ts in current.items() if _job_versions.get(j) != ts]
+        for start in range(0, len(changed), 500):
+            for job in db.query(models.Job).filter(models.Job.id.in_(changed[start:start + 500])).all():
+                _job_index.set(job.id, job_skills(job))
+                _job_versions[job.id] = current[job.id]
+        _job_seen = stamp
+        return _job_index
+
+def candidate_job_ids(db: Session, skills: Iterable[str], min_match: int = SKILL_PREFILTER_MIN_MATCH) -> np.ndarray:
+    """Published job ids sharing at least `min_match` of `skills`."""
+    return get_job_skill_index(db).match(skills, min_match)
+
+def job_rows(db: Session, skills: Iterable[str], ids: np.ndarray, need: int) -> Optional[np.ndarray]:
+    """
+    Positions in `ids` (published job ids, e.g. from load_job_matrix) of the
+    jobs sharing skills with `skills`; None when the prefilter is off, the
+    pool is small or fewer than `need` jobs match (score everything then).
+    """
+    skills = list(skills)
+    if not SKILL_PREFILTER or not skills or len(ids) < SKILL_PREFILTER_MIN_POOL:
+        return None
+    cands = candidate_job_ids(db, skills)
+    if len(cands) < need:
+        return None
+    rows = np.flatnonzero(np.isin(ids, cands))
+    return rows if len(rows) >= need else None
+
+# ---- CV postings ----
+_cv_lock = threading.Lock()
+_cv_index = SkillIndex()
+_cv_hashes: Dict[int, str] = {}  # cv id -> content_hash it was indexed with
+_cv_seen: Tuple = (None, None, None, None)
+
+def get_cv_skill_index(db: Session) -> SkillIndex:
+    """CVs with a stored document, by skill. New or relinked CVs are added incrementally."""
+    global _cv_seen
+    stamp = tuple(
+        db.query(
+            func.count(models.CV.id), func.max(models.CV.id),
+            func.count(models.CV.content_hash), func.max(models.CV.updated_at),
+        ).one()
+    )
+    with _cv_lock:
+        if stamp == _cv_seen:
+            return _cv_index
+        rows = db.query(models.CV.id, models.CV.content_hash).filter(models.CV.content_hash.isnot(None)).all()
+        current = {r.id: r.content_hash for r in rows}
+        for cv_id in [c for c in _cv_hashes if c not in current]:
+            _cv_index.remove(cv_id)
+            del _cv_hashes[cv_id]
+        changed = [c for c, h in current.items() if _cv_hashes.get(c) != h]
+        hashes = list({current[c] for c in changed})
+        found: Dict[str, List[str]] = {}
+        for start in range(0, len(hashes), 500):
+            docs = (
+                db.query(models.CVDocument)
+                .filter(models.CVDocument.content_hash.in_(hashes[start:start + 500]))
+                .all()
+            )
+            found.update(document_skills(docs))
+            db.commit()  # keep extracted skills for the next rebuild / other workers
+        for cv_id in changed:
+            _cv_index.set(cv_id, found.get(current[cv_id], ()))
+            _cv_hashes[cv_id] = current[cv_id]
+        _cv_seen = stamp
+        return _cv_index
+
+def candidate_cv_ids(db: Session, job: models.Job, min_match: int = SKILL_PREFILTER_MIN_MATCH) -> np.ndarray:
+    """CV ids sharing at least `min_match` skills with `job`."""
+    return get_cv_skill_index(db).match(job_skills(job), min_match)
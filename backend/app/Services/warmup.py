@@ -0,0 +1,138 @@
+# app/services/warmup.py
+"""
+Model warmup and the readiness flag behind /healthz.
+
+At startup a background thread loads every configured model through the
+registry and runs a few forward passes at the batch sizes we actually serve
+(single requests, micro-batches, pipeline batches), so lazy kernel selection,
+allocator growth and tokenizer caches happen before real traffic. Load and
+first-inference latencies are recorded; once everything has run the process
+is marked ready. /healthz only reads that cached state.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from app.utils import nlp
+from app.utils.model_registry import registry
+
+logger = logging.getLogger("smartrecruit")
+
+WARMUP_BATCH_SIZES = [int(x) for x in os.getenv("WARMUP_BATCH_SIZES", "1,8,32").split(",") if x.strip()]
+
+_SAMPLE_CV = (
+    "Software engineering student with internships in backend development. "
+    "Built REST APIs with Python, FastAPI and PostgreSQL, wrote unit tests and CI "
+    "pipelines, deployed services with Docker. Familiar with React, SQL reporting "
+    "and data analysis with pandas. French and English, team projects, agile. "
+)
+_SAMPLE_JOB = (
+    "Backend developer intern: design and maintain Python services, write SQL, "
+    "review code and improve test coverage. Skills: Python, FastAPI, PostgreSQL, Git."
+)
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "ready": False,
+    "running": False,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+    "models": {},
+}
+
+
+def _cv_chunk() -> str:
+    # about one chunk of tokens, the length the bi-encoder sees most
+    words = (_SAMPLE_CV * 8).split()
+    return " ".join(words[: nlp.CHUNK_TOKENS])
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - t0, 4)
+
+
+def _warm_bi() -> Dict[str, Any]:
+    bi = nlp._get_bi_encoder()
+    # measured by the registry, so a preloaded (pre-fork) model reports its real load time
+    out: Dict[str, Any] = {
+        "name": nlp.BI_ENCODER_MODEL_NAME,
+        "load_sec": registry.load_sec("bi", nlp.BI_ENCODER_MODEL_NAME),
+    }
+    text = _cv_chunk()
+    out["first_inference_sec"] = _timed(lambda: bi.encode([text], normalize_embeddings=True))
+    out["batches"] = {
+        bs: _timed(lambda: bi.encode([text] * bs, batch_size=bs, normalize_embeddings=True))
+        for bs in WARMUP_BATCH_SIZES
+    }
+    return out
+
+
+def _warm_cross() -> Dict[str, Any]:
+    cross = nlp._get_cross_encoder()
+    out: Dict[str, Any] = {
+        "name": nlp.CROSS_ENCODER_MODEL_NAME,
+        "load_sec": registry.load_sec("cross", nlp.CROSS_ENCODER_MODEL_NAME),
+    }
+    pair = (_cv_chunk(), _SAMPLE_JOB)
+    out["first_inference_sec"] = _timed(lambda: cross.predict([pair]))
+    out["batches"] = {
+        bs: _timed(lambda: cross.predict([pair] * bs, batch_size=bs))
+        for bs in WARMUP_BATCH_SIZES
+    }
+    return out
+
+
+def run_warmup() -> Dict[str, Any]:
+    """
+    Load and exercise every configured model, then flip the ready flag.
+    Idempotent: a call while a run is in progress returns its status at once.
+    """
+    with _lock:
+        busy = _state["running"]
+        if busy:
+            snapshot = _snapshot()  # _lock is not reentrant: no status() in here
+        else:
+            _state.update(running=True, error=None, started_at=time.time())
+    if busy:
+        return snapshot
+    models: Dict[str, Any] = {}
+    try:
+        models["bi_encoder"] = _warm_bi()
+        if nlp.USE_CROSS_ENCODER:
+            models["cross_encoder"] = _warm_cross()
+    except Exception as e:
+        logger.warning("warmup_failed", exc_info=e)
+        with _lock:
+            _state.update(running=False, error=f"{type(e).__name__}: {e}", models=models, finished_at=time.time())
+        return status()
+    with _lock:
+        _state.update(ready=True, running=False, models=models, finished_at=time.time())
+    logger.info("warmup_done", extra={"models": models})
+    return status()
+
+
+def start_warmup() -> threading.Thread:
+    """Run the warmup off the event loop; the server answers probes meanwhile."""
+    t = threading.Thread(target=run_warmup, name="model-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def _snapshot() -> Dict[str, Any]:
+    """Copy of the state; the caller holds _lock."""
+    return {**_state, "models": dict(_state["models"])}
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        return _snapshot()
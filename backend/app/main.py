@@ -2,13 +2,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import threading
 from dotenv import load_dotenv
 
 from app import models
 from app.database import engine
 from app.config import settings
 from app.routers import auth, users, jobs, cvs, applications, admin_analytics, company_analytics, company
-from app.services.ai_service import ai_service, warmup as warmup_ai, compute_deterministic_score
+from fastapi.responses import JSONResponse
+from app.services.ai_service import cache_stats
+from app.services import analytics_rollups, job_search, scoring_pipeline, warmup
+from app.utils.extract_pool import get_executor as get_extract_executor
+from app.utils import nlp
+from app.utils.model_registry import registry as model_registry, PRELOAD_MODELS
 from .core.logging import setup_logging
 
 load_dotenv()
@@ -19,16 +25,37 @@ if os.getenv("CREATE_TABLES", "false").lower() in {"1", "true", "yes"}:
 
 setup_logging(debug=getattr(settings, "DEBUG", False))
 
+# --- Load models before the server forks so workers share the weights (COW) ---
+if PRELOAD_MODELS:
+    _preload = [("bi", nlp.BI_ENCODER_MODEL_NAME)]
+    if nlp.USE_CROSS_ENCODER:
+        _preload.append(("cross", nlp.CROSS_ENCODER_MODEL_NAME))
+    model_registry.preload(_preload)
+
 app = FastAPI(title="Job Matching API")
 
 @app.on_event("startup")
 def _warm_models():
-    try:
-        warmup_ai()
-    except Exception as e:
-        # don't block startup on warmup issues
-        import logging
-        logging.getLogger("smartrecruit").warning("warmup_failed", exc_info=e)
+    # runs in a thread: /healthz answers 503 until the models have been exercised
+    warmup.start_warmup()
+
+@app.on_event("startup")
+def _build_search_index():
+    threading.Thread(target=job_search.warm_index, name="job-search-index", daemon=True).start()
+
+@app.on_event("startup")
+def _start_scoring_workers():
+    scoring_pipeline.start_workers()
+
+@app.on_event("startup")
+def _start_rollup_reconciler():
+    analytics_rollups.start_reconciler()
+
+@app.on_event("shutdown")
+def _stop_scoring_workers():
+    scoring_pipeline.stop_workers()
+    analytics_rollups.stop_reconciler()
+    get_extract_executor().shutdown()
 
 if getattr(settings, "ENABLE_REQUEST_LOGS", True):
     from .core.middleware import RequestIdMiddleware, AccessLogMiddleware
@@ -50,6 +77,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # GET /jobs pagination
 )
 
 # --- Routers ---
@@ -79,40 +107,42 @@ def health():
 # --- Detailed health check ---
 @app.get("/healthz")
 def healthz():
-    """Detailed health check with AI service status"""
-    ok = True
-    ai_ok = True
-    try:
-        # model load
-        from app.services.ai_service import get_bi_encoder
-        _ = get_bi_encoder()
-        # micro inference
-        _ = compute_deterministic_score("ping", "pong")
-    except Exception:
-        ai_ok = False
-        ok = False
-
-    return {
-        "status": "ok" if ok else "error",
+    """Readiness probe: reports the cached warmup state, never runs inference"""
+    state = warmup.status()
+    ready = state["ready"]
+    body = {
+        "status": "ok" if ready else ("error" if state["error"] else "starting"),
         "services": {
             "database": "ok",  # Assume DB is ok if we get here
-            "ai_service": "ok" if ai_ok else "error"
+            "ai_service": "ok" if ready else ("error" if state["error"] else "warming_up"),
         },
+        "warmup": state,
         "email_config_present": bool(getattr(settings, "SMTP_SERVER", None))
     }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+# --- AI embedding cache metrics ---
+@app.get("/ai/cache")
+def ai_cache():
+    """Hit/miss/eviction counters and size of the embedding LRU"""
+    return cache_stats()
+
+# --- Loaded models and memory ---
+@app.get("/ai/models")
+def ai_models():
+    """Models held by this worker's registry, their size and the process RSS"""
+    return model_registry.memory_report()
 
 # --- AI warmup endpoint ---
 @app.post("/ai/warmup")
 def warmup_ai():
-    """Warm up AI models by loading them into memory"""
-    try:
-        # Force loading of AI models
-        test_emb = ai_service.get_embedding("warmup test text")
-        print("AI models warmed up successfully")
-        return {"message": "AI models warmed up successfully"}
-    except Exception as e:
-        print(f"Failed to warm up AI models: {e}")
-        return {"error": f"Failed to warm up AI models: {str(e)}"}
+    """Load and exercise the AI models now (no-op while a warmup is running)"""
+    state = warmup.run_warmup()
+    if state["running"]:
+        return {"message": "AI model warmup already in progress", "warmup": state}
+    if state["error"]:
+        return {"error": f"Failed to warm up AI models: {state['error']}", "warmup": state}
+    return {"message": "AI models warmed up successfully", "warmup": state}
 
 # --- Email test endpoint ---
 @app.post("/test-email")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Float, text
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Float, LargeBinary, Index, func, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from .database import Base
@@ -68,6 +68,14 @@ class Job(Base):
 
     applications = relationship("Application", back_populates="job", cascade="all,delete")
 
+# Hot query shapes (listing by status / owner, GET /jobs filters); see migration f3a9d1c6b2e7
+Index("ix_jobs_status_posted_at", Job.status, Job.posted_at.desc(), Job.id.desc())
+Index("ix_jobs_published_posted_at", Job.posted_at.desc(), Job.id.desc(),
+      postgresql_where=text("status = 'published'"))
+Index("ix_jobs_owner_posted_at", Job.owner_user_id, Job.posted_at.desc())
+Index("ix_jobs_published_city", func.lower(Job.location_city), postgresql_where=text("status = 'published'"))
+Index("ix_jobs_skills", Job.skills, postgresql_using="gin", postgresql_ops={"skills": "jsonb_path_ops"})
+
 class Application(Base):
     __tablename__ = "applications"
     id = Column(Integer, primary_key=True, index=True)
@@ -77,16 +85,134 @@ class Application(Base):
     cv_id = Column(Integer, ForeignKey("cvs.id"), nullable=False)
     status = Column(String, nullable=False, default="pending")
     score = Column(Float, nullable=True)
+    # scorer that produced `score` (app.services.score_cache.score_model_id)
+    score_model = Column(String, nullable=True, index=True)
     applied_at = Column(DateTime(timezone=True), server_default=text('now()'))
 
     user = relationship("User", back_populates="applications")
     job = relationship("Job", back_populates="applications")
 
+Index("ix_applications_job_applied_at", Application.job_id, Application.applied_at.desc())
+Index("ix_applications_user_applied_at", Application.user_id, Application.applied_at.desc())
+Index("ix_applications_applied_at", Application.applied_at)
+
 class CV(Base):
     __tablename__ = "cvs"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     file_path = Column(String, nullable=False)
     uploaded_at = Column(DateTime(timezone=True))
+    # sha256 of the uploaded bytes -> cv_documents
+    content_hash = Column(String(64), ForeignKey("cv_documents.content_hash"), nullable=True, index=True)
+    # bumped on every ORM update (e.g. content_hash relinks); change marker for skill_index
+    updated_at = Column(DateTime(timezone=True), server_default=text('now()'), onupdate=func.now())
 
     user = relationship("User", back_populates="cvs")
+
+Index("ix_cvs_user_uploaded_at", CV.user_id, CV.uploaded_at.desc())
+
+class JobEmbedding(Base):
+    """Precomputed bi-encoder vector for a job (float32 bytes, L2-normalized)."""
+    __tablename__ = "job_embeddings"
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    model_name = Column(String, nullable=False)
+    # sha256 of the normalized job text the vector was computed from
+    content_hash = Column(String(64), nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    # one vector per structured field ((len(JOB_FIELDS), dim) float32, zero rows for
+    # empty fields) and the sha256 of the field texts they were computed from
+    field_vectors = Column(LargeBinary, nullable=True)
+    fields_hash = Column(String(64), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=text('now()'))
+
+class ScoringTask(Base):
+    """DB-backed queue entry: score one application off the request path."""
+    __tablename__ = "scoring_tasks"
+    id = Column(Integer, primary_key=True, index=True)
+    application_id = Column(Integer, ForeignKey("applications.id", ondelete="CASCADE"), nullable=False)
+    cv_id = Column(Integer, nullable=False)
+    job_id = Column(Integer, nullable=False)
+    # status: queued | running | done | failed
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=text('now()'))
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=text('now()'))
+
+class CVDocument(Base):
+    """Extracted CV text, stored once per distinct uploaded file (sha256 of the bytes)."""
+    __tablename__ = "cv_documents"
+    content_hash = Column(String(64), primary_key=True)
+    text = Column(Text, nullable=False)
+    normalized_text = Column(Text, nullable=False)
+    page_count = Column(Integer, nullable=False, default=0)
+    # bi-encoder vector of normalized_text (float32 bytes) and the model that produced it
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_model = Column(String, nullable=True)
+    # per-chunk vectors ((n, dim) float32 bytes) and the chunk texts, same order
+    chunk_embeddings = Column(LargeBinary, nullable=True)
+    chunks = Column(JSONB, nullable=True)
+    # canonical skills found in the text and the skills-vocabulary version used
+    skills = Column(JSONB, nullable=True)
+    skills_version = Column(String(16), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class JobFeed(Base):
+    """Precomputed "jobs for my current CV" list, one row per candidate."""
+    __tablename__ = "job_feeds"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # the CV version the feed was scored against (latest upload of the user)
+    cv_id = Column(Integer, ForeignKey("cvs.id", ondelete="CASCADE"), nullable=False)
+    cv_hash = Column(String(64), nullable=False, index=True)
+    model_name = Column(String, nullable=False)
+    # [{"job_id": int, "score": float in [0, 1], "v": job.updated_at ISO}] best first
+    items = Column(JSONB, nullable=False, server_default="[]")
+    updated_at = Column(DateTime(timezone=True), server_default=text('now()'))
+
+class ScoreCache(Base):
+    """One (cv, job) score per scorer; reused while the CV bytes and job content are unchanged."""
+    __tablename__ = "score_cache"
+    cv_hash = Column(String(64), primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    bi_model = Column(String, primary_key=True)
+    cross_model = Column(String, primary_key=True)  # "-" when the cross-encoder is off
+    # sha256 of the job text and fields the score was computed from
+    job_version = Column(String(64), nullable=False)
+    # raw model outputs (fused cosine, cross-encoder logit) the score is derived from,
+    # so a new calibration re-maps cached rows without inference
+    bi_score = Column(Float, nullable=False)
+    cross_score = Column(Float, nullable=True)
+    score = Column(Float, nullable=False)  # [0, 1] as written
+    stale = Column(Boolean, nullable=False, default=False, server_default=text('false'))
+    updated_at = Column(DateTime(timezone=True), server_default=text('now()'))
+
+class _DailyCounters:
+    """Counters shared by the analytics rollups (app.services.analytics_rollups)."""
+    applications = Column(Integer, nullable=False, server_default="0")
+    pending = Column(Integer, nullable=False, server_default="0")
+    under_review = Column(Integer, nullable=False, server_default="0")
+    accepted = Column(Integer, nullable=False, server_default="0")
+    rejected = Column(Integer, nullable=False, server_default="0")
+    other_status = Column(Integer, nullable=False, server_default="0")
+    score_sum = Column(Float, nullable=False, server_default="0")
+    score_count = Column(Integer, nullable=False, server_default="0")
+    # histogram of the 0-100 score: [0,20) [20,40) [40,60) [60,80) [80,...)
+    score_h0 = Column(Integer, nullable=False, server_default="0")
+    score_h20 = Column(Integer, nullable=False, server_default="0")
+    score_h40 = Column(Integer, nullable=False, server_default="0")
+    score_h60 = Column(Integer, nullable=False, server_default="0")
+    score_h80 = Column(Integer, nullable=False, server_default="0")
+
+class JobDailyStats(_DailyCounters, Base):
+    """Applications per job and UTC day of application."""
+    __tablename__ = "job_daily_stats"
+    day = Column(Date, primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class OwnerDailyStats(_DailyCounters, Base):
+    """Applications per job owner (0 = jobs without an owner) and UTC day of application."""
+    __tablename__ = "owner_daily_stats"
+    owner_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
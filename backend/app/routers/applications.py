@@ -5,6 +5,8 @@ from ..deps import get_db, get_current_user
 from .. import models, schemas
 from datetime import datetime, timezone
 from ..services.email_service import send_email, tpl_submission, tpl_decision
+from ..services.scoring_pipeline import enqueue_scoring
+from ..services import analytics_rollups
 
 router = APIRouter(prefix="/applications", tags=["applications"])
 
@@ -34,6 +36,10 @@ def create_application(payload: schemas.ApplicationCreate,
         applied_at=datetime.now(timezone.utc)
     )
     db.add(app)
+    db.flush()
+    # scored by the background pipeline; queued in the same transaction
+    enqueue_scoring(db, app)
+    analytics_rollups.application_created(db, app, job)
     db.commit()
     db.refresh(app)
 
@@ -86,7 +92,13 @@ def update_application_status(application_id: int, payload: dict,
     if new_status not in {"accepted", "rejected"}:
         raise HTTPException(400, "Invalid status")
 
-    app = db.query(models.Application).get(application_id)
+    # locked until commit: the rollup delta is computed from the status read here
+    app = (
+        db.query(models.Application)
+        .filter(models.Application.id == application_id)
+        .with_for_update()
+        .first()
+    )
     if not app:
         raise HTTPException(404, "Application not found")
 
@@ -97,7 +109,9 @@ def update_application_status(application_id: int, payload: dict,
     if not (getattr(user, "is_admin", False) or job.owner_user_id == user.id):
         raise HTTPException(403, "Not allowed")
 
+    old_status = app.status
     app.status = new_status
+    analytics_rollups.status_changed(db, app, job, old_status)
     db.commit()
     db.refresh(app)
 
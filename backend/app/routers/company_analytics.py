@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, or_, case, text, asc
-from typing import Dict, Any
+from sqlalchemy import func, desc, or_, text, asc
+from typing import Dict, Any, List
 from ..deps import get_db, get_current_user
 from .. import models
-from datetime import date
+from ..services import analytics_rollups
+from ..services.ranking import rank_applicants
+from ..services.explanations import MAX_EXPLAIN_ROWS, explain_applications
+from datetime import date, timedelta
 
 def _ensure_company_or_admin(user: Any) -> None:
     """
@@ -25,42 +28,51 @@ def company_summary(db: Session = Depends(get_db), user=Depends(get_current_user
     _ensure_company_or_admin(user)
     owner_id = None if getattr(user, "is_admin", False) else user.id
 
-    jobs_q = db.query(func.count(models.Job.id))
-    open_jobs_q = db.query(func.count(models.Job.id)).filter(models.Job.status == "published")
-    apps_q = (
-        db.query(func.count(models.Application.id))
-        .select_from(models.Application)
-        .join(models.Job, models.Job.id == models.Application.job_id)
-    )
-    if owner_id:
-        jobs_q = jobs_q.filter(models.Job.owner_user_id == owner_id)
-        open_jobs_q = open_jobs_q.filter(models.Job.owner_user_id == owner_id)
-        apps_q = apps_q.filter(models.Job.owner_user_id == owner_id)
-
-    jobs = jobs_q.scalar() or 0
-    open_jobs = open_jobs_q.scalar() or 0
-    applications = apps_q.scalar() or 0
-
-    avg_score_q = (
-        db.query(func.avg(models.Application.score))
-        .select_from(models.Application)
-        .join(models.Job, models.Job.id == models.Application.job_id)
-    )
-    if owner_id:
-        avg_score_q = avg_score_q.filter(models.Job.owner_user_id == owner_id)
-    avg_score = avg_score_q.scalar()
-    avg_score = float(avg_score) if avg_score is not None else None
-
-    by_status_q = (
-        db.query(models.Application.status, func.count(models.Application.id))
-        .select_from(models.Application)
-        .join(models.Job, models.Job.id == models.Application.job_id)
-        .group_by(models.Application.status)
-    )
-    if owner_id:
-        by_status_q = by_status_q.filter(models.Job.owner_user_id == owner_id)
-    by_status = {k or "unknown": int(v) for k, v in by_status_q.all()}
+    # 1) every aggregate in one statement: job counts live, application counters
+    #    from the daily rollups (app.services.analytics_rollups). The CTEs are
+    #    inlined (NOT MATERIALIZED) so each branch keeps its own index path
+    scope_sql = "WHERE j.owner_user_id = :owner_id" if owner_id else ""
+    owner_sql = "WHERE o.owner_id = :owner_id" if owner_id else ""
+    params = {"owner_id": owner_id} if owner_id else {}
+    sums = ", ".join(f"COALESCE(sum({c}), 0) AS {c}" for c in analytics_rollups.COUNTERS)
+    row = db.execute(
+        text(f"""
+        WITH sj AS NOT MATERIALIZED (
+          SELECT j.id, j.title, j.status FROM jobs j {scope_sql}
+        ), od AS NOT MATERIALIZED (
+          SELECT * FROM owner_daily_stats o {owner_sql}
+        ), today AS (
+          SELECT (now() AT TIME ZONE 'UTC')::date AS d
+        )
+        SELECT jc.*, ac.*, tr.trend, tj.top_jobs, (SELECT d FROM today) AS today
+        FROM (
+          SELECT count(*) AS jobs, count(*) FILTER (WHERE status = 'published') AS open_jobs FROM sj
+        ) jc, (
+          SELECT {sums} FROM od
+        ) ac, (
+          SELECT COALESCE(jsonb_object_agg(day::text, n), '{{}}') AS trend
+          FROM (
+            SELECT day, sum(applications) AS n
+            FROM od WHERE day >= (SELECT d FROM today) - 29
+            GROUP BY day
+          ) t
+        ) tr, (
+          SELECT COALESCE(json_agg(json_build_object('job_id', job_id, 'title', title, 'applications', n)
+                                   ORDER BY n DESC), '[]') AS top_jobs
+          FROM (
+            SELECT s.job_id, sj.title, sum(s.applications) AS n
+            FROM job_daily_stats s JOIN sj ON sj.id = s.job_id
+            GROUP BY s.job_id, sj.title
+            HAVING sum(s.applications) > 0
+            ORDER BY n DESC
+            LIMIT 5
+          ) t
+        ) tj
+        """),
+        params
+    ).mappings().one()
 
+    # 2) latest applications, kept as typed rows
     recent_q = (
         db.query(
             models.Application.id,
@@ -80,66 +92,19 @@ def company_summary(db: Session = Depends(get_db), user=Depends(get_current_user
         for r in recent_q.all()
     ]
 
-    top_q = (
-        db.query(
-            models.Application.job_id,
-            models.Job.title,
-            func.count(models.Application.id).label("apps"),
-        )
-        .join(models.Job, models.Job.id == models.Application.job_id)
-        .group_by(models.Application.job_id, models.Job.title)
-        .order_by(func.count(models.Application.id).desc())
-        .limit(5)
-    )
-    if owner_id:
-        top_q = top_q.filter(models.Job.owner_user_id == owner_id)
-    top_jobs = [{"job_id": r.job_id, "title": r.title, "applications": int(r.apps)} for r in top_q.all()]
+    jobs, open_jobs, applications = row["jobs"], row["open_jobs"], row["applications"]
+    avg_score = float(row["score_sum"]) / row["score_count"] if row["score_count"] else None
+    by_status = analytics_rollups.by_status(db, row, owner_id)
+    top_jobs = [{"job_id": t["job_id"], "title": t["title"], "applications": int(t["applications"])}
+                for t in row["top_jobs"]]
 
-    scope_sql = ""
-    params = {}
-    if owner_id:
-        scope_sql = "JOIN jobs j ON j.id = a.job_id AND j.owner_user_id = :owner_id"
-        params["owner_id"] = owner_id
+    since = row["today"] - timedelta(days=29)
+    trend_30d = []
+    for i in range(30):
+        d = (since + timedelta(days=i)).isoformat()
+        trend_30d.append({"date": d, "applications": int(row["trend"].get(d, 0))})
 
-    trend_rows = db.execute(
-        text(f"""
-        WITH series AS (
-          SELECT (generate_series(current_date - interval '29 days', current_date, interval '1 day'))::date AS d
-        )
-        SELECT s.d::text AS date, COALESCE(COUNT(a.id), 0) AS applications
-        FROM series s
-        LEFT JOIN applications a
-          ON date_trunc('day', a.applied_at) = s.d
-        {scope_sql}
-        GROUP BY s.d
-        ORDER BY s.d
-        """),
-        params
-    ).mappings().all()
-    trend_30d = [{"date": r["date"], "applications": int(r["applications"])} for r in trend_rows]
-
-    bin_expr = case(
-        (models.Application.score < 20, 0),
-        (models.Application.score < 40, 20),
-        (models.Application.score < 60, 40),
-        (models.Application.score < 80, 60),
-        else_=80
-    ).label("bin")
-    hist_q = (
-        db.query(bin_expr, func.count(models.Application.id))
-        .select_from(models.Application)
-        .join(models.Job, models.Job.id == models.Application.job_id)
-        .filter(models.Application.score.isnot(None))
-        .group_by("bin")
-    )
-    if owner_id:
-        hist_q = hist_q.filter(models.Job.owner_user_id == owner_id)
-    hist_rows = hist_q.all()
-    bins = [0,20,40,60,80,100]
-    counts_map = {b:0 for b in bins[:-1]}
-    for b,c in hist_rows:
-        counts_map[int(b)] = int(c)
-    score_histogram = {"bins": bins, "counts": [counts_map[b] for b in bins[:-1]] + [0]}
+    score_histogram = {"bins": analytics_rollups.BINS, "counts": analytics_rollups.histogram_counts(row) + [0]}
 
     return {
         "jobs": int(jobs),
@@ -240,3 +205,58 @@ def company_job_apps(
         }
         for r in rows
     ]
+
+@router.post("/jobs/{job_id}/rank")
+def rank_job_applications(
+    job_id: int,
+    rerank_top: int = 100,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Rescore every applicant of the job in one vectorized pass (cross-encoder
+    rerank of the best `rerank_top`), persist the scores, return them ranked.
+    """
+    _ensure_company_or_admin(user)
+
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if not user.is_admin and job.owner_user_id != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden.")
+
+    return rank_applicants(db, job, rerank_top=max(0, min(rerank_top, 1000)))
+
+@router.get("/jobs/{job_id}/explanations")
+def explain_job_applications(
+    job_id: int,
+    application_ids: List[int] = Query(default=[]),
+    top_k: int = 3,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Best-matching CV chunks per job field (missions, skills,
+    profile_requirements) for up to 50 applications. Without
+    `application_ids`, explains the job's 50 best-scored applications.
+    """
+    _ensure_company_or_admin(user)
+
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if not user.is_admin and job.owner_user_id != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden.")
+    if len(application_ids) > MAX_EXPLAIN_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EXPLAIN_ROWS} applications per request.")
+
+    if not application_ids:
+        A = models.Application
+        application_ids = [
+            r.id for r in db.query(A.id)
+            # scored only: Postgres sorts NULLs first in DESC, they would fill the window
+            .filter(A.job_id == job_id, A.score.isnot(None))
+            .order_by(*SORT_MAP["score_desc"])
+            .limit(MAX_EXPLAIN_ROWS)
+        ]
+    return explain_applications(db, job, application_ids, top_k=max(1, min(top_k, 10)))
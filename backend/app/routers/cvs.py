@@ -1,14 +1,16 @@
 # backend/app/routers/cvs.py
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..deps import get_current_user
 from .. import models
-import os, uuid, shutil
+from ..services import cv_store, recommendations
+import os, uuid, logging
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/cvs", tags=["cvs"])
 UPLOAD_DIR = os.getenv("CV_UPLOAD_DIR", "uploads/cv")
+logger = logging.getLogger("smartrecruit")
 
 def _is_pdf(upload: UploadFile) -> bool:
     # 1) extension
@@ -30,6 +32,7 @@ def _is_pdf(upload: UploadFile) -> bool:
 
 @router.post("", response_model=dict)
 def upload_cv(
+    background: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
@@ -42,11 +45,23 @@ def upload_cv(
     dst = os.path.join(UPLOAD_DIR, fname)
 
     with open(dst, "wb") as out:
-        shutil.copyfileobj(file.file, out)
+        content_hash = cv_store.copy_and_hash(file.file, out)
 
     cv = models.CV(user_id=user.id, file_path=dst)
     cv.uploaded_at = datetime.now(tz=timezone.utc)  # ensure not None
-    db.add(cv); db.commit(); db.refresh(cv)
+    db.add(cv)
+    # extract once per distinct file; identical re-uploads reuse the stored text
+    try:
+        cv_store.ingest(db, cv, content_hash)
+    except Exception as e:
+        logger.warning("cv_extract_failed", extra={"file_path": dst}, exc_info=e)
+        if not db.is_active:
+            # failed flush: keep the CV row unlinked, its text is extracted on first use
+            db.rollback()
+            cv.content_hash = None
+            db.add(cv)
+    db.commit(); db.refresh(cv)
+    background.add_task(recommendations.rebuild_feed, user.id)
     return {"id": cv.id, "file_path": cv.file_path, "uploaded_at": cv.uploaded_at.isoformat() if cv.uploaded_at else None}
 
 @router.get("", response_model=list[dict])
@@ -1,55 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional, Tuple, Union
+from datetime import datetime
 from .. import models, schemas
 from ..deps import get_db, get_current_user
+from ..services.job_embeddings import refresh_job_embedding, remove_from_index
+from ..services import analytics_rollups, job_search, recommendations
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
-@router.get("", response_model=List[schemas.JobOut])
-def list_jobs(status: Optional[str] = "published", db: Session = Depends(get_db)):
-    jobs = db.query(models.Job).filter(models.Job.status == status).order_by(models.Job.posted_at.desc()).all()
+# Listing columns only (no long text); GET /jobs?view=card
+_CARD_COLUMNS = [getattr(models.Job, f) for f in schemas.JobCard.model_fields]
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def _encode_cursor(posted_at: datetime, job_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{posted_at.isoformat()}|{job_id}".encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        posted_at, job_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(posted_at), int(job_id)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+@router.get("", response_model=List[Union[schemas.JobOut, schemas.JobCard]])
+def list_jobs(
+    response: Response,
+    status: Optional[str] = "published",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    view: Literal["full", "card"] = "full",
+    location_city: Optional[str] = None,
+    work_mode: Optional[str] = None,
+    employment_type: Optional[str] = None,
+    salary_min: Optional[int] = None,
+    salary_max: Optional[int] = None,
+    skills: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Newest first, keyset-paginated on (posted_at, id): pass the X-Next-Cursor
+    header of a page as `cursor` to get the next one. `limit` defaults to 20
+    and is capped at MAX_PAGE_SIZE; the last page has no X-Next-Cursor.
+    """
+    q = db.query(*_CARD_COLUMNS) if view == "card" else db.query(models.Job)
+    q = q.filter(models.Job.status == status)
+    if location_city:
+        q = q.filter(func.lower(models.Job.location_city) == location_city.strip().lower())
+    if work_mode:
+        q = q.filter(models.Job.work_mode == work_mode)
+    if employment_type:
+        q = q.filter(models.Job.employment_type == employment_type)
+    if salary_min is not None or salary_max is not None:
+        # salary ranges that overlap the requested one; confidential salaries never match
+        q = q.filter(models.Job.salary_is_confidential.is_(False))
+        if salary_min is not None:
+            q = q.filter(func.coalesce(models.Job.salary_max, models.Job.salary_min) >= salary_min)
+        if salary_max is not None:
+            q = q.filter(func.coalesce(models.Job.salary_min, models.Job.salary_max) <= salary_max)
+    for skill in skills or []:
+        q = q.filter(models.Job.skills.contains([skill]))
+    if cursor:
+        posted_at, job_id = _decode_cursor(cursor)
+        q = q.filter(tuple_(models.Job.posted_at, models.Job.id) < tuple_(posted_at, job_id))
+    q = q.order_by(models.Job.posted_at.desc(), models.Job.id.desc())
+
+    page_size = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = q.limit(page_size + 1).all()
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].posted_at, rows[-1].id)
+
+    if view == "card":
+        return [{**r._asdict(), "skills": r.skills if isinstance(r.skills, list) else []} for r in rows]
     # Convert to list of dicts to handle JSONB serialization
-    result = []
-    for job in jobs:
-        job_dict = {
-            'id': job.id,
-            'title': job.title,
-            'company_name': job.company_name,
-            'company_logo_url': job.company_logo_url,
-            'location_city': job.location_city,
-            'location_country': job.location_country,
-            'experience_min': job.experience_min,
-            'employment_type': job.employment_type,
-            'work_mode': job.work_mode,
-            'salary_min': job.salary_min,
-            'salary_max': job.salary_max,
-            'salary_currency': job.salary_currency,
-            'salary_is_confidential': job.salary_is_confidential,
-            'education_level': job.education_level,
-            'company_overview': job.company_overview,
-            'offer_description': job.offer_description,
-            'missions': job.missions if isinstance(job.missions, list) else [],
-            'profile_requirements': job.profile_requirements,
-            'skills': job.skills if isinstance(job.skills, list) else [],
-            'description': job.description,
-            'deadline': job.deadline,
-            'status': job.status,
-            'posted_at': job.posted_at,
-            'updated_at': job.updated_at,
-            'created_at': job.created_at,
-            'owner_user_id': job.owner_user_id,
-        }
-        result.append(job_dict)
-    return result
+    return [_job_dict(job) for job in rows]
 
-@router.get("/{job_id}", response_model=schemas.JobOut)
-def get_job(job_id: int, db: Session = Depends(get_db)):
-    job = db.query(models.Job).get(job_id)
-    if not job:
-        raise HTTPException(404, "Job not found")
-    # Convert to dict to handle JSONB serialization
-    job_dict = {
+def _job_dict(job: models.Job) -> dict:
+    return {
         'id': job.id,
         'title': job.title,
         'company_name': job.company_name,
@@ -77,10 +109,32 @@ def get_job(job_id: int, db: Session = Depends(get_db)):
         'created_at': job.created_at,
         'owner_user_id': job.owner_user_id,
     }
-    return job_dict
+
+# declared before /{job_id} so "search" is not parsed as an id
+@router.get("/search", response_model=List[schemas.JobOut])
+def search_jobs(q: str, limit: int = 20, db: Session = Depends(get_db)):
+    """Published jobs matching `q`: BM25 and embedding rankings fused with RRF."""
+    if not q.strip():
+        return []
+    hits = job_search.search_jobs(db, q, limit=max(1, min(limit, 100)))
+    jobs = {j.id: j for j in db.query(models.Job).filter(models.Job.id.in_([i for i, _ in hits])).all()}
+    return [_job_dict(jobs[i]) for i, _ in hits if i in jobs and jobs[i].status == "published"]
+
+@router.get("/recommended", response_model=List[schemas.JobOut])
+def recommended_jobs(limit: int = 20, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """Published jobs best matching the caller's current CV, read from their precomputed feed."""
+    limit = max(1, min(limit, recommendations.RECOMMEND_FEED_SIZE))
+    return [_job_dict(j) for j in recommendations.get_recommended(db, user.id, limit=limit)]
+
+@router.get("/{job_id}", response_model=schemas.JobOut)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(models.Job).get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return _job_dict(job)
 
 @router.post("", response_model=schemas.JobOut)
-def create_job(payload: schemas.JobCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def create_job(payload: schemas.JobCreate, background: BackgroundTasks, db: Session = Depends(get_db), user=Depends(get_current_user)):
     from datetime import datetime
     # only company or admin
     if not (user.is_admin or getattr(user, "account_type", None) == "company"):
@@ -100,39 +154,14 @@ def create_job(payload: schemas.JobCreate, db: Session = Depends(get_db), user=D
     db.add(job)
     db.commit()
     db.refresh(job)
-    # Convert back to dict and then to JobOut to handle JSONB serialization
-    job_dict = {
-        'id': job.id,
-        'title': job.title,
-        'company_name': job.company_name,
-        'company_logo_url': job.company_logo_url,
-        'location_city': job.location_city,
-        'location_country': job.location_country,
-        'experience_min': job.experience_min,
-        'employment_type': job.employment_type,
-        'work_mode': job.work_mode,
-        'salary_min': job.salary_min,
-        'salary_max': job.salary_max,
-        'salary_currency': job.salary_currency,
-        'salary_is_confidential': job.salary_is_confidential,
-        'education_level': job.education_level,
-        'company_overview': job.company_overview,
-        'offer_description': job.offer_description,
-        'missions': job.missions if isinstance(job.missions, list) else [],
-        'profile_requirements': job.profile_requirements,
-        'skills': job.skills if isinstance(job.skills, list) else [],
-        'description': job.description,
-        'deadline': job.deadline,
-        'status': job.status,
-        'posted_at': job.posted_at,
-        'updated_at': job.updated_at,
-        'created_at': job.created_at,
-        'owner_user_id': job.owner_user_id,
-    }
-    return job_dict
+    # embed off the request path (see services/job_embeddings.py)
+    background.add_task(refresh_job_embedding, job.id)
+    background.add_task(recommendations.apply_job_change, job.id)
+    job_search.index_job(job)
+    return _job_dict(job)
 
 @router.patch("/{job_id}", response_model=schemas.JobOut)
-def update_job(job_id: int, payload: schemas.JobUpdate, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def update_job(job_id: int, payload: schemas.JobUpdate, background: BackgroundTasks, db: Session = Depends(get_db), user=Depends(get_current_user)):
     job = db.query(models.Job).get(job_id)
     if not job:
         raise HTTPException(404, "Job not found")
@@ -142,45 +171,24 @@ def update_job(job_id: int, payload: schemas.JobUpdate, db: Session = Depends(ge
     data = payload.model_dump(exclude_unset=True)
     for k, v in data.items():
         setattr(job, k, v)
+    job.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(job)
-    # Return serialized dict to handle JSONB
-    job_dict = {
-        'id': job.id,
-        'title': job.title,
-        'company_name': job.company_name,
-        'company_logo_url': job.company_logo_url,
-        'location_city': job.location_city,
-        'location_country': job.location_country,
-        'experience_min': job.experience_min,
-        'employment_type': job.employment_type,
-        'work_mode': job.work_mode,
-        'salary_min': job.salary_min,
-        'salary_max': job.salary_max,
-        'salary_currency': job.salary_currency,
-        'salary_is_confidential': job.salary_is_confidential,
-        'education_level': job.education_level,
-        'company_overview': job.company_overview,
-        'offer_description': job.offer_description,
-        'missions': job.missions if isinstance(job.missions, list) else [],
-        'profile_requirements': job.profile_requirements,
-        'skills': job.skills if isinstance(job.skills, list) else [],
-        'description': job.description,
-        'deadline': job.deadline,
-        'status': job.status,
-        'posted_at': job.posted_at,
-        'updated_at': job.updated_at,
-        'created_at': job.created_at,
-        'owner_user_id': job.owner_user_id,
-    }
-    return job_dict
+    background.add_task(refresh_job_embedding, job.id)
+    background.add_task(recommendations.apply_job_change, job.id)
+    job_search.index_job(job)
+    return _job_dict(job)
 
 @router.delete("/{job_id}", status_code=204)
-def delete_job(job_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def delete_job(job_id: int, background: BackgroundTasks, db: Session = Depends(get_db), user=Depends(get_current_user)):
     job = db.query(models.Job).get(job_id)
     if not job:
         raise HTTPException(404, "Job not found")
     if not (user.is_admin or job.owner_user_id == user.id):
         raise HTTPException(403, "Not allowed")
+    analytics_rollups.job_deleted(db, job)
     db.delete(job)
     db.commit()
+    remove_from_index(job_id)
+    job_search.remove_job(job_id)
+    background.add_task(recommendations.apply_job_change, job_id)
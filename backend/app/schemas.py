@@ -122,6 +122,26 @@ class JobOut(JobBase):
             data.skills = json.loads(data.skills)
         return data
 
+class JobCard(BaseModel):
+    """Listing projection of a job: no long text columns."""
+    id: int
+    title: str
+    company_name: Optional[str] = None
+    company_logo_url: Optional[str] = None
+    location_city: Optional[str] = None
+    location_country: Optional[str] = None
+    experience_min: Optional[str] = None
+    employment_type: Optional[str] = None
+    work_mode: Optional[str] = None
+    salary_min: Optional[int] = None
+    salary_max: Optional[int] = None
+    salary_currency: Optional[str] = None
+    salary_is_confidential: bool = False
+    skills: List[str] = Field(default_factory=list)
+    deadline: Optional[date] = None
+    status: Status = "published"
+    posted_at: datetime
+
 from typing import Literal
 
 # Applications
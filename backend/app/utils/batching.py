@@ -0,0 +1,104 @@
+# app/utils/batching.py
+from __future__ import annotations
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+logger = logging.getLogger("smartrecruit")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects items submitted from many threads and runs `fn` once per batch.
+
+    A batch is flushed when `max_batch_size` items are waiting or `max_wait_ms`
+    has elapsed since its first item arrived, whichever comes first. Each
+    caller gets its own Future; if `fn` raises or returns a result count that
+    does not match the batch, every future of that batch receives the error.
+    `run` waits at most `timeout_sec` (None = forever).
+
+    Meant for FastAPI sync endpoints, which run concurrently on the threadpool:
+    N concurrent `cross.predict([(a, b)])` calls become one predict over N pairs.
+    """
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+        timeout_sec: float | None = 30.0,
+    ):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.timeout_sec = timeout_sec
+        self._q: "queue.Queue[Tuple[T, Future]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item: T) -> "Future[R]":
+        fut: Future = Future()
+        self._ensure_started()
+        self._q.put((item, fut))
+        return fut
+
+    def run(self, item: T, timeout: float | None = None) -> R:
+        """Submit and wait for this item's result; concurrent.futures.TimeoutError after the timeout."""
+        return self.submit(item).result(timeout if timeout is not None else self.timeout_sec)
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=left))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[T, Future]]) -> None:
+        live = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            results = self.fn([item for item, _ in live])
+            if len(results) != len(live):
+                raise ValueError(f"{self.name}: {len(results)} results for a batch of {len(live)}")
+        except Exception as e:
+            logger.warning("micro_batch_failed", extra={"batcher": self.name, "size": len(live)}, exc_info=e)
+            for _, fut in live:
+                fut.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(live)
+        for (_, fut), res in zip(live, results):
+            fut.set_result(res)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "queued": self._q.qsize(),
+        }
@@ -0,0 +1,181 @@
+# app/utils/calibration.py
+"""
+Score calibration: raw model outputs -> probability of acceptance.
+
+Inputs are the raw bi-encoder cosine in [-1, 1] and the raw cross-encoder
+logit (None when the cross-encoder is off). A fitted calibration is
+
+    z = coef_cos * cos + coef_cross * logit + bias     (Platt / logistic fit)
+    p = np.interp(z, x, y)                             (monotone in z)
+
+where (x, y) is either the sigmoid sampled on a grid ("platt") or an
+isotonic regression of the decisions on z ("isotonic"). Applying it is one
+multiply-add and one np.interp over the whole batch.
+
+Fits live in CALIBRATION_DIR/<scorer>/v<N>.json, one directory per scorer
+(bi + cross model ids) since raw scores are not comparable across models.
+Without a fit the fixed blend 0.7 * sigmoid(logit) + 0.3 * (cos + 1) / 2 is
+used.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+
+CALIBRATION_DIR = os.getenv("CALIBRATION_DIR", "models/calibration")
+# "" = latest fit for the scorer, "off" = fixed blend, "v3" = pin a version
+CALIBRATION_VERSION = os.getenv("CALIBRATION_VERSION", "").strip().lower()
+CROSS_WEIGHT = 0.7  # fixed blend
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+def default_blend(cos, cross_logit=None) -> np.ndarray:
+    """Uncalibrated score in [0,1]; the cosine is mapped to [0,1] before blending."""
+    bi = np.clip((np.asarray(cos, dtype=np.float64) + 1.0) / 2.0, 0.0, 1.0)
+    if cross_logit is None:
+        return bi
+    cross = _sigmoid(np.asarray(cross_logit, dtype=np.float64))
+    return np.clip(CROSS_WEIGHT * cross + (1.0 - CROSS_WEIGHT) * bi, 0.0, 1.0)
+
+def blend(cos, cross_logit=None, cal: "Calibration | None" = None) -> np.ndarray:
+    """Final score: `cal` when given and it has the inputs it was fit on, else the fixed blend."""
+    if cal is None or (cross_logit is None and cal.coef_cross):
+        return default_blend(cos, cross_logit)
+    return cal.apply(cos, cross_logit)
+
+
+class Calibration:
+    def __init__(self, version: str, scorer: str, method: str, coef_cos: float, coef_cross: float,
+                 bias: float, x, y, meta: Optional[Dict] = None):
+        self.version = version
+        self.scorer = scorer
+        self.method = method
+        self.coef_cos = float(coef_cos)
+        self.coef_cross = float(coef_cross)
+        self.bias = float(bias)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.meta = meta or {}
+
+    def linear(self, cos, cross_logit=None) -> np.ndarray:
+        z = self.coef_cos * np.asarray(cos, dtype=np.float64) + self.bias
+        if cross_logit is not None and self.coef_cross:
+            z = z + self.coef_cross * np.asarray(cross_logit, dtype=np.float64)
+        return z
+
+    def apply(self, cos, cross_logit=None) -> np.ndarray:
+        return np.interp(self.linear(cos, cross_logit), self.x, self.y)
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version, "scorer": self.scorer, "method": self.method,
+            "coef": {"cos": self.coef_cos, "cross": self.coef_cross, "bias": self.bias},
+            "x": self.x.tolist(), "y": self.y.tolist(), **self.meta,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Calibration":
+        meta = {k: v for k, v in d.items() if k not in {"version", "scorer", "method", "coef", "x", "y"}}
+        c = d["coef"]
+        return cls(d["version"], d["scorer"], d["method"], c["cos"], c["cross"], c["bias"], d["x"], d["y"], meta)
+
+# ---- Fitting (offline, see calibrate.py) ----
+def _isotonic_points(z: np.ndarray, labels: np.ndarray):
+    from sklearn.isotonic import IsotonicRegression
+
+    iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(z, labels)
+    x, y = iso.X_thresholds_, iso.y_thresholds_
+    # keep only the ends of flat runs; np.interp is identical
+    keep = np.ones(len(y), dtype=bool)
+    keep[1:-1] = (y[1:-1] != y[:-2]) | (y[1:-1] != y[2:])
+    return x[keep], y[keep]
+
+def fit(cos, cross_logit, labels, method: str = "isotonic", scorer: str = "") -> Calibration:
+    """
+    Fit on historical decisions (labels: 1 accepted, 0 rejected). The
+    logistic fit learns the cos / logit weighting; "isotonic" then replaces
+    its sigmoid with a monotone step fit on the same linear score.
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    labels = np.asarray(labels, dtype=np.int64)
+    if len(labels) < 20 or labels.min() == labels.max():
+        raise ValueError("need at least 20 decisions including both accepted and rejected")
+    cols = [np.asarray(cos, dtype=np.float64)]
+    if cross_logit is not None:
+        cols.append(np.asarray(cross_logit, dtype=np.float64))
+    X = np.stack(cols, axis=1)
+    lr = LogisticRegression(C=1.0).fit(X, labels)
+    coef_cos = float(lr.coef_[0, 0])
+    coef_cross = float(lr.coef_[0, 1]) if cross_logit is not None else 0.0
+    bias = float(lr.intercept_[0])
+    z = X @ lr.coef_[0] + bias
+
+    if method == "platt":
+        x = np.linspace(z.min() - 1.0, z.max() + 1.0, 256)
+        y = _sigmoid(x)
+    elif method == "isotonic":
+        x, y = _isotonic_points(z, labels)
+    else:
+        raise ValueError(f"Unknown calibration method: {method}")
+    meta = {
+        "n": int(len(labels)),
+        "positives": int(labels.sum()),
+        "fitted_at": datetime.now(timezone.utc).isoformat(),
+    }
+    return Calibration("", scorer, method, coef_cos, coef_cross, bias, x, y, meta)
+
+def brier(p, labels) -> float:
+    return float(np.mean((np.asarray(p, dtype=np.float64) - np.asarray(labels, dtype=np.float64)) ** 2))
+
+# ---- Storage ----
+def _scorer_dir(scorer: str) -> str:
+    return os.path.join(CALIBRATION_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "__", scorer))
+
+def _versions(scorer: str) -> Dict[int, str]:
+    d = _scorer_dir(scorer)
+    if not os.path.isdir(d):
+        return {}
+    out = {}
+    for name in os.listdir(d):
+        m = re.fullmatch(r"v(\d+)\.json", name)
+        if m:
+            out[int(m.group(1))] = os.path.join(d, name)
+    return out
+
+def save(cal: Calibration) -> str:
+    """Write `cal` as the next version for its scorer; returns the path."""
+    d = _scorer_dir(cal.scorer)
+    os.makedirs(d, exist_ok=True)
+    cal.version = f"v{max(_versions(cal.scorer), default=0) + 1}"
+    path = os.path.join(d, f"{cal.version}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(cal.to_dict(), f)
+    os.replace(path + ".tmp", path)
+    return path
+
+_lock = threading.Lock()
+_loaded: Dict[str, Optional[Calibration]] = {}
+
+def get(scorer: str) -> Optional[Calibration]:
+    """Calibration for `scorer` per CALIBRATION_VERSION, loaded once per process (None = fixed blend)."""
+    with _lock:
+        if scorer not in _loaded:
+            cal = None
+            if CALIBRATION_VERSION not in {"off", "none", "false", "0"}:
+                versions = _versions(scorer)
+                if CALIBRATION_VERSION:
+                    path = versions.get(int(CALIBRATION_VERSION.lstrip("v") or 0))
+                else:
+                    path = versions[max(versions)] if versions else None
+                if path:
+                    with open(path) as f:
+                        cal = Calibration.from_dict(json.load(f))
+            _loaded[scorer] = cal
+        return _loaded[scorer]
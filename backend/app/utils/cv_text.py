@@ -2,7 +2,7 @@
 Text extraction utilities for CV/resume processing
 """
 import os
-from typing import str
+from typing import Optional, Tuple
 from pypdf import PdfReader
 from docx import Document
 
@@ -41,12 +41,31 @@ def extract_text_from_file(file_path: str) -> str:
         raise Exception(f"Failed to extract text from {file_path}: {str(e)}")
 
 
-def _extract_pdf_text(file_path: str) -> str:
-    """Extract text from PDF file"""
-    reader = PdfReader(file_path)
+def extract_document(file_path: str, max_pages: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Extract text and page count in a single parse
+
+    Args:
+        file_path: Path to the file
+        max_pages: Only read the first `max_pages` pages of a PDF (None = all)
+
+    Returns:
+        (text, page_count); page_count is the full PDF page count, 1 for DOCX/TXT
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    if file_path.lower().endswith('.pdf'):
+        reader = PdfReader(file_path)
+        return _pdf_pages_text(reader, max_pages), len(reader.pages)
+    return extract_text_from_file(file_path), 1
+
+
+def _pdf_pages_text(reader: PdfReader, max_pages: Optional[int] = None) -> str:
     text_parts = []
 
-    for page in reader.pages:
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    for page in pages:
         page_text = page.extract_text()
         if page_text:
             text_parts.append(page_text)
@@ -54,6 +73,11 @@ def _extract_pdf_text(file_path: str) -> str:
     return "\n".join(text_parts)
 
 
+def _extract_pdf_text(file_path: str) -> str:
+    """Extract text from PDF file"""
+    return _pdf_pages_text(PdfReader(file_path))
+
+
 def _extract_docx_text(file_path: str) -> str:
     """Extract text from DOCX file"""
     doc = Document(file_path)
@@ -0,0 +1,233 @@
+# app/utils/extract_pool.py
+"""
+PDF/DOCX text extraction in a process pool.
+
+pypdf / python-docx are pure Python and hold the GIL, so parsing inside a
+sync FastAPI handler stalls every other request on the worker. Here each
+document is parsed in a child process with:
+
+- a wall-clock timeout (SIGALRM in the child, plus a hard kill of the pool
+  from the parent if the child stops responding; the parent times each
+  document from the moment the child reports it started, not from when it
+  was queued),
+- a page cap (only the first `max_pages` pages are read),
+- an address-space ceiling per child (RLIMIT_AS), so a decompression bomb
+  fails with MemoryError instead of taking the API worker down.
+
+A crashed or killed child only fails its own document; the pool is rebuilt.
+"""
+from __future__ import annotations
+import logging
+import multiprocessing
+import itertools
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("smartrecruit")
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_TIMEOUT_SEC = float(os.getenv("EXTRACT_TIMEOUT_SEC", "20"))
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "30"))
+EXTRACT_MAX_MEMORY_MB = int(os.getenv("EXTRACT_MAX_MEMORY_MB", "512"))
+# extra time the parent grants before assuming the child is wedged
+_KILL_GRACE_SEC = 5.0
+
+
+class Extracted(NamedTuple):
+    path: str
+    text: str = ""
+    page_count: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# ---- Child side ----
+_started_q: Any = None  # SimpleQueue: task tokens, put when a child starts on them
+
+def _init_child(max_memory_mb: int, started_q: Any = None) -> None:
+    global _started_q
+    _started_q = started_q
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass  # not supported on this platform
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("extraction timed out")
+
+
+def _extract_in_child(path: str, max_pages: int, timeout_sec: float, token: Optional[int] = None) -> Extracted:
+    from app.utils.cv_text import extract_document
+
+    if token is not None and _started_q is not None:
+        _started_q.put(token)  # SimpleQueue: written to the pipe now, no feeder thread
+    has_alarm = hasattr(signal, "setitimer")
+    if has_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout_sec)
+    try:
+        text, pages = extract_document(path, max_pages=max_pages)
+        return Extracted(path, text, pages)
+    except MemoryError:
+        return Extracted(path, error="MemoryError: memory ceiling exceeded")
+    except Exception as e:
+        return Extracted(path, error=f"{type(e).__name__}: {e}")
+    finally:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ---- Parent side ----
+class ExtractionExecutor:
+    def __init__(
+        self,
+        max_workers: int = EXTRACT_WORKERS,
+        timeout_sec: float = EXTRACT_TIMEOUT_SEC,
+        max_pages: int = EXTRACT_MAX_PAGES,
+        max_memory_mb: int = EXTRACT_MAX_MEMORY_MB,
+        max_tasks_per_child: int = 100,
+    ):
+        self.max_workers = max_workers
+        self.timeout_sec = timeout_sec
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.max_tasks_per_child = max_tasks_per_child
+        self._pool: ProcessPoolExecutor | None = None
+        self._started_q: Any = None  # belongs to _pool
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> Tuple[ProcessPoolExecutor, Any]:
+        """(pool, queue its children report task starts on)"""
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a parent that already holds torch threads
+                ctx = multiprocessing.get_context("spawn")
+                self._started_q = ctx.SimpleQueue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=ctx,
+                    initializer=_init_child,
+                    initargs=(self.max_memory_mb, self._started_q),
+                    max_tasks_per_child=self.max_tasks_per_child,
+                )
+            return self._pool, self._started_q
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        """Kill a wedged/broken pool; the next submit builds a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        # no public API to kill running children; _processes is stable since 3.2
+        for p in list((getattr(pool, "_processes", None) or {}).values()):
+            try:
+                p.kill()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, path: str) -> Future:
+        return self._get_pool()[0].submit(_extract_in_child, path, self.max_pages, self.timeout_sec)
+
+    @staticmethod
+    def _drain(started_q: Any) -> List[int]:
+        tokens = []
+        try:
+            while not started_q.empty():
+                tokens.append(started_q.get())
+        except (OSError, EOFError):
+            pass  # pool torn down under us
+        return tokens
+
+    def extract(self, path: str) -> Extracted:
+        return next(self.extract_many([path]))
+
+    def extract_many(self, paths: Iterable[str]) -> Iterator[Extracted]:
+        """
+        Yield one Extracted per path, in completion order. Documents that were
+        merely collateral of a pool crash are resubmitted once. A document is
+        declared wedged timeout + grace after its child started on it; time
+        spent queued behind other documents does not count.
+        """
+        todo = list(paths)
+        retried: set = set()
+        while todo:
+            pool, started_q = self._get_pool()
+            futs: Dict[Future, str] = {}
+            by_token: Dict[int, Future] = {}
+            for p in todo:
+                token = next(self._tokens)
+                f = pool.submit(_extract_in_child, p, self.max_pages, self.timeout_sec, token)
+                futs[f] = p
+                by_token[token] = f
+            todo = []
+            broken = False
+            started: Dict[Future, float] = {}
+            pending = set(futs)
+            while pending:
+                done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for f in done:
+                    path = futs[f]
+                    try:
+                        yield f.result()
+                    except (BrokenProcessPool, CancelledError):
+                        broken = True
+                        if path in retried:
+                            yield Extracted(path, error="BrokenProcessPool: extraction process died")
+                        else:
+                            retried.add(path)
+                            todo.append(path)
+                now = time.monotonic()
+                for token in self._drain(started_q):
+                    f = by_token.get(token)
+                    if f is not None:
+                        started.setdefault(f, now)
+                wedged = [
+                    f for f in pending
+                    if f in started and now - started[f] > self.timeout_sec + _KILL_GRACE_SEC
+                ]
+                if wedged:
+                    logger.warning("extract_pool_killed", extra={"paths": [futs[f] for f in wedged]})
+                    for f in wedged:
+                        retried.add(futs[f])
+                        pending.discard(f)
+                        yield Extracted(futs[f], error="TimeoutError: extraction process killed")
+                    self._recycle(pool)
+                    for f in pending:
+                        if futs[f] not in retried:
+                            retried.add(futs[f])
+                            todo.append(futs[f])
+                        else:
+                            yield Extracted(futs[f], error="BrokenProcessPool: extraction process died")
+                    pending = set()
+            if broken:
+                self._recycle(pool)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: ExtractionExecutor | None = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ExtractionExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ExtractionExecutor()
+        return _executor
@@ -0,0 +1,121 @@
+# app/utils/inference_backend.py
+"""
+Model construction for the selected inference backend.
+
+INFERENCE_BACKEND=torch  full-precision PyTorch (default)
+INFERENCE_BACKEND=onnx   ONNX Runtime on CPU; with ONNX_QUANTIZE the model is
+                         exported once to ONNX with dynamic int8 quantization
+                         and cached under ONNX_MODEL_DIR.
+
+ONNX needs `optimum[onnxruntime]`; without it we log and fall back to torch.
+"""
+from __future__ import annotations
+import importlib.util
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict
+
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+logger = logging.getLogger("smartrecruit")
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() in {"1", "true", "yes"}
+# avx2 | avx512 | avx512_vnni | arm64 - pick the ISA of the serving nodes
+ONNX_QUANT_CONFIG = os.getenv("ONNX_QUANT_CONFIG", "avx2")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 = onnxruntime default
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+
+_export_lock = threading.Lock()
+_loaded: Dict[str, str] = {}  # model name -> tag of the backend it actually loaded with
+
+def _local_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+
+def _quantized_file() -> str:
+    return f"onnx/model_qint8_{ONNX_QUANT_CONFIG}.onnx"
+
+def _onnx_kwargs(file_name: str | None, threads: int | None = None) -> Dict[str, Any]:
+    import onnxruntime as ort
+
+    so = ort.SessionOptions()
+    threads = ONNX_INTRA_OP_THREADS if threads is None else threads
+    if threads > 0:
+        so.intra_op_num_threads = threads
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    kwargs: Dict[str, Any] = {"provider": "CPUExecutionProvider", "session_options": so}
+    if file_name:
+        kwargs["file_name"] = file_name
+    return kwargs
+
+def _load_onnx(cls, model_name: str, quantize: bool, threads: int | None = None):
+    """
+    Export (once) to `ONNX_MODEL_DIR/<model>` and load from there. The
+    quantized file is produced by sentence-transformers' dynamic int8 export.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    local = _local_dir(model_name)
+    with _export_lock:
+        if not os.path.exists(os.path.join(local, "onnx", "model.onnx")):
+            logger.info("onnx_export", extra={"model": model_name, "dir": local})
+            cls(model_name, backend="onnx").save(local)
+        if quantize and not os.path.exists(os.path.join(local, _quantized_file())):
+            logger.info("onnx_quantize", extra={"model": model_name, "config": ONNX_QUANT_CONFIG})
+            export_dynamic_quantized_onnx_model(
+                cls(local, backend="onnx"), ONNX_QUANT_CONFIG, local
+            )
+    file_name = _quantized_file() if quantize else "onnx/model.onnx"
+    return cls(local, backend="onnx", model_kwargs=_onnx_kwargs(file_name, threads))
+
+def _tag(backend: str, quantize: bool) -> str:
+    if backend != "onnx":
+        return backend
+    return f"onnx-q{ONNX_QUANT_CONFIG}" if quantize else "onnx"
+
+def _onnx_available() -> bool:
+    return all(importlib.util.find_spec(m) is not None for m in ("optimum", "onnxruntime"))
+
+def backend_tag(model_name: str) -> str:
+    """
+    Backend `model_name` runs on ("torch", "onnx", "onnx-q<config>"): the one
+    it was loaded with, or before the first load the one it would load with.
+    """
+    tag = _loaded.get(model_name)
+    if tag is not None:
+        return tag
+    if INFERENCE_BACKEND == "onnx" and not _onnx_available():
+        return "torch"
+    return _tag(INFERENCE_BACKEND, ONNX_QUANTIZE)
+
+def _load(cls, model_name: str, backend: str | None, quantize: bool | None, device: str | None = None,
+          threads: int | None = None):
+    backend = (backend or INFERENCE_BACKEND).lower()
+    quantize = ONNX_QUANTIZE if quantize is None else quantize
+    if backend == "onnx":
+        try:
+            model = _load_onnx(cls, model_name, quantize, threads)
+            _loaded[model_name] = _tag(backend, quantize)
+            return model
+        except ImportError as e:
+            logger.warning("onnx_unavailable_fallback_torch", extra={"model": model_name}, exc_info=e)
+    elif backend != "torch":
+        raise ValueError(f"Unknown INFERENCE_BACKEND: {backend}")
+    model = cls(model_name, device=device)
+    _loaded[model_name] = "torch"
+    return model
+
+# threads: ONNX intra-op threads, overriding ONNX_INTRA_OP_THREADS (read at import)
+def load_bi_encoder(
+    model_name: str, backend: str | None = None, quantize: bool | None = None, device: str | None = None,
+    threads: int | None = None,
+) -> SentenceTransformer:
+    return _load(SentenceTransformer, model_name, backend, quantize, device, threads)
+
+def load_cross_encoder(
+    model_name: str, backend: str | None = None, quantize: bool | None = None, device: str | None = None,
+    threads: int | None = None,
+) -> CrossEncoder:
+    return _load(CrossEncoder, model_name, backend, quantize, device, threads)
@@ -0,0 +1,196 @@
+# app/utils/model_registry.py
+"""
+Process-wide registry of loaded models.
+
+Every caller (nlp, ai_service, job embeddings, ranking, the scoring workers)
+gets its bi-encoder / cross-encoder from here, so a worker holds one copy of
+each (kind, model name, backend, device) no matter how many modules use it.
+Loading is double-checked under a per-key lock: concurrent first requests in
+FastAPI's threadpool wait for the one load instead of starting their own.
+
+Sharing across workers: with PRELOAD_MODELS=true the models are loaded when
+app.main is imported. Under a pre-forking server that imports the app in the
+master (`gunicorn -k uvicorn.workers.UvicornWorker --preload ...`), workers
+inherit the weights copy-on-write. `uvicorn --workers` spawns fresh
+interpreters instead, so each worker loads its own copy there.
+"""
+from __future__ import annotations
+import gc
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from app.utils.inference_backend import INFERENCE_BACKEND, load_bi_encoder, load_cross_encoder
+
+logger = logging.getLogger("smartrecruit")
+
+MODEL_DEVICE = os.getenv("MODEL_DEVICE") or None  # None = let sentence-transformers pick
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "false").lower() in {"1", "true", "yes"}
+
+_LOADERS: Dict[str, Callable[..., Any]] = {
+    "bi": load_bi_encoder,
+    "cross": load_cross_encoder,
+}
+
+
+class ModelKey(NamedTuple):
+    kind: str  # "bi" | "cross"
+    name: str
+    backend: str
+    device: str
+
+
+@dataclass
+class _Entry:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    model: Any = None
+    load_sec: float = 0.0
+    loaded_at: float = 0.0
+
+
+def _model_bytes(model: Any) -> Optional[int]:
+    """Parameter + buffer bytes of a torch-backed model; None for ONNX sessions."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except Exception:
+        inner = getattr(model, "model", None)  # CrossEncoder wraps the HF module
+        if inner is None or inner is model:
+            return None
+        return _model_bytes(inner)
+    return sum(t.numel() * t.element_size() for t in tensors) or None
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, Linux units
+    except ImportError:
+        return None
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._lock = threading.Lock()  # guards _entries only, never held while loading
+
+    def _key(self, kind: str, name: str, backend: str | None, device: str | None) -> ModelKey:
+        if kind not in _LOADERS:
+            raise ValueError(f"Unknown model kind: {kind}")
+        backend = (backend or INFERENCE_BACKEND).lower()
+        if backend == "onnx":
+            device = "cpu"  # CPUExecutionProvider only
+        return ModelKey(kind, name, backend, device or MODEL_DEVICE or "auto")
+
+    def _entry(self, key: ModelKey) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    def get(self, kind: str, name: str, backend: str | None = None, device: str | None = None) -> Any:
+        key = self._key(kind, name, backend, device)
+        entry = self._entry(key)
+        model = entry.model
+        if model is not None:
+            return model
+        with entry.lock:
+            if entry.model is None:
+                t0 = time.perf_counter()
+                entry.model = _LOADERS[kind](
+                    name, backend=key.backend, device=None if key.device == "auto" else key.device
+                )
+                entry.load_sec = time.perf_counter() - t0
+                entry.loaded_at = time.time()
+                logger.info("model_loaded", extra={"model": name, "kind": kind, "backend": key.backend,
+                                                   "device": key.device, "load_sec": round(entry.load_sec, 3)})
+            return entry.model
+
+    def bi_encoder(self, name: str, backend: str | None = None, device: str | None = None):
+        return self.get("bi", name, backend, device)
+
+    def cross_encoder(self, name: str, backend: str | None = None, device: str | None = None):
+        return self.get("cross", name, backend, device)
+
+    def is_loaded(self, kind: str, name: str, backend: str | None = None, device: str | None = None) -> bool:
+        with self._lock:
+            entry = self._entries.get(self._key(kind, name, backend, device))
+        return entry is not None and entry.model is not None
+
+    def load_sec(self, kind: str, name: str, backend: str | None = None, device: str | None = None) -> float:
+        """Wall time of the load that produced the current model (0 if not loaded)."""
+        with self._lock:
+            entry = self._entries.get(self._key(kind, name, backend, device))
+        return round(entry.load_sec, 4) if entry is not None and entry.model is not None else 0.0
+
+    def unload(self, kind: str, name: str, backend: str | None = None, device: str | None = None) -> bool:
+        """
+        Drop the registry's reference. Callers still holding the object keep
+        it alive until they let go; the next get() loads a fresh copy.
+        """
+        key = self._key(kind, name, backend, device)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None or entry.model is None:
+            return False
+        with entry.lock:
+            entry.model = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        logger.info("model_unloaded", extra={"model": name, "kind": kind})
+        return True
+
+    def unload_all(self) -> int:
+        with self._lock:
+            keys = list(self._entries)
+        return sum(self.unload(*k) for k in keys)
+
+    def memory_report(self) -> Dict[str, Any]:
+        with self._lock:
+            items = [(k, e) for k, e in self._entries.items() if e.model is not None]
+        models: List[Dict[str, Any]] = [
+            {
+                **k._asdict(),
+                "bytes": _model_bytes(e.model),
+                "load_sec": round(e.load_sec, 3),
+                "loaded_at": e.loaded_at,
+            }
+            for k, e in items
+        ]
+        return {
+            "models": models,
+            "model_bytes": sum(m["bytes"] or 0 for m in models),
+            "rss_bytes": _rss_bytes(),
+            "pid": os.getpid(),
+        }
+
+    def preload(self, specs: List[tuple]) -> None:
+        """
+        Load `specs` ([(kind, name), ...]) and move everything allocated so far
+        to the permanent GC generation, so the collector in forked children
+        does not write to (and thereby copy) the inherited pages. No inference
+        runs here: starting torch's thread pools before fork() can deadlock
+        the children.
+        """
+        for kind, name in specs:
+            self.get(kind, name)
+        gc.collect()
+        gc.freeze()
+
+
+registry = ModelRegistry()
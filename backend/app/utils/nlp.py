@@ -1,7 +1,7 @@
 # app/utils/nlp.py
 from __future__ import annotations
 import os
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from pydantic import BaseModel
 from pypdf import PdfReader
 from docx import Document
@@ -9,30 +9,42 @@ from docx import Document
 import numpy as np
 from sentence_transformers import SentenceTransformer, CrossEncoder, util
 
+from app.utils import calibration
+from app.utils.batching import MicroBatcher
+from app.utils.model_registry import registry
+
 # ==== Request body passthrough used in applications router ====
 class BaseModelLike(BaseModel):
     pass
 
-# ---- Model loading (singletons) ----
+# ---- Model loading (shared registry) ----
 # Fast and good: all-MiniLM-L6-v2 (384-dim). You can switch via env if you want.
 BI_ENCODER_MODEL_NAME = os.getenv("BI_ENCODER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 CROSS_ENCODER_MODEL_NAME = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
 USE_CROSS_ENCODER = os.getenv("USE_CROSS_ENCODER", "true").lower() in {"1", "true", "yes"}
 
-_bi_encoder: SentenceTransformer | None = None
-_cross_encoder: CrossEncoder | None = None
-
 def _get_bi_encoder() -> SentenceTransformer:
-    global _bi_encoder
-    if _bi_encoder is None:
-        _bi_encoder = SentenceTransformer(BI_ENCODER_MODEL_NAME)
-    return _bi_encoder
+    return registry.bi_encoder(BI_ENCODER_MODEL_NAME)
 
 def _get_cross_encoder() -> CrossEncoder:
-    global _cross_encoder
-    if _cross_encoder is None:
-        _cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL_NAME)
-    return _cross_encoder
+    return registry.cross_encoder(CROSS_ENCODER_MODEL_NAME)
+
+# Single-pair predictions from concurrent requests share one forward pass;
+# the one batcher for the registry cross-encoder (ai_service uses it too)
+_cross_batcher = MicroBatcher(
+    lambda pairs: _get_cross_encoder().predict(pairs),
+    max_batch_size=int(os.getenv("CROSS_BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.getenv("CROSS_BATCH_MAX_WAIT_MS", "5")),
+    name="cross-encoder-batcher",
+    timeout_sec=float(os.getenv("CROSS_BATCH_TIMEOUT_SEC", "30")),
+)
+
+def cross_logit(a: str, b: str) -> float:
+    """Raw cross-encoder logit for one pair, micro-batched across threads."""
+    return float(_cross_batcher.run((a, b)))
+
+def cross_batch_stats() -> dict:
+    return _cross_batcher.stats()
 
 # ---- Basic text extraction for CV files ----
 def extract_text(path: str) -> str:
@@ -53,7 +65,88 @@ def _normalize(text: str) -> str:
     # Keep it simple; heavy cleanup can hurt semantic models
     return " ".join(text.replace("\r", " ").split())
 
+# ---- Chunked encoding for long documents ----
+# all-MiniLM-L6-v2 truncates at 256 word-pieces; a CV is split into
+# overlapping token windows, all windows are encoded in one batch and pooled.
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "200"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "40"))
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "mean")  # mean | max | attention
+
+def chunk_text(text: str, max_tokens: int | None = None, overlap: int | None = None) -> List[str]:
+    """
+    Split `text` into windows of at most `max_tokens` word-pieces overlapping
+    by `overlap`, cut on the tokenizer's character offsets so each chunk is a
+    verbatim slice of the input.
+    """
+    text = _normalize(text)
+    if not text:
+        return [""]
+    bi = _get_bi_encoder()
+    limit = max(8, (bi.max_seq_length or 256) - 2)
+    max_tokens = min(max_tokens or CHUNK_TOKENS, limit)
+    overlap = min(overlap if overlap is not None else CHUNK_OVERLAP, max_tokens // 2)
+    try:
+        offsets = bi.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    except Exception:
+        # slow tokenizer without offsets: fall back to whitespace tokens
+        words = text.split(" ")
+        step = max_tokens - overlap
+        return [" ".join(words[i:i + max_tokens]) for i in range(0, max(1, len(words) - overlap), step)]
+    if len(offsets) <= max_tokens:
+        return [text]
+    step = max_tokens - overlap
+    chunks = []
+    for start in range(0, len(offsets), step):
+        window = offsets[start:start + max_tokens]
+        chunks.append(text[window[0][0]:window[-1][1]])
+        if start + max_tokens >= len(offsets):
+            break
+    return chunks
+
+def pool_chunks(chunk_embs: np.ndarray, mode: str | None = None) -> np.ndarray:
+    """
+    (n, d) normalized chunk vectors -> one normalized (d,) document vector.
+    attention: softmax-weighted mean, weights from each chunk's agreement
+    with the mean direction (down-weights off-topic sections).
+    """
+    mode = mode or CHUNK_POOLING
+    if len(chunk_embs) == 1:
+        return chunk_embs[0]
+    if mode == "max":
+        v = chunk_embs.max(axis=0)
+    elif mode == "attention":
+        centre = chunk_embs.mean(axis=0)
+        logits = chunk_embs @ centre * np.sqrt(chunk_embs.shape[1])
+        w = np.exp(logits - logits.max())
+        v = (w / w.sum()) @ chunk_embs
+    else:
+        v = chunk_embs.mean(axis=0)
+    return (v / (np.linalg.norm(v) or 1.0)).astype(chunk_embs.dtype)
+
+def encode_documents(texts: List[str], batch_size: int = 64) -> List[Tuple[np.ndarray, np.ndarray, List[str]]]:
+    """
+    For each text: (pooled doc vector (d,), chunk vectors (n, d), chunk texts).
+    The chunks of every document are encoded together in one encode() call.
+    """
+    chunked = [chunk_text(t) for t in texts]
+    flat = [c for chunks in chunked for c in chunks]
+    embs = _get_bi_encoder().encode(
+        flat, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+    ) if flat else np.zeros((0, 0), dtype=np.float32)
+    out, i = [], 0
+    for chunks in chunked:
+        ce = embs[i:i + len(chunks)]
+        i += len(chunks)
+        out.append((pool_chunks(ce), ce, chunks))
+    return out
+
 # ---- Core similarity (bi-encoder + optional cross-encoder) ----
+def _calibration(reranked: bool = True) -> calibration.Calibration | None:
+    """Fitted calibration of the current scorer; score_cache owns the scorer ids."""
+    from app.services import score_cache
+
+    return score_cache.get_calibration(reranked)
+
 def compute_similarity(cv_text: str, job_text: str) -> float:
     """
     Returns a score in [0,1] using a bi-encoder cosine similarity,
@@ -64,64 +157,206 @@ def compute_similarity(cv_text: str, job_text: str) -> float:
 
     bi = _get_bi_encoder()
 
-    # Encode (mean pooling by default)
-    cv_emb = bi.encode(cv_text, convert_to_tensor=True, normalize_embeddings=True)
-    job_emb = bi.encode(job_text, convert_to_tensor=True, normalize_embeddings=True)
+    # CV: pooled over overlapping chunks, so the whole document counts
+    cv_emb, chunk_embs, chunks = encode_documents([cv_text])[0]
+    job_emb = bi.encode(job_text, convert_to_numpy=True, normalize_embeddings=True)
 
-    # Cosine similarity -> [-1,1]; clamp to [0,1]
-    sim = float(util.cos_sim(cv_emb, job_emb).item())
-    bi_score = max(0.0, min(1.0, (sim + 1.0) / 2.0))
+    # Cosine similarity -> [-1,1]; mapped to [0,1] by the scorer's calibration
+    sim = float(np.dot(cv_emb, job_emb))
+    bi_score = float(calibration.blend(sim, None, _calibration(reranked=False)))
 
     if not USE_CROSS_ENCODER:
         return bi_score
 
     try:
-        cross = _get_cross_encoder()
-        # Cross-encoder returns unbounded scores; use sigmoid to map to (0,1)
-        raw = cross.predict([(cv_text, job_text)])[0]
-        cross_score = 1 / (1 + np.exp(-raw))
-        # Blend: cross-encoder dominates but keep bi-encoder as prior
-        score = 0.7 * float(cross_score) + 0.3 * float(bi_score)
-        return float(max(0.0, min(1.0, score)))
+        # The cross-encoder sees the CV section closest to the job
+        best = chunks[int(np.argmax(chunk_embs @ job_emb))]
+        # Cross-encoder returns unbounded logits; the calibration maps them to [0,1]
+        raw = _cross_batcher.run((best, job_text))
+        return float(calibration.blend(sim, raw, _calibration()))
     except Exception:
         # If cross-encoder fails, fall back gracefully
         return bi_score
 
-# ---- Batch helper (useful later if you pre-score many internships) ----
-def rank_internships(cv_text: str, jobs: List[Tuple[int, str]], top_k: int = 20) -> List[Tuple[int, float]]:
+# ---- Explanations (which CV sections matched which job requirements) ----
+EXPLAIN_FIELDS = ("missions", "skills", "profile_requirements")
+
+def explain_chunks(
+    chunk_embs: List[np.ndarray],
+    field_embs: Dict[str, np.ndarray],
+    top_k: int = 3,
+) -> List[Dict[str, List[Tuple[int, int, float]]]]:
     """
-    jobs: list of (internship_id, job_text)
-    Returns [(id, score)] sorted by score desc.
-    Uses bi-encoder to get top_k, then optional cross-encoder rerank.
+    chunk_embs: one (n_i, d) normalized chunk matrix per CV.
+    field_embs: field name -> (m_f, d) normalized item vectors (one row per
+    mission / skill / requirement sentence).
+    All chunks are scored against all items with a single matrix product.
+    Returns, per CV and field, up to `top_k` (chunk index, best item index,
+    cosine) sorted by cosine desc.
     """
-    cv_text_n = _normalize(cv_text)
-    job_texts = [_normalize(x[1]) for x in jobs]
+    fields = [f for f, v in field_embs.items() if len(v)]
+    out: List[Dict[str, List[Tuple[int, int, float]]]] = [{f: [] for f in field_embs} for _ in chunk_embs]
+    if not fields or not chunk_embs:
+        return out
+    items = np.vstack([field_embs[f] for f in fields]).astype(np.float32)
+    col_ends = np.cumsum([len(field_embs[f]) for f in fields])
+    row_ends = np.cumsum([len(c) for c in chunk_embs])
+    sims = np.vstack(chunk_embs).astype(np.float32) @ items.T  # (all chunks, all items)
+    for i, (r1, r0) in enumerate(zip(row_ends, np.r_[0, row_ends[:-1]])):
+        if r1 == r0:
+            continue
+        for f, c1, c0 in zip(fields, col_ends, np.r_[0, col_ends[:-1]]):
+            block = sims[r0:r1, c0:c1]
+            best_item = block.argmax(axis=1)
+            best = block[np.arange(len(block)), best_item]
+            out[i][f] = [(int(j), int(best_item[j]), float(best[j])) for j in top_k_indices(best, top_k)]
+    return out
 
+def explain_similarity(cv_text: str, job_fields: Dict[str, List[str]], top_k: int = 3) -> Dict[str, List[Dict]]:
+    """
+    Explanation companion of compute_similarity for a single pair, encoding
+    on the fly. For stored CVs use app.services.explanations, which reuses
+    the persisted chunk vectors instead.
+    """
     bi = _get_bi_encoder()
-    cv_emb = bi.encode(cv_text_n, convert_to_tensor=True, normalize_embeddings=True)
-    job_embs = bi.encode(job_texts, convert_to_tensor=True, normalize_embeddings=True)
+    _, chunk_embs, chunks = encode_documents([_normalize(cv_text)])[0]
+    field_embs = {
+        f: bi.encode(v, convert_to_numpy=True, normalize_embeddings=True) if v else np.zeros((0, chunk_embs.shape[1]))
+        for f, v in job_fields.items()
+    }
+    res = explain_chunks([chunk_embs], field_embs, top_k)[0]
+    return {
+        f: [{"chunk": chunks[c], "matched": job_fields[f][m], "similarity": round(s, 4)} for c, m, s in hits]
+        for f, hits in res.items()
+    }
 
-    cos = util.cos_sim(cv_emb, job_embs)[0].cpu().numpy()  # [-1,1]
-    bi_scores = (cos + 1.0) / 2.0  # [0,1]
+# ---- Batch helper (useful later if you pre-score many internships) ----
+def bi_scores(cv_emb: np.ndarray, job_embs: np.ndarray) -> np.ndarray:
+    """
+    cv_emb: (d,) normalized, job_embs: (N, d) normalized float32.
+    One matrix-vector product -> bi-encoder scores in [0,1].
+    """
+    cos = job_embs @ np.asarray(cv_emb, dtype=job_embs.dtype)
+    return (cos + 1.0) / 2.0
 
-    idx_sorted = np.argsort(-bi_scores)
-    idx_top = idx_sorted[: min(top_k, len(jobs))]
+def fused_field_cosine(cv_embs: np.ndarray, field_embs: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    cv_embs: (N, d) normalized. field_embs: (J, F, d), one normalized vector
+    per job field, all-zero rows for empty fields. weights: (F,).
+    One (N, d) x (d, J*F) product, then a weighted mean over each job's
+    non-empty fields -> (N, J) fused cosine in [-1, 1] (0 for a job without
+    any field).
+    """
+    cv_embs = np.atleast_2d(np.asarray(cv_embs, dtype=np.float32))
+    if field_embs.ndim == 2:
+        field_embs = field_embs[None]
+    j, f, d = field_embs.shape
+    cos = (cv_embs @ field_embs.reshape(j * f, d).T).reshape(len(cv_embs), j, f)
+    w = (np.abs(field_embs).sum(axis=2) > 0) * np.asarray(weights, dtype=np.float32)  # (J, F)
+    denom = w.sum(axis=1)
+    return (cos * w[None]).sum(axis=2) / np.where(denom > 0, denom, 1.0)
 
-    candidates = [(jobs[i][0], float(bi_scores[i])) for i in idx_top]
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first (argpartition, no full sort)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
 
-    if not USE_CROSS_ENCODER:
-        return sorted(candidates, key=lambda x: x[1], reverse=True)
+def rerank(cv_text: str, candidates: List[Tuple[int, str, float]]) -> List[Tuple[int, float]]:
+    """
+    candidates: list of (id, job_text, bi_score) with normalized texts.
+    Returns [(id, score)] sorted desc, cross-encoder blended when enabled.
+    """
+    if not candidates:
+        return []
+    cos = 2.0 * np.array([c[2] for c in candidates], dtype=np.float64) - 1.0  # bi_scores are (cos + 1) / 2
+    scores = None
+    if USE_CROSS_ENCODER:
+        try:
+            raw = _get_cross_encoder().predict([(cv_text, c[1]) for c in candidates])
+            scores = calibration.blend(cos, np.asarray(raw, dtype=np.float64), _calibration())
+        except Exception:
+            pass
+    if scores is None:
+        scores = calibration.blend(cos, None, _calibration(reranked=False))
+    return sorted(((c[0], float(s)) for c, s in zip(candidates, scores)), key=lambda x: x[1], reverse=True)
 
-    # Rerank with cross-encoder
+def pair_features(
+    cv_texts: List[str],
+    job_texts: List[str],
+    cv_embs: np.ndarray | None = None,
+    job_embs: np.ndarray | None = None,
+    prior: np.ndarray | None = None,
+    strict: bool = False,
+) -> Tuple[np.ndarray, np.ndarray | None]:
+    """
+    Raw model outputs for aligned (cv, job) pairs: (cosine in [-1,1],
+    cross-encoder logits or None when it is off / failed). Precomputed
+    embeddings are used when given; a precomputed cosine `prior` (e.g. the
+    per-field fused score) replaces them. With `strict`, a cross-encoder
+    failure raises instead of returning None.
+    """
+    cv_texts = [_normalize(t) for t in cv_texts]
+    job_texts = [_normalize(t) for t in job_texts]
+    if prior is not None:
+        cos = np.asarray(prior, dtype=np.float64)
+    else:
+        bi = _get_bi_encoder()
+        if cv_embs is None:
+            cv_embs = np.stack([d[0] for d in encode_documents(cv_texts)])
+        if job_embs is None:
+            job_embs = bi.encode(job_texts, convert_to_numpy=True, normalize_embeddings=True)
+        cos = np.einsum("ij,ij->i", cv_embs, job_embs).astype(np.float64)
+    if not USE_CROSS_ENCODER or not cv_texts:
+        return cos, None
     try:
-        cross = _get_cross_encoder()
-        pairs = [(cv_text_n, job_texts[i]) for i in idx_top]
-        raw = cross.predict(pairs)  # list of floats
-        cross_scores = 1 / (1 + np.exp(-np.array(raw)))
-        blended = [
-            (jobs[i][0], float(0.7 * cross_scores[j] + 0.3 * bi_scores[i]))
-            for j, i in enumerate(idx_top)
-        ]
-        return sorted(blended, key=lambda x: x[1], reverse=True)
+        return cos, np.asarray(_get_cross_encoder().predict(list(zip(cv_texts, job_texts))), dtype=np.float64)
     except Exception:
-        return sorted(candidates, key=lambda x: x[1], reverse=True)
+        if strict:
+            raise
+        return cos, None
+
+def score_pairs(
+    cv_texts: List[str],
+    job_texts: List[str],
+    cv_embs: np.ndarray | None = None,
+    job_embs: np.ndarray | None = None,
+    prior: np.ndarray | None = None,
+    strict: bool = False,
+    cal: calibration.Calibration | None = None,
+) -> np.ndarray:
+    """
+    Vectorized compute_similarity over aligned (cv, job) pairs (see
+    pair_features), mapped to [0,1] by `cal` or the fixed blend.
+    """
+    cos, logits = pair_features(cv_texts, job_texts, cv_embs, job_embs, prior=prior, strict=strict)
+    return calibration.blend(cos, logits, cal)
+
+def rank_internships(
+    cv_text: str,
+    jobs: List[Tuple[int, str]],
+    top_k: int = 20,
+    job_embs: np.ndarray | None = None,
+) -> List[Tuple[int, float]]:
+    """
+    jobs: list of (internship_id, job_text)
+    job_embs: optional (len(jobs), d) matrix of normalized job embeddings,
+    aligned with `jobs` (see app.services.job_embeddings). When given, the
+    jobs are not re-encoded.
+    Returns [(id, score)] sorted by score desc.
+    Uses bi-encoder to get top_k, then optional cross-encoder rerank.
+    """
+    cv_text_n = _normalize(cv_text)
+    bi = _get_bi_encoder()
+    cv_emb = encode_documents([cv_text_n])[0][0]
+    if job_embs is None:
+        job_embs = bi.encode(
+            [_normalize(x[1]) for x in jobs], convert_to_numpy=True, normalize_embeddings=True
+        )
+
+    scores = bi_scores(cv_emb, job_embs)
+    idx_top = top_k_indices(scores, top_k)
+    candidates = [(jobs[i][0], _normalize(jobs[i][1]), float(scores[i])) for i in idx_top]
+    return rerank(cv_text_n, candidates)
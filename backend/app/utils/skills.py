@@ -0,0 +1,271 @@
+# app/utils/skills.py
+"""
+Skill normalization and an inverted skill index.
+
+SkillMatcher runs a spaCy PhraseMatcher (case-insensitive, blank tokenizer:
+no model download) over a vocabulary of canonical skills and their aliases,
+so "ReactJS", "React.js" and "react" all become "react". The vocabulary is
+DEFAULT_SKILLS, optionally extended by a JSON file {canonical: [aliases]}
+at SKILLS_VOCAB_PATH.
+
+SkillIndex maps skill -> bitset of ids (a Python int, one bit per slot), so
+"which jobs need any / all / at least k of these skills" is a handful of
+bitwise ops over tens of thousands of ids.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+import spacy
+from spacy.matcher import PhraseMatcher
+
+logger = logging.getLogger("smartrecruit")
+
+SKILLS_VOCAB_PATH = os.getenv("SKILLS_VOCAB_PATH")  # optional JSON {canonical: [aliases]}
+
+# canonical -> aliases (the canonical name is always matched too). Terms that
+# are ordinary words or single letters ("go", "r", "rest") are spelled out.
+DEFAULT_SKILLS: Dict[str, List[str]] = {
+    # languages
+    "python": ["python3"],
+    "java": [],
+    "javascript": ["js", "ecmascript"],
+    "typescript": [],
+    "c language": ["langage c", "ansi c"],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    "php": [],
+    "ruby": [],
+    "golang": ["go lang"],
+    "rust": [],
+    "kotlin": [],
+    "swift": [],
+    "dart": [],
+    "r language": ["langage r", "rstudio"],
+    "matlab": [],
+    "sql": ["t-sql", "pl/sql", "plsql"],
+    "bash": ["shell scripting"],
+    # web / mobile
+    "html": ["html5"],
+    "css": ["css3", "sass", "scss"],
+    "react": ["reactjs", "react.js"],
+    "react native": [],
+    "angular": ["angularjs"],
+    "vue": ["vuejs", "vue.js"],
+    "node.js": ["nodejs"],
+    "express": ["expressjs", "express.js"],
+    "django": [],
+    "flask": [],
+    "fastapi": [],
+    "spring": ["spring boot", "springboot"],
+    "laravel": [],
+    "symfony": [],
+    ".net": ["dotnet", "asp.net"],
+    "flutter": [],
+    "android": [],
+    "ios": [],
+    "rest api": ["restful", "api rest", "apis rest"],
+    "graphql": [],
+    # data / ml
+    "postgresql": ["postgres"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "oracle": [],
+    "pandas": [],
+    "numpy": [],
+    "scikit-learn": ["sklearn"],
+    "tensorflow": [],
+    "pytorch": ["torch"],
+    "machine learning": ["apprentissage automatique"],
+    "deep learning": ["apprentissage profond"],
+    "nlp": ["natural language processing", "traitement du langage naturel"],
+    "computer vision": ["vision par ordinateur"],
+    "data analysis": ["analyse de données", "data analytics"],
+    "power bi": ["powerbi"],
+    "tableau": [],
+    "excel": ["microsoft excel", "ms excel"],
+    "spark": ["apache spark", "pyspark"],
+    "hadoop": [],
+    # devops / cloud
+    "docker": [],
+    "kubernetes": ["k8s"],
+    "aws": ["amazon web services"],
+    "azure": ["microsoft azure"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "terraform": [],
+    "ansible": [],
+    "ci/cd": ["ci cd", "continuous integration", "intégration continue"],
+    "jenkins": [],
+    "git": ["github", "gitlab"],
+    "linux": ["unix"],
+    # methods / business
+    "agile": ["scrum", "kanban"],
+    "project management": ["gestion de projet"],
+    "uml": [],
+    "figma": [],
+    "seo": [],
+    "digital marketing": ["marketing digital"],
+    "accounting": ["comptabilité"],
+    "communication": [],
+    "english": ["anglais"],
+    "french": ["français", "francais"],
+}
+
+_WS = re.compile(r"\s+")
+
+def _clean(term: str) -> str:
+    return _WS.sub(" ", str(term).strip().lower())
+
+def _load_vocab() -> Dict[str, List[str]]:
+    vocab = {k: list(v) for k, v in DEFAULT_SKILLS.items()}
+    if SKILLS_VOCAB_PATH:
+        try:
+            with open(SKILLS_VOCAB_PATH, "r", encoding="utf-8") as f:
+                for canonical, aliases in json.load(f).items():
+                    vocab.setdefault(_clean(canonical), []).extend(aliases or [])
+        except (OSError, ValueError) as e:
+            logger.warning("skills_vocab_load_failed", extra={"path": SKILLS_VOCAB_PATH}, exc_info=e)
+    return vocab
+
+
+class SkillMatcher:
+    def __init__(self, vocab: Dict[str, List[str]]):
+        # "xx" = language-neutral tokenizer; CVs here are English and French
+        self._nlp = spacy.blank("xx")
+        self._matcher = PhraseMatcher(self._nlp.vocab, attr="LOWER")
+        self._alias: Dict[str, str] = {}
+        for canonical, aliases in vocab.items():
+            canonical = _clean(canonical)
+            terms = {canonical, *(_clean(a) for a in aliases)}
+            for t in terms:
+                self._alias[t] = canonical
+            self._matcher.add(canonical, [self._nlp.make_doc(t) for t in sorted(terms)])
+        self.version = hashlib.sha256(
+            json.dumps(sorted(self._alias.items())).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def normalize(self, term: str) -> str:
+        """Canonical name of a known skill or alias; unknown terms are just cleaned."""
+        t = _clean(term)
+        return self._alias.get(t, t)
+
+    def _from_doc(self, doc) -> List[str]:
+        return sorted({self._nlp.vocab.strings[match_id] for match_id, _, _ in self._matcher(doc)})
+
+    def extract(self, text: str) -> List[str]:
+        return self._from_doc(self._nlp.make_doc(text or ""))
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 64) -> List[List[str]]:
+        return [self._from_doc(d) for d in self._nlp.pipe((t or "" for t in texts), batch_size=batch_size)]
+
+
+_matcher: Optional[SkillMatcher] = None
+_matcher_lock = threading.Lock()
+
+def get_matcher() -> SkillMatcher:
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = SkillMatcher(_load_vocab())
+        return _matcher
+
+
+# ---- Inverted index ----
+def _bits_to_slots(bits: int, nslots: int) -> np.ndarray:
+    if bits == 0 or nslots == 0:
+        return np.zeros(0, dtype=np.int64)
+    raw = np.frombuffer(bits.to_bytes((nslots + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:nslots])
+
+
+class SkillIndex:
+    """skill -> set of integer ids, one bitset per skill. Thread-safe."""
+
+    def __init__(self):
+        self._slot: Dict[int, int] = {}
+        self._ids: List[int] = []  # slot -> id (-1 when free)
+        self._free: List[int] = []
+        self._postings: Dict[str, int] = {}
+        self._skills: Dict[int, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def __contains__(self, id_: int) -> bool:
+        return int(id_) in self._slot
+
+    def _remove(self, id_: int) -> None:
+        slot = self._slot.pop(id_, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        for s in self._skills.pop(id_, ()):
+            bits = self._postings[s] & mask
+            if bits:
+                self._postings[s] = bits
+            else:
+                del self._postings[s]
+        self._ids[slot] = -1
+        self._free.append(slot)
+
+    def set(self, id_: int, skills: Iterable[str]) -> None:
+        id_ = int(id_)
+        skills = frozenset(skills)
+        with self._lock:
+            if self._skills.get(id_) == skills and id_ in self._slot:
+                return
+            self._remove(id_)
+            slot = self._free.pop() if self._free else len(self._ids)
+            if slot == len(self._ids):
+                self._ids.append(id_)
+            else:
+                self._ids[slot] = id_
+            self._slot[id_] = slot
+            self._skills[id_] = skills
+            bit = 1 << slot
+            for s in skills:
+                self._postings[s] = self._postings.get(s, 0) | bit
+
+    def remove(self, id_: int) -> None:
+        with self._lock:
+            self._remove(int(id_))
+
+    def skills_of(self, id_: int) -> FrozenSet[str]:
+        return self._skills.get(int(id_), frozenset())
+
+    def match(self, skills: Iterable[str], min_match: int = 1) -> np.ndarray:
+        """
+        Ids holding at least `min_match` of `skills` (1 = any, len = all).
+        Returns int64 ids, ascending by slot.
+        """
+        wanted = sorted(set(skills))
+        if not wanted or min_match > len(wanted):
+            return np.zeros(0, dtype=np.int64)
+        with self._lock:
+            postings = [self._postings.get(s, 0) for s in wanted]
+            ids = np.asarray(self._ids, dtype=np.int64)
+        n = len(ids)
+        if min_match <= 1:
+            acc = 0
+            for b in postings:
+                acc |= b
+            slots = _bits_to_slots(acc, n)
+        elif min_match == len(postings):
+            acc = postings[0]
+            for b in postings[1:]:
+                acc &= b
+            slots = _bits_to_slots(acc, n)
+        else:
+            counts = np.zeros(n, dtype=np.int32)
+            for b in postings:
+                counts[_bits_to_slots(b, n)] += 1
+            slots = np.flatnonzero(counts >= min_match)
+        return ids[slots]
@@ -0,0 +1,228 @@
+# app/utils/vector_index.py
+"""
+In-process vector indexes over L2-normalized float32 embeddings
+(inner product == cosine).
+
+- FlatIndex: exact search, one matrix-vector product + argpartition.
+- IVFIndex:  approximate search; vectors are bucketed under k-means
+             centroids and a query only scans the `nprobe` closest buckets.
+
+Both expose add / remove / search keyed by integer ids, so job vectors can
+follow Job.status (published -> add, archived/draft/deleted -> remove).
+"""
+from __future__ import annotations
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DTYPE = np.float32
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+class VectorIndex(ABC):
+    """Common interface; subclasses hold the data."""
+    @abstractmethod
+    def add(self, ids: Sequence[int], vecs: np.ndarray) -> None: ...
+
+    @abstractmethod
+    def remove(self, ids: Sequence[int]) -> None: ...
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (ids int64 (k,), cosine scores float32 (k,)), best first."""
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def __contains__(self, id_: int) -> bool: ...
+
+
+class _Bucket:
+    """Growable (ids, matrix) pair with O(1) swap-remove."""
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.mat = np.zeros((0, dim), dtype=DTYPE)
+        self.size = 0
+        self.pos: Dict[int, int] = {}
+
+    def _reserve(self, n: int) -> None:
+        if n <= len(self.ids):
+            return
+        cap = max(n, 2 * len(self.ids), 16)
+        ids = np.zeros(cap, dtype=np.int64)
+        mat = np.zeros((cap, self.dim), dtype=DTYPE)
+        ids[: self.size] = self.ids[: self.size]
+        mat[: self.size] = self.mat[: self.size]
+        self.ids, self.mat = ids, mat
+
+    def add(self, ids: Sequence[int], vecs: np.ndarray) -> None:
+        self._reserve(self.size + len(ids))
+        for id_, v in zip(ids, vecs):
+            self.ids[self.size] = id_
+            self.mat[self.size] = v
+            self.pos[int(id_)] = self.size
+            self.size += 1
+
+    def remove(self, id_: int) -> bool:
+        p = self.pos.pop(int(id_), None)
+        if p is None:
+            return False
+        last = self.size - 1
+        if p != last:
+            self.ids[p] = self.ids[last]
+            self.mat[p] = self.mat[last]
+            self.pos[int(self.ids[p])] = p
+        self.size = last
+        return True
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.ids[: self.size], self.mat[: self.size]
+
+
+class FlatIndex(VectorIndex):
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._b = _Bucket(dim)
+        self._lock = threading.RLock()
+
+    def add(self, ids, vecs):
+        vecs = np.asarray(vecs, dtype=DTYPE).reshape(-1, self.dim)
+        with self._lock:
+            self.remove(ids)
+            self._b.add(ids, vecs)
+
+    def remove(self, ids):
+        with self._lock:
+            for id_ in ids:
+                self._b.remove(id_)
+
+    def search(self, query, k):
+        q = np.asarray(query, dtype=DTYPE).reshape(self.dim)
+        with self._lock:
+            ids, mat = self._b.view()
+            scores = mat @ q
+            top = _topk(scores, k)
+            return ids[top].copy(), scores[top]
+
+    def __len__(self):
+        return self._b.size
+
+    def __contains__(self, id_):
+        return int(id_) in self._b.pos
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index. Until `min_train` vectors have been added it answers
+    exactly (a single bucket); it then trains `nlist` centroids with spherical
+    k-means and redistributes. Recall/latency is tuned with `nprobe`.
+    """
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 8, min_train: int = 2048, seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train = max(min_train, nlist)
+        self.seed = seed
+        self.centroids: np.ndarray | None = None
+        self._buckets: List[_Bucket] = [_Bucket(dim)]
+        self._where: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, sample: np.ndarray | None = None, iters: int = 10) -> None:
+        """Fit centroids (on `sample` or on everything stored) and re-bucket."""
+        with self._lock:
+            all_ids, all_vecs = self._export()
+            data = all_vecs if sample is None else np.asarray(sample, dtype=DTYPE)
+            if len(data) < self.nlist:
+                return
+            rng = np.random.default_rng(self.seed)
+            cent = data[rng.choice(len(data), self.nlist, replace=False)].copy()
+            for _ in range(iters):
+                assign = np.argmax(data @ cent.T, axis=1)
+                for c in range(self.nlist):
+                    members = data[assign == c]
+                    if len(members):
+                        v = members.sum(axis=0)
+                        cent[c] = v / (np.linalg.norm(v) or 1.0)
+            self.centroids = cent.astype(DTYPE)
+            self._buckets = [_Bucket(self.dim) for _ in range(self.nlist)]
+            self._where = {}
+            if len(all_ids):
+                self._insert(all_ids, all_vecs)
+
+    def _export(self) -> Tuple[np.ndarray, np.ndarray]:
+        views = [b.view() for b in self._buckets]
+        ids = np.concatenate([v[0] for v in views]) if views else np.zeros(0, dtype=np.int64)
+        mat = np.concatenate([v[1] for v in views]) if views else np.zeros((0, self.dim), dtype=DTYPE)
+        return ids, mat
+
+    def _insert(self, ids, vecs) -> None:
+        if self.centroids is None:
+            assign = np.zeros(len(ids), dtype=np.int64)
+        else:
+            assign = np.argmax(vecs @ self.centroids.T, axis=1)
+        for c in np.unique(assign):
+            sel = np.nonzero(assign == c)[0]
+            self._buckets[c].add([ids[i] for i in sel], vecs[sel])
+            for i in sel:
+                self._where[int(ids[i])] = int(c)
+
+    def add(self, ids, vecs):
+        vecs = np.asarray(vecs, dtype=DTYPE).reshape(-1, self.dim)
+        ids = [int(i) for i in ids]
+        with self._lock:
+            self.remove(ids)
+            self._insert(ids, vecs)
+            if not self.is_trained and len(self) >= self.min_train:
+                self.train()
+
+    def remove(self, ids):
+        with self._lock:
+            for id_ in ids:
+                c = self._where.pop(int(id_), None)
+                if c is not None:
+                    self._buckets[c].remove(id_)
+
+    def search(self, query, k):
+        q = np.asarray(query, dtype=DTYPE).reshape(self.dim)
+        with self._lock:
+            if self.centroids is None:
+                probe = [0]
+            else:
+                probe = _topk(self.centroids @ q, self.nprobe)
+            views = [self._buckets[c].view() for c in probe]
+            ids = np.concatenate([v[0] for v in views])
+            mat = np.concatenate([v[1] for v in views])
+            scores = mat @ q
+            top = _topk(scores, k)
+            return ids[top], scores[top]
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, id_):
+        return int(id_) in self._where
+
+
+def make_index(kind: str, dim: int, **kwargs) -> VectorIndex:
+    """kind: 'flat' (exact) | 'ivf' (approximate)."""
+    kind = (kind or "flat").lower()
+    if kind == "flat":
+        return FlatIndex(dim)
+    if kind == "ivf":
+        return IVFIndex(dim, **kwargs)
+    raise ValueError(f"Unknown vector index: {kind}")
@@ -0,0 +1,28 @@
+# app/utils/vectors.py
+from __future__ import annotations
+import hashlib
+from typing import Iterable, List
+
+import numpy as np
+
+# Embeddings are persisted as raw little-endian float32 bytes (LargeBinary),
+# so a whole table can be turned into one matrix with a single frombuffer.
+DTYPE = np.dtype("<f4")
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of an (already normalized) text."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def pack(vec: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vec, dtype=DTYPE).tobytes()
+
+def unpack(blob: bytes, dim: int | None = None) -> np.ndarray:
+    arr = np.frombuffer(blob, dtype=DTYPE)
+    return arr if dim is None else arr.reshape(-1, dim)
+
+def stack(blobs: Iterable[bytes], dim: int) -> np.ndarray:
+    """Join many packed vectors into a (N, dim) float32 matrix in one copy."""
+    blobs: List[bytes] = list(blobs)
+    if not blobs:
+        return np.zeros((0, dim), dtype=DTYPE)
+    return np.frombuffer(b"".join(blobs), dtype=DTYPE).reshape(len(blobs), dim)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Accuracy parity and CPU throughput: torch vs ONNX Runtime (optionally int8).
+#   python bench_inference.py
+#   python bench_inference.py --no-quantize --threads 4 --batch-sizes 1 8 32
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.utils.inference_backend import load_bi_encoder, load_cross_encoder
+
+BI = os.getenv("BI_ENCODER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+CROSS = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+CVS = [
+    "Backend developer with 3 years of Python, FastAPI and PostgreSQL experience, built REST APIs and CI pipelines.",
+    "Data analyst skilled in SQL, Power BI and Excel; reporting dashboards for sales and finance teams.",
+    "Frontend engineer, React and TypeScript, design systems, accessibility and performance tuning.",
+    "Etudiant en génie logiciel, stage en développement mobile Flutter et Firebase.",
+    "DevOps engineer: Kubernetes, Terraform, AWS, monitoring with Prometheus and Grafana.",
+    "Marketing assistant, social media campaigns, content writing and SEO.",
+    "Machine learning intern, PyTorch, NLP with transformers, model evaluation and deployment.",
+    "Accountant with IFRS experience, month-end closing, audits and payroll.",
+]
+JOBS = [
+    "Python backend developer to build FastAPI services on PostgreSQL.",
+    "Business intelligence analyst: SQL, dashboards, KPI reporting.",
+    "React developer for our customer web app.",
+    "Stage développeur mobile Flutter.",
+    "Cloud / DevOps engineer with Kubernetes and AWS.",
+    "NLP engineer to ship transformer models to production.",
+]
+
+
+def throughput(fn, items, batch_size, repeat=3):
+    fn(items[:batch_size])  # warm
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for i in range(0, len(items), batch_size):
+            fn(items[i:i + batch_size])
+            n += len(items[i:i + batch_size])
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--no-quantize", action="store_true")
+    ap.add_argument("--threads", type=int, default=0, help="ONNX intra-op and torch threads (0 = default)")
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    args = ap.parse_args()
+    quantize = not args.no_quantize
+    threads = args.threads or None
+    if threads:
+        import torch
+        torch.set_num_threads(threads)  # same budget on both sides
+
+    bi_t = load_bi_encoder(BI, backend="torch")
+    bi_o = load_bi_encoder(BI, backend="onnx", quantize=quantize, threads=threads)
+    ce_t = load_cross_encoder(CROSS, backend="torch")
+    ce_o = load_cross_encoder(CROSS, backend="onnx", quantize=quantize, threads=threads)
+
+    # ---- parity ----
+    texts = CVS + JOBS
+    et = bi_t.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+    eo = bi_o.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+    cos = np.sum(et * eo, axis=1)
+    print(f"bi-encoder  cos(torch, onnx): min={cos.min():.4f} mean={cos.mean():.4f}")
+
+    st = et[: len(CVS)] @ et[len(CVS):].T
+    so = eo[: len(CVS)] @ eo[len(CVS):].T
+    top_agree = np.mean(np.argmax(st, axis=1) == np.argmax(so, axis=1))
+    print(f"bi-encoder  cv->job top-1 agreement: {top_agree:.3f}  max |dsim|={np.abs(st - so).max():.4f}")
+
+    pairs = [(c, j) for c in CVS for j in JOBS]
+    rt = np.asarray(ce_t.predict(pairs))
+    ro = np.asarray(ce_o.predict(pairs))
+    pt, po = 1 / (1 + np.exp(-rt)), 1 / (1 + np.exp(-ro))
+    rank_t, rank_o = np.argsort(np.argsort(rt)), np.argsort(np.argsort(ro))
+    spearman = np.corrcoef(rank_t, rank_o)[0, 1]
+    print(f"cross-enc   max |dsigmoid|={np.abs(pt - po).max():.4f}  spearman={spearman:.4f}")
+
+    # ---- throughput ----
+    corpus = (CVS + JOBS) * 16
+    pair_corpus = pairs * 4
+    for bs in args.batch_sizes:
+        bt = throughput(lambda x: bi_t.encode(x, batch_size=bs), corpus, bs)
+        bo = throughput(lambda x: bi_o.encode(x, batch_size=bs), corpus, bs)
+        ct = throughput(lambda x: ce_t.predict(x, batch_size=bs), pair_corpus, bs)
+        co = throughput(lambda x: ce_o.predict(x, batch_size=bs), pair_corpus, bs)
+        print(f"batch={bs:<3} bi   torch {bt:8.1f}/s  onnx {bo:8.1f}/s  x{bo / bt:.2f}")
+        print(f"          cross torch {ct:8.1f}/s  onnx {co:8.1f}/s  x{co / ct:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Latency of the hybrid job search path (BM25 + flat dense index + RRF) on
+# synthetic jobs. Query embedding is excluded: it is one cached encode.
+# --db times job_search.search_jobs end to end against DATABASE_URL instead
+# (the jobs already there), with the time spent in SQL broken out.
+#   python bench_job_search.py --n 50000
+#   DATABASE_URL=postgresql://... python bench_job_search.py --db
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.utils.bm25 import BM25Index, reciprocal_rank_fusion
+from app.utils.vector_index import FlatIndex
+
+TITLES = ["developer", "engineer", "analyst", "intern", "designer", "manager", "consultant", "stagiaire"]
+SKILLS = ["python", "java", "react", "sql", "docker", "aws", "excel", "figma", "flutter", "django",
+          "kubernetes", "pandas", "node", "angular", "php", "c++", "c#", "spark", "seo", "power bi"]
+
+
+def synthetic_jobs(n: int, vocab: int, seed: int = 0):
+    rnd = random.Random(seed)
+    words = [f"term{i}" for i in range(vocab)]
+    for i in range(n):
+        skills = rnd.sample(SKILLS, 4)
+        yield i, " ".join([
+            f"{skills[0]} {rnd.choice(TITLES)}", f"{skills[0]} {rnd.choice(TITLES)}",
+            " ".join(rnd.choices(words, k=150)), " ".join(skills),
+        ])
+
+
+def _report(lat):
+    for name, xs in lat.items():
+        xs = np.asarray(xs) * 1000
+        print(f"{name:<6} p50 {np.percentile(xs, 50):6.2f} ms   p95 {np.percentile(xs, 95):6.2f} ms")
+
+
+def bench_db(queries, repeat: int):
+    """search_jobs per query through a real session: stamps, index syncs and all."""
+    from sqlalchemy import event
+
+    from app.database import SessionLocal, engine
+    from app.services import job_search
+
+    sql = {"t": 0.0, "n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, params, context, executemany):
+        conn.info["t0"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, params, context, executemany):
+        sql["t"] += time.perf_counter() - conn.info.pop("t0")
+        sql["n"] += 1
+
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        job_search.get_bm25_index(db)
+        print(f"bm25 sync: {time.perf_counter() - t0:.1f}s")
+        for q in queries:  # warm the query-embedding cache
+            job_search.search_jobs(db, q)
+        lat = {"sql": [], "total": []}
+        statements = 0
+        for _ in range(repeat):
+            for q in queries:
+                sql["t"], sql["n"] = 0.0, 0
+                t0 = time.perf_counter()
+                job_search.search_jobs(db, q)
+                lat["total"].append(time.perf_counter() - t0)
+                lat["sql"].append(sql["t"])
+                statements += sql["n"]
+                db.rollback()
+        print(f"{statements / len(lat['total']):.2f} SQL statements per query")
+        _report(lat)
+    finally:
+        db.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--vocab", type=int, default=30000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--candidates", type=int, default=100)
+    ap.add_argument("--db", action="store_true", help="search_jobs against DATABASE_URL, SQL time included")
+    ap.add_argument("--repeat", type=int, default=3, help="--db: passes over the queries")
+    args = ap.parse_args()
+
+    if args.db:
+        rnd = random.Random(1)
+        bench_db([f"{rnd.choice(SKILLS)} {rnd.choice(TITLES)}" for _ in range(args.queries)], args.repeat)
+        return
+
+    bm25 = BM25Index()
+    t0 = time.perf_counter()
+    for i, text in synthetic_jobs(args.n, args.vocab):
+        bm25.add(i, text)
+    print(f"bm25 build: {time.perf_counter() - t0:.1f}s for {args.n} jobs")
+
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    dense = FlatIndex(args.dim)
+    dense.add(np.arange(args.n), vecs)
+
+    rnd = random.Random(1)
+    queries = [f"{rnd.choice(SKILLS)} {rnd.choice(TITLES)} {rnd.choice(SKILLS)}" for _ in range(args.queries)]
+    qvecs = vecs[rng.integers(0, args.n, args.queries)]
+    lat = {"bm25": [], "dense": [], "total": []}
+    for q, qv in zip(queries, qvecs):
+        t0 = time.perf_counter()
+        lex, _ = bm25.search(q, args.candidates)
+        t1 = time.perf_counter()
+        den, _ = dense.search(qv, args.candidates)
+        t2 = time.perf_counter()
+        reciprocal_rank_fusion([lex, den])[:20]
+        t3 = time.perf_counter()
+        lat["bm25"].append(t1 - t0)
+        lat["dense"].append(t2 - t1)
+        lat["total"].append(t3 - t0)
+    _report(lat)
+
+
+if __name__ == "__main__":
+    main()
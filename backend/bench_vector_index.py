@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Recall@k / latency of the ANN index against exact search.
+#   python bench_vector_index.py                    # synthetic clustered data
+#   python bench_vector_index.py --from-db          # stored job embeddings
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.vector_index import FlatIndex, IVFIndex
+
+
+def synthetic(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    x = centers[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim))
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x.astype(np.float32)
+
+
+def from_db() -> np.ndarray:
+    from app.database import SessionLocal
+    from app.services.job_embeddings import load_job_matrix
+    db = SessionLocal()
+    try:
+        return load_job_matrix(db)[1]
+    finally:
+        db.close()
+
+
+def timed_search(index, queries, k):
+    t0 = time.perf_counter()
+    results = [index.search(q, k)[0] for q in queries]
+    return results, (time.perf_counter() - t0) / len(queries) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=20)
+    ap.add_argument("--nlist", type=int, default=128)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    ap.add_argument("--from-db", action="store_true")
+    args = ap.parse_args()
+
+    data = from_db() if args.from_db else synthetic(args.n, args.dim, clusters=200)
+    n, dim = data.shape
+    rng = np.random.default_rng(1)
+    queries = data[rng.choice(n, min(args.queries, n), replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    ids = np.arange(n)
+
+    flat = FlatIndex(dim)
+    flat.add(ids, data)
+    exact, flat_ms = timed_search(flat, queries, args.k)
+    print(f"n={n} dim={dim} k={args.k}")
+    print(f"flat        recall=1.000  {flat_ms:7.3f} ms/query")
+
+    t0 = time.perf_counter()
+    ivf = IVFIndex(dim, nlist=args.nlist, min_train=n + 1)
+    ivf.add(ids, data)
+    ivf.train()
+    print(f"ivf train   nlist={args.nlist}  {time.perf_counter() - t0:.2f} s")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        approx, ms = timed_search(ivf, queries, args.k)
+        recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact)])
+        print(f"ivf nprobe={nprobe:<3} recall={recall:.3f}  {ms:7.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
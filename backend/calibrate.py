@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Fit the score calibration for the current scorer from recruiter decisions
+# (Application.status accepted / rejected) and store it as the next version
+# under CALIBRATION_DIR (see app/utils/calibration.py). Raw model outputs come
+# from the score cache; decided applications missing from it are scored once.
+# Restart the API to load the new version, then run rescore.py (or let the
+# score backfill) to re-map stored scores; cached pairs need no inference.
+#   python calibrate.py --method isotonic
+#   python calibrate.py --method platt --dry-run
+import argparse
+import zlib
+
+import numpy as np
+
+
+def load_decisions(chunk: int):
+    from app import models
+    from app.database import SessionLocal
+    from app.services.scoring_pipeline import application_features
+
+    ids, cos, logits, labels = [], [], [], []
+    db = SessionLocal()
+    try:
+        last = 0
+        while True:
+            page = (
+                db.query(models.Application.id, models.Application.cv_id,
+                         models.Application.job_id, models.Application.status)
+                .filter(models.Application.id > last, models.Application.status.in_(("accepted", "rejected")))
+                .order_by(models.Application.id)
+                .limit(chunk)
+                .all()
+            )
+            if not page:
+                break
+            last = page[-1].id
+            feats, _ = application_features(db, [(r.id, r.cv_id, r.job_id) for r in page])
+            db.commit()
+            for r in page:
+                if r.id in feats:
+                    ids.append(r.id)
+                    cos.append(feats[r.id][0])
+                    logits.append(feats[r.id][1])
+                    labels.append(1 if r.status == "accepted" else 0)
+            print(f"decisions: {len(labels)}", end="\r")
+    finally:
+        db.close()
+    print()
+    ids, cos, labels = np.asarray(ids), np.asarray(cos, dtype=np.float64), np.asarray(labels)
+    has_logit = np.fromiter((x is not None for x in logits), dtype=bool, count=len(logits))
+    if not has_logit.any():
+        return ids, cos, None, labels
+    # the fit is for the reranked scorer; rows the cross-encoder failed on were scored bi-only
+    if not has_logit.all():
+        print(f"dropping {int((~has_logit).sum())} decisions without a cross-encoder logit")
+    logits = np.asarray([x for x in logits if x is not None], dtype=np.float64)
+    return ids[has_logit], cos[has_logit], logits, labels[has_logit]
+
+
+def log_loss(p, y) -> float:
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--method", choices=["isotonic", "platt"], default="isotonic")
+    ap.add_argument("--holdout", type=float, default=0.2, help="share of decisions kept for the before/after report")
+    ap.add_argument("--chunk", type=int, default=512)
+    ap.add_argument("--dry-run", action="store_true", help="report only, do not write a new version")
+    args = ap.parse_args()
+
+    from app.services import score_cache
+    from app.utils import calibration
+
+    scorer = score_cache.scorer_id()
+    ids, cos, logits, labels = load_decisions(args.chunk)
+    print(f"scorer {scorer}: {len(labels)} decisions, {int(labels.sum()) if len(labels) else 0} accepted")
+
+    # stable split by application id so re-runs compare on the same rows
+    test = np.array([zlib.crc32(str(i).encode()) % 1000 < args.holdout * 1000 for i in ids], dtype=bool)
+
+    def sub(m):
+        return cos[m], None if logits is None else logits[m], labels[m]
+
+    if test.any() and (~test).any():
+        c_tr, x_tr, y_tr = sub(~test)
+        c_te, x_te, y_te = sub(test)
+        cal = calibration.fit(c_tr, x_tr, y_tr, method=args.method, scorer=scorer)
+        for name, p in (("fixed blend", calibration.default_blend(c_te, x_te)), (args.method, cal.apply(c_te, x_te))):
+            print(f"holdout {name:<12} brier {calibration.brier(p, y_te):.4f}  log-loss {log_loss(p, y_te):.4f}")
+
+    cal = calibration.fit(cos, logits, labels, method=args.method, scorer=scorer)
+    print(f"coef cos {cal.coef_cos:.3f}  cross {cal.coef_cross:.3f}  bias {cal.bias:.3f}  points {len(cal.x)}")
+    if not args.dry_run:
+        print("wrote", calibration.save(cal))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Rebuild the analytics rollups (job_daily_stats, owner_daily_stats) from the
+# applications table. The API does the same every ROLLUP_RECONCILE_INTERVAL_SEC;
+# run this after bulk SQL edits or from cron. Safe while the API is live: writers
+# wait on the table lock and apply their deltas on top of the rebuilt rows.
+#   python rebuild_rollups.py
+#   python rebuild_rollups.py --check     # report drift only, do not rewrite
+import argparse
+import sys
+
+
+def drift(db):
+    """Owners whose rolled-up totals differ from a fresh aggregate of applications."""
+    from sqlalchemy import text
+
+    from app.services import analytics_rollups
+
+    cols = analytics_rollups.COUNTERS
+    fresh = {r[0]: r[1:] for r in db.execute(text(
+        f"SELECT owner, {', '.join(f'sum({c})' for c in cols)} FROM ("
+        + analytics_rollups._aggregate_sql("COALESCE(j.owner_user_id, 0)")
+        + f") t (day, owner, {', '.join(cols)}) GROUP BY owner"
+    ))}
+    stored = {r[0]: r[1:] for r in db.execute(text(
+        f"SELECT owner_id, {', '.join(f'sum({c})' for c in cols)} FROM owner_daily_stats GROUP BY owner_id"
+    ))}
+    out = []
+    for owner in sorted(set(fresh) | set(stored)):
+        a, b = fresh.get(owner, (0,) * len(cols)), stored.get(owner, (0,) * len(cols))
+        diff = {c: (float(y), float(x)) for c, x, y in zip(cols, a, b) if abs(float(x) - float(y)) > 1e-6}
+        if diff:
+            out.append((owner, diff))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--check", action="store_true", help="only report owners whose rollups drifted")
+    args = ap.parse_args()
+
+    from app.database import SessionLocal
+    from app.services import analytics_rollups
+
+    db = SessionLocal()
+    try:
+        rows = drift(db)
+        db.rollback()
+        for owner, diff in rows:
+            print(f"owner {owner}: " + ", ".join(f"{c} {s} != {f}" for c, (s, f) in diff.items()))
+        print(f"{len(rows)} owner(s) drifted")
+        if args.check:
+            sys.exit(1 if rows else 0)
+        analytics_rollups.rebuild(db)
+        print("rebuilt job_daily_stats and owner_daily_stats")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
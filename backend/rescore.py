@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# Offline re-scoring of stored applications after a model change (BI_ENCODER_MODEL,
+# CROSS_ENCODER_MODEL, INFERENCE_BACKEND, JOB_FIELD_WEIGHTS ...). Run with the
+# new settings in the environment; safe while the API is live:
+#   - applications are read in keyset pages (id > last ORDER BY id), no locks held
+#   - the id range is split into N contiguous shards, one process each
+#   - every chunk is scored in one batch and written in one short transaction
+#     with lock_timeout, so rows locked by the API are retried, then skipped
+#     (skipped rows keep their old score_model and are picked up by the next run)
+#   - progress is checkpointed per shard; re-running resumes an unfinished run,
+#     or starts a new pass over the rows still on another score_model once all
+#     shards are done
+#
+#   python rescore.py --shards 4
+#   python rescore.py --shards 4 --all --no-cache     # force a full recompute
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+
+def _checkpoint_path(base: str, shard: int) -> str:
+    return f"{base}.shard{shard}.json"
+
+
+def _load_checkpoint(base: str, shard: int):
+    try:
+        with open(_checkpoint_path(base, shard)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_checkpoint(base: str, shard: int, state: dict) -> None:
+    path = _checkpoint_path(base, shard)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def _setup_db(lock_timeout_ms: int, statement_timeout_ms: int):
+    from sqlalchemy import event
+
+    from app.database import engine
+
+    @event.listens_for(engine, "connect")
+    def _session_settings(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"SET lock_timeout = {int(lock_timeout_ms)}")
+        cur.execute(f"SET statement_timeout = {int(statement_timeout_ms)}")
+        cur.execute("SET application_name = 'rescore'")
+        cur.close()
+
+    engine.dispose()  # connections opened at import time predate the listener
+
+
+def run_shard(shard: int, args) -> dict:
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    _setup_db(args.lock_timeout_ms, args.statement_timeout_ms)
+
+    from sqlalchemy import or_
+    from sqlalchemy.exc import OperationalError
+
+    from app import models
+    from app.database import SessionLocal
+    from app.services import analytics_rollups, score_cache
+    from app.services.scoring_pipeline import score_applications, to_stored_score
+
+    state = _load_checkpoint(args.checkpoint, shard)
+    model_id = score_cache.score_model_id()
+    current = (score_cache.score_model_id(True), score_cache.score_model_id(False))
+    rows_done, skipped, failed = state["rows"], state["skipped"], state["failed"]
+    last = state["last"]
+    t0 = time.perf_counter()
+    n_run = 0
+
+    db = SessionLocal()
+    try:
+        while last < state["hi"]:
+            q = db.query(models.Application.id, models.Application.cv_id, models.Application.job_id).filter(
+                models.Application.id > last, models.Application.id <= state["hi"],
+            )
+            if not args.all:
+                q = q.filter(or_(models.Application.score_model.is_(None),
+                                 models.Application.score_model.notin_(current)))
+            page = q.order_by(models.Application.id).limit(args.chunk).all()
+            db.commit()  # end the read transaction before inference
+            if not page:
+                break
+
+            scores, errors = score_applications(db, [tuple(r) for r in page], use_cache=not args.no_cache)
+            db.commit()  # score_cache rows; a retried write below does not redo inference
+            for attempt in range(args.retries + 1):
+                try:
+                    stored = {a: to_stored_score(s) for a, s in scores.items()}
+                    analytics_rollups.scores_changed(db, stored)
+                    db.bulk_update_mappings(
+                        models.Application,
+                        [{"id": a, "score": s, "score_model": model_id} for a, s in stored.items()],
+                    )
+                    db.commit()
+                    break
+                except OperationalError as e:
+                    # lock_timeout / statement_timeout: back off and retry the write
+                    db.rollback()
+                    if attempt == args.retries:
+                        print(f"[shard {shard}] skipping {len(scores)} rows after {page[0].id}: {e.orig}")
+                        skipped += len(scores)
+                        scores = {}
+                    else:
+                        time.sleep(args.backoff_sec * (2 ** attempt))
+
+            rows_done += len(scores)
+            failed += len(errors)
+            n_run += len(page)
+            last = page[-1].id
+            state.update(last=last, rows=rows_done, skipped=skipped, failed=failed)
+            _save_checkpoint(args.checkpoint, shard, state)
+            rate = n_run / max(time.perf_counter() - t0, 1e-9)
+            print(f"[shard {shard}] id<={last}  scored {rows_done}  failed {failed}  skipped {skipped}  {rate:.1f} rows/s")
+            if args.sleep_ms:
+                time.sleep(args.sleep_ms / 1000.0)
+    finally:
+        db.close()
+
+    state["done"] = True
+    _save_checkpoint(args.checkpoint, shard, state)
+    return {"shard": shard, "processed": n_run, "scored": rows_done, "failed": failed, "skipped": skipped}
+
+
+def _plan(args) -> None:
+    """
+    Split [min id, max id] into contiguous shard ranges, unless resuming the
+    same unfinished run. A finished run is planned again: the new pass only
+    picks up rows whose score_model still differs (written meanwhile by an
+    older worker, failed last time ...).
+    """
+    from sqlalchemy import func
+
+    from app import models
+    from app.database import SessionLocal
+    from app.services import score_cache
+
+    model_id = score_cache.score_model_id()
+    states = [_load_checkpoint(args.checkpoint, s) for s in range(args.shards)]
+    same_run = all(s and s.get("model") == model_id and s.get("shards") == args.shards for s in states)
+    if not args.reset and same_run and not all(s.get("done") for s in states):
+        print(f"resuming {args.shards} shards for {model_id}")
+        return
+    db = SessionLocal()
+    try:
+        lo, hi = db.query(func.min(models.Application.id), func.max(models.Application.id)).one()
+    finally:
+        db.close()
+    lo, hi = (lo or 1) - 1, hi or 0
+    step = max(1, -(-(hi - lo) // args.shards))
+    for s in range(args.shards):
+        start = min(hi, lo + s * step)
+        _save_checkpoint(args.checkpoint, s, {
+            "model": model_id, "shards": args.shards, "lo": start, "hi": min(hi, start + step),
+            "last": start, "rows": 0, "skipped": 0, "failed": 0, "done": False,
+        })
+    print(f"rescoring ids ({lo}, {hi}] in {args.shards} shards for {model_id}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shards", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--chunk", type=int, default=256, help="applications per keyset page / transaction")
+    ap.add_argument("--threads", type=int, default=0, help="torch threads per shard (0 = cpu_count / shards)")
+    ap.add_argument("--all", action="store_true", help="also rescore rows already scored by the current model")
+    ap.add_argument("--no-cache", action="store_true", help="ignore the score cache (fresh inference)")
+    ap.add_argument("--checkpoint", default=".rescore_checkpoint")
+    ap.add_argument("--reset", action="store_true", help="discard checkpoints and start over")
+    ap.add_argument("--lock-timeout-ms", type=int, default=2000)
+    ap.add_argument("--statement-timeout-ms", type=int, default=60000)
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--backoff-sec", type=float, default=1.0)
+    ap.add_argument("--sleep-ms", type=int, default=0, help="pause between chunks to cap DB load")
+    args = ap.parse_args()
+    if not args.threads:
+        args.threads = max(1, (os.cpu_count() or 1) // args.shards)
+
+    _plan(args)
+    t0 = time.perf_counter()
+    if args.shards == 1:
+        results = [run_shard(0, args)]
+    else:
+        # spawn: each shard loads its own models and DB pool
+        with mp.get_context("spawn").Pool(args.shards) as pool:
+            results = pool.starmap(run_shard, [(s, args) for s in range(args.shards)])
+    sec = time.perf_counter() - t0
+    rows = sum(r["processed"] for r in results)
+    print(f"done: {rows} rows in {sec:.1f}s ({rows / max(sec, 1e-9):.1f} rows/s); "
+          f"total scored {sum(r['scored'] for r in results)}, failed {sum(r['failed'] for r in results)}, "
+          f"skipped {sum(r['skipped'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
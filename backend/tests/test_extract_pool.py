@@ -0,0 +1,52 @@
+# tests/test_extract_pool.py
+"""
+ExtractionExecutor: documents queued behind slow ones must not be mistaken
+for wedged children. The slow documents are FIFOs, which block the child's
+open() until its own SIGALRM fires.
+    python -m pytest tests/test_extract_pool.py
+"""
+import os
+import signal
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)  # "app" importable however pytest is started
+
+from app.utils import extract_pool  # noqa: E402
+from app.utils.extract_pool import ExtractionExecutor  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not (hasattr(os, "mkfifo") and hasattr(signal, "setitimer")), reason="needs FIFOs and SIGALRM"
+)
+
+
+def test_queued_documents_are_timed_from_their_start(tmp_path, monkeypatch):
+    # queued time alone (2 x timeout with one worker) now exceeds timeout + grace
+    monkeypatch.setattr(extract_pool, "_KILL_GRACE_SEC", 0.5)
+    slow = []
+    for i in range(3):
+        path = tmp_path / f"slow{i}.txt"
+        os.mkfifo(path)
+        slow.append(str(path))
+    fast = []
+    for i in range(2):
+        path = tmp_path / f"fast{i}.txt"
+        path.write_text(f"python developer {i}")
+        fast.append(str(path))
+
+    ex = ExtractionExecutor(max_workers=1, timeout_sec=1.5)
+    try:
+        results = {r.path: r for r in ex.extract_many(slow + fast)}
+    finally:
+        ex.shutdown()
+
+    assert set(results) == set(slow + fast)
+    for path in slow:
+        # the child's own alarm, not a kill of the pool
+        assert "timed out" in results[path].error and "killed" not in results[path].error, results[path]
+    for i, path in enumerate(fast):
+        assert results[path].ok, results[path]
+        assert f"python developer {i}" in results[path].text
@@ -0,0 +1,149 @@
+# tests/test_query_plans.py
+"""
+Query-plan regression test for the hot query shapes (indexes from migrations
+f3a9d1c6b2e7 and 0b7e4c2a9d15). Migrates a scratch Postgres schema to head
+with alembic, seeds a realistic volume, ANALYZEs and checks that each route
+query is planned as an index scan on the expected index. Skipped unless
+DATABASE_URL points at Postgres.
+    DATABASE_URL=postgresql://... python -m pytest tests/test_query_plans.py
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL.startswith("postgresql"), reason="needs a Postgres DATABASE_URL"
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)  # "app" importable however pytest is started
+SCHEMA = "qplan_check"
+SIZES = {"users": 5000, "jobs": 30000, "cvs": 10000, "applications": 300000}
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+SEED = [
+    """INSERT INTO users (id, email, hashed_password, is_admin, account_type, created_at)
+       SELECT i, 'u' || i || '@example.com', 'x', false,
+              CASE WHEN i % 10 = 0 THEN 'company' ELSE 'candidate' END, now()
+       FROM generate_series(1, :users) i""",
+    """INSERT INTO jobs (id, title, location_city, work_mode, employment_type, salary_min, salary_max,
+                         salary_is_confidential, skills, missions, status, posted_at, updated_at, owner_user_id)
+       SELECT i, 'Job ' || i, 'City' || (i % 300), (ARRAY['onsite','remote','hybrid'])[1 + i % 3],
+              'full_time', 20000 + (i % 50) * 1000, 40000 + (i % 50) * 1000, false,
+              jsonb_build_array('skill' || (i % 700), 'skill' || (i % 53)), '[]'::jsonb,
+              CASE WHEN i % 10 < 7 THEN 'published' WHEN i % 10 < 9 THEN 'archived' ELSE 'draft' END,
+              now() - (i % 5000) * interval '1 hour', now(), 10 * (1 + i % (:users / 10))
+       FROM generate_series(1, :jobs) i""",
+    """INSERT INTO cvs (id, user_id, file_path, uploaded_at)
+       SELECT i, 1 + i % :users, 'uploads/' || i || '.pdf', now() - (i % 900) * interval '1 hour'
+       FROM generate_series(1, :cvs) i""",
+    """INSERT INTO applications (id, user_id, job_id, cv_id, status, score, applied_at)
+       SELECT i, 1 + i % :users, 1 + (i * 7) % :jobs, 1 + i % :cvs,
+              (ARRAY['pending','accepted','rejected'])[1 + i % 3], (i % 100)::float,
+              now() - (i % 20000) * interval '1 hour'
+       FROM generate_series(1, :applications) i""",
+]
+
+
+def hot_queries(db, user_id: int, owner_id: int, job_id: int):
+    """(name, query, accepted index names) mirroring the route queries."""
+    from sqlalchemy import func, tuple_
+
+    from app import models
+
+    cursor = (datetime.now(timezone.utc) - timedelta(days=30), 10 ** 9)
+    published = db.query(models.Job).filter(models.Job.status == "published")
+    listing = (models.Job.posted_at.desc(), models.Job.id.desc())
+    return [
+        ("GET /jobs (first page)", published.order_by(*listing).limit(21),
+         {"ix_jobs_published_posted_at", "ix_jobs_status_posted_at"}),
+        ("GET /jobs (cursor page)",
+         published.filter(tuple_(models.Job.posted_at, models.Job.id) < cursor).order_by(*listing).limit(21),
+         {"ix_jobs_published_posted_at", "ix_jobs_status_posted_at"}),
+        ("GET /jobs?status=draft",
+         db.query(models.Job).filter(models.Job.status == "draft").order_by(*listing).limit(21),
+         {"ix_jobs_status_posted_at"}),
+        ("GET /jobs?location_city=",
+         published.filter(func.lower(models.Job.location_city) == "city42").order_by(*listing).limit(21),
+         {"ix_jobs_published_city", "ix_jobs_published_posted_at"}),
+        ("GET /jobs?skills=",
+         published.filter(models.Job.skills.contains(["skill123"])).order_by(*listing).limit(21),
+         {"ix_jobs_skills"}),
+        ("company jobs", db.query(models.Job).filter(models.Job.owner_user_id == owner_id)
+         .order_by(models.Job.posted_at.desc()), {"ix_jobs_owner_posted_at"}),
+        ("applications by job", db.query(models.Application).filter(models.Application.job_id == job_id)
+         .order_by(models.Application.applied_at.desc()), {"ix_applications_job_applied_at"}),
+        ("GET /applications/me", db.query(models.Application).filter(models.Application.user_id == user_id)
+         .order_by(models.Application.applied_at.desc()), {"ix_applications_user_applied_at"}),
+        ("applications since (all)", db.query(func.count(models.Application.id))
+         .filter(models.Application.applied_at >= cursor[0]), {"ix_applications_applied_at"}),
+        ("applications since (own)", db.query(func.count(models.Application.id))
+         .join(models.Job, models.Job.id == models.Application.job_id)
+         .filter(models.Job.owner_user_id == owner_id, models.Application.applied_at >= cursor[0]),
+         {"ix_applications_job_applied_at", "ix_applications_applied_at"}),
+        ("GET /cvs/current", db.query(models.CV).filter(models.CV.user_id == user_id)
+         .order_by(models.CV.uploaded_at.desc()).limit(1), {"ix_cvs_user_uploaded_at"}),
+    ]
+
+
+def _index_nodes(plan: dict):
+    if plan.get("Node Type") in INDEX_NODES:
+        yield plan["Node Type"], plan.get("Index Name")
+    for child in plan.get("Plans", []):
+        yield from _index_nodes(child)
+
+
+@pytest.fixture(scope="module")
+def db():
+    """Session on a scratch schema migrated to head and seeded; dropped afterwards."""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+
+    admin = create_engine(DATABASE_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+    engine = create_engine(DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        cfg = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+        cfg.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+        with engine.connect() as conn:
+            cfg.attributes["connection"] = conn  # alembic/env.py migrates on it
+            command.upgrade(cfg, "head")
+            conn.commit()
+        with engine.begin() as conn:
+            for sql in SEED:
+                conn.execute(text(sql), SIZES)
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+        with Session(engine) as session:
+            yield session
+    finally:
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        engine.dispose()
+        admin.dispose()
+
+
+def test_hot_queries_use_their_indexes(db):
+    from sqlalchemy import text
+    from sqlalchemy.dialects import postgresql
+
+    failures = []
+    for name, query, expected in hot_queries(db, user_id=42, owner_id=10, job_id=42):
+        sql = query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+        used = list(_index_nodes(plan))
+        if not any(idx in expected for _, idx in used):
+            found = ", ".join(f"{node} on {idx}" for node, idx in used) or plan["Node Type"]
+            failures.append(f"{name}: {found} (expected one of {sorted(expected)})")
+    assert not failures, "query plan regressions:\n" + "\n".join(failures)
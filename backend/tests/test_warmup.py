@@ -0,0 +1,51 @@
+# tests/test_warmup.py
+"""
+Warmup state machine: a second run_warmup() while the first is still going
+returns at once, and status() (behind /healthz) never blocks on it.
+    python -m pytest tests/test_warmup.py
+"""
+import os
+import sys
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)  # "app" importable however pytest is started
+
+from app.services import warmup  # noqa: E402
+from app.utils import nlp  # noqa: E402
+
+
+def test_concurrent_run_returns_while_first_is_in_progress(monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_bi():
+        entered.set()
+        assert release.wait(10)
+        return {"name": "fake"}
+
+    monkeypatch.setattr(warmup, "_warm_bi", slow_bi)
+    monkeypatch.setattr(nlp, "USE_CROSS_ENCODER", False)
+    monkeypatch.setattr(warmup, "_state", {**warmup._state, "ready": False, "running": False})
+
+    first = warmup.start_warmup()
+    assert entered.wait(5)
+
+    second: dict = {}
+    t = threading.Thread(target=lambda: second.update(warmup.run_warmup()), daemon=True)
+    t.start()
+    t.join(2)
+    assert not t.is_alive(), "second run_warmup() blocked"
+    assert second["running"] and not second["ready"]
+
+    probe = threading.Thread(target=warmup.status, daemon=True)
+    probe.start()
+    probe.join(2)
+    assert not probe.is_alive(), "status() blocked"
+
+    release.set()
+    first.join(5)
+    assert not first.is_alive()
+    state = warmup.status()
+    assert state["ready"] and not state["running"]
+    assert state["models"] == {"bi_encoder": {"name": "fake"}}
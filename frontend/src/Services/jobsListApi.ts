@@ -1,7 +1,14 @@
 import api from "./apiClient";
 import type { JobDetail } from "./jobsApi";
 
+// GET /jobs is keyset-paginated: follow X-Next-Cursor until the last page
 export async function getJobs(): Promise<JobDetail[]> {
-  const res = await api.get<JobDetail[]>("/jobs"); // swap to paged route if needed
-  return res.data;
+  const jobs: JobDetail[] = [];
+  let cursor: string | undefined;
+  do {
+    const res = await api.get<JobDetail[]>("/jobs", { params: { limit: 100, cursor } });
+    jobs.push(...res.data);
+    cursor = res.headers["x-next-cursor"] || undefined;
+  } while (cursor);
+  return jobs;
 }